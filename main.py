@@ -4,28 +4,32 @@ import pathlib
 import platform
 import shutil
 import textwrap
+import time
 
 import aiofiles
 import click
-import pyhooks
 
+import src.bundle as bundle
 import src.clock as clock
+import src.command_server as command_server
 import src.human_setup as human_setup
 import src.note as note
+import src.setup_steps as setup_steps
 from src.settings import (
     AGENT_CODE_DIR,
     AGENT_HOME_DIR,
+    COMMAND_SOCKET_FILE,
     HOOKS,
     INSTRUCTIONS_FILE,
     RUN_INFO_FILE,
+    TerminalRecording,
     async_cleanup,
     get_task_env,
+    load_settings,
 )
 
-_SETUP_DONE_FILE = AGENT_CODE_DIR / ".done"
 
-
-async def write_and_log_instructions(task_info: pyhooks.TaskInfo) -> None:
+async def write_and_log_instructions(task_info: dict) -> None:
     instructions = """
     Internet permissions: {permissions}
 
@@ -33,8 +37,8 @@ async def write_and_log_instructions(task_info: pyhooks.TaskInfo) -> None:
     {instructions}
     """
     content = textwrap.dedent(instructions).format(
-        permissions=", ".join(task_info.permissions or ["no internet"]),
-        instructions=task_info.instructions,
+        permissions=", ".join(task_info["permissions"] or ["no internet"]),
+        instructions=task_info["instructions"],
     )
 
     INSTRUCTIONS_FILE.parent.mkdir(parents=True, exist_ok=True)
@@ -48,56 +52,88 @@ async def write_and_log_instructions(task_info: pyhooks.TaskInfo) -> None:
         )
 
 
-async def setup():
+async def write_run_info():
     task_info = await HOOKS.getTask()
-    await write_and_log_instructions(task_info)
-    run_info = {
-        "task": task_info.dict(),
-        "agent": json.loads((AGENT_HOME_DIR / "settings.json").read_text()),
-    }
+    async with aiofiles.open(AGENT_HOME_DIR / "settings.json", "r") as f:
+        agent_settings = json.loads(await f.read())
+    run_info = {"task": task_info.dict(), "agent": agent_settings}
     async with aiofiles.open(RUN_INFO_FILE, "w") as f:
         await f.write(json.dumps(run_info))
 
+
+async def write_instructions():
+    await write_and_log_instructions(load_settings().run_info["task"])
+
+
+async def install_agg():
     # TODO: replace with install as part of image build when agents can have
     # non-python dependencies
-    if run_info["agent"]["terminal_recording"] in {
-        "FULL_TERMINAL_RECORDING",
-        "GIF_TERMINAL_RECORDING",
-    }:
+    if load_settings().terminal_recording.logs_gifs:
         destination = pathlib.Path.home() / ".local/bin/agg"
         destination.parent.mkdir(parents=True, exist_ok=True)
-        shutil.copy(AGENT_CODE_DIR / f"lib/agg_{platform.machine()}", destination)
+        await asyncio.to_thread(
+            shutil.copy, AGENT_CODE_DIR / f"lib/agg_{platform.machine()}", destination
+        )
+
+
+async def build_bundle():
+    await asyncio.to_thread(bundle.build_bundle)
+
+
+async def create_profile():
+    settings = load_settings()
+    await human_setup.create_profile_file(
+        intermediate_scoring=settings.intermediate_scoring,
+        with_recording=(
+            settings.terminal_recording != TerminalRecording.NO_TERMINAL_RECORDING
+        ),
+        with_clock_prompt=True,
+        env=get_task_env(),
+        code_path=bundle.BUNDLE_FILE,
+    )
+
+
+async def source_profile():
+    shell_profile_file = AGENT_HOME_DIR / ".bashrc"
+    click.echo(f"Ensuring profile file is sourced in {shell_profile_file}")
+    await human_setup.ensure_sourced(shell_profile_file, human_setup.AGENT_PROFILE_FILE)
 
-    return run_info
+
+# Each step reads what it needs from the files written by the steps it depends on,
+# so it can run on its own after a restart
+SETUP_STEPS = (
+    setup_steps.Step("run_info", write_run_info),
+    setup_steps.Step("instructions", write_instructions, ("run_info",)),
+    setup_steps.Step("agg", install_agg, ("run_info",)),
+    setup_steps.Step("bundle", build_bundle),
+    setup_steps.Step("profile", create_profile, ("run_info", "bundle")),
+    setup_steps.Step("source_profile", source_profile, ("profile",)),
+)
 
 
 async def _main(reset: bool = False, local: bool = False):
     if reset:
         click.echo("Resetting agent setup")
-        _SETUP_DONE_FILE.unlink(missing_ok=True)
+        setup_steps.reset()
         clock.EVENTS_LOG.unlink(missing_ok=True)
         clock.STATUS_FILE.unlink(missing_ok=True)
+        clock.CHECKPOINT_FILE.unlink(missing_ok=True)
+        clock.INTERVALS_FILE.unlink(missing_ok=True)
         human_setup.AGENT_PROFILE_FILE.unlink(missing_ok=True)
+        human_setup.get_profile_hash_file(human_setup.AGENT_PROFILE_FILE).unlink(
+            missing_ok=True
+        )
         human_setup.WELCOME_MESSAGE_FILE.unlink(missing_ok=True)
+        human_setup.SETUP_COMPLETE_FILE.unlink(missing_ok=True)
         note.LOG_FILE.unlink(missing_ok=True)
+        bundle.BUNDLE_FILE.unlink(missing_ok=True)
 
-    if not _SETUP_DONE_FILE.exists():
+    if not setup_steps.is_done(SETUP_STEPS):
         await HOOKS.unpause()
         click.echo("Setting up agent")
-        run_info = await setup()
-        click.echo("Creating profile file")
-        profile_file = await human_setup.create_profile_file(
-            intermediate_scoring=run_info["task"]["scoring"]["intermediate"],
-            with_recording=(
-                run_info["agent"]["terminal_recording"] != "NO_TERMINAL_RECORDING"
-            ),
-            env=get_task_env(),
-        )
-        shell_profile_file = AGENT_HOME_DIR / ".bashrc"
-        click.echo(f"Ensuring profile file is sourced in {shell_profile_file}")
-        await human_setup.ensure_sourced(shell_profile_file, profile_file)
-        _SETUP_DONE_FILE.parent.mkdir(parents=True, exist_ok=True)
-        _SETUP_DONE_FILE.touch()
+        start = time.perf_counter()
+        await setup_steps.run_steps(SETUP_STEPS)
+        click.echo(f"Agent set up in {time.perf_counter() - start:.2f}s")
 
     if (await clock.get_status()) == clock.ClockStatus.RUNNING:
         click.echo("Pausing clock")
@@ -110,8 +146,14 @@ async def _main(reset: bool = False, local: bool = False):
         await async_cleanup()
         return
 
-    click.echo("Sleeping forever...")
-    await asyncio.sleep(float("inf"))
+    click.echo(f"Serving helper commands on {COMMAND_SOCKET_FILE}")
+    served_commands = [
+        command for command in human_setup.HelperCommand if command.served
+    ]
+    await command_server.serve(
+        {command.value.split()[0] for command in served_commands},
+        preload_modules=[command.module for command in served_commands],
+    )
 
 
 @click.command()
@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import os
+import pathlib
+import subprocess
+import sys
+
+import click
+import prettytable
+
+from src.commands import HelperCommand
+
+_ROOT_DIR = pathlib.Path(__file__).parents[1]
+# Only imported on the code paths that talk to the hooks API
+_LAZY_MODULES = ("pyhooks", "aiohttp")
+
+
+def parse_importtime(output: str) -> dict[str, int]:
+    """Cumulative microseconds of each top level import in `-X importtime` output"""
+    import_times = {}
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        _, cumulative, name = line.removeprefix("import time:").split("|")
+        # Nested imports are indented
+        if not name.startswith("  "):
+            import_times[name.strip()] = int(cumulative)
+    return import_times
+
+
+def measure_import(module: str) -> tuple[int, set[str]]:
+    """Microseconds to import a module in a new interpreter, and the modules loaded"""
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+        env=os.environ
+        | {
+            "PYTHONPATH": os.pathsep.join(
+                filter(None, [str(_ROOT_DIR), os.getenv("PYTHONPATH")])
+            )
+        },
+    )
+    loaded_modules = {
+        line.split("|")[-1].strip()
+        for line in process.stderr.splitlines()
+        if line.startswith("import time:")
+    }
+    return parse_importtime(process.stderr)[module], loaded_modules
+
+
+@click.command()
+@click.option("--runs", type=int, default=5, help="Best of this many imports")
+@click.option("--max_ms", type=float, help="Fail if any command takes longer")
+def main(runs: int, max_ms: float | None):
+    """Time importing the module of each helper command with `-X importtime`.
+
+    Fails if a command imports pyhooks (or its HTTP stack) just by being imported,
+    or takes longer than --max_ms.
+    """
+    table = prettytable.PrettyTable()
+    table.field_names = ["Command", "Module", "Import (ms)", "Eager modules"]
+    table.align["Import (ms)"] = "r"
+    failures = []
+    for command in HelperCommand:
+        measurements = [measure_import(command.module) for _ in range(runs)]
+        import_ms = min(import_us for import_us, _ in measurements) / 1000
+        eager_modules = sorted(
+            module for module in _LAZY_MODULES if module in measurements[0][1]
+        )
+        table.add_row(
+            [command.name, command.module, f"{import_ms:.1f}", ", ".join(eager_modules)]
+        )
+        if eager_modules:
+            failures.append(f"{command.name} imports {', '.join(eager_modules)}")
+        if max_ms is not None and import_ms > max_ms:
+            failures.append(f"{command.name} took {import_ms:.1f}ms > {max_ms}ms")
+
+    click.echo(table.get_string())
+    for failure in failures:
+        click.echo(failure, err=True)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import pathlib
+import shutil
+import subprocess
+import tempfile
+import time
+from unittest import mock
+
+import click
+import prettytable
+
+import src.human_setup as human_setup
+
+
+def time_shell_start_up(rc_file: pathlib.Path, env: dict[str, str], runs: int) -> float:
+    """Best wall time in ms to start an interactive bash sourcing rc_file and exit"""
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(
+            ["bash", "--rcfile", str(rc_file), "-i", "-c", "exit 0"],
+            stdin=subprocess.DEVNULL,
+            capture_output=True,
+            check=True,
+            env=env,
+        )
+        times.append(time.perf_counter() - start)
+    return min(times) * 1000
+
+
+@click.command()
+@click.option("--runs", type=int, default=20, help="Best of this many starts")
+def main(runs: int):
+    """Time how much the agent profile adds to starting an interactive shell.
+
+    Measures the common case of a new shell after setup has completed, where the
+    profile should only define aliases and skip setup and recording without
+    starting any processes.
+    """
+    if shutil.which("bash") is None:
+        raise click.ClickException("bash is not installed")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        tmp_path = pathlib.Path(tmp_dir)
+        setup_complete_file = tmp_path / ".setup_complete"
+        setup_complete_file.touch()
+        with mock.patch.object(human_setup, "SETUP_COMPLETE_FILE", setup_complete_file):
+            profile_file = asyncio.run(
+                human_setup.create_profile_file(
+                    intermediate_scoring=True,
+                    with_clock_prompt=True,
+                    env={},
+                    profile_file=tmp_path / "profile.sh",
+                    code_path=tmp_path / "agent_code.pyz",
+                )
+            )
+        empty_file = tmp_path / "empty.sh"
+        empty_file.touch()
+
+        # The recorder exports this in the shell it starts
+        env = os.environ | {"METR_RECORDING_STARTED": "1", "HOME": tmp_dir}
+        empty_ms = time_shell_start_up(empty_file, env, runs)
+        profile_ms = time_shell_start_up(profile_file, env, runs)
+
+    table = prettytable.PrettyTable()
+    table.field_names = ["Rc file", "Start up (ms)"]
+    table.align["Start up (ms)"] = "r"
+    table.add_row(["(empty)", f"{empty_ms:.1f}"])
+    table.add_row(["profile.sh", f"{profile_ms:.1f}"])
+    table.add_row(["Overhead", f"{profile_ms - empty_ms:.1f}"])
+    click.echo(table.get_string())
+
+
+if __name__ == "__main__":
+    main()
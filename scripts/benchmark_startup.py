@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import os
+import pathlib
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import click
+import prettytable
+
+import src.bundle as bundle
+from src.commands import HelperCommand
+
+_ROOT_DIR = pathlib.Path(__file__).parents[1]
+
+
+def time_start_up(
+    module: str, python_path: pathlib.Path, runs: int
+) -> tuple[float, float]:
+    """Best wall time in ms to start Python and import a module, and best time spent
+    importing the agent code itself (compiling it, unless it comes from the bundle)
+    """
+    env = os.environ | {
+        "PYTHONPATH": os.pathsep.join(
+            filter(None, [str(python_path), os.getenv("PYTHONPATH")])
+        ),
+        # Like a fresh container, where nothing has been compiled yet
+        "PYTHONDONTWRITEBYTECODE": "1",
+    }
+    wall_times, agent_code_times = [], []
+    for _ in range(runs):
+        start = time.perf_counter()
+        process = subprocess.run(
+            [sys.executable, "-P", "-X", "importtime", "-c", f"import {module}"],
+            capture_output=True,
+            text=True,
+            check=True,
+            env=env,
+        )
+        wall_times.append(time.perf_counter() - start)
+        agent_code_times.append(
+            sum(
+                int(self_us)
+                for self_us, _, name in (
+                    line.removeprefix("import time:").split("|")
+                    for line in process.stderr.splitlines()
+                    if line.startswith("import time:")
+                    and "imported package" not in line
+                )
+                if name.strip().startswith("src.")
+            )
+            / 1e6
+        )
+    return min(wall_times) * 1000, min(agent_code_times) * 1000
+
+
+@click.command()
+@click.option("--runs", type=int, default=5, help="Best of this many starts")
+def main(runs: int):
+    """Compare start up time of each helper command from source and from the bundle"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        code_dir = pathlib.Path(tmp_dir) / "code"
+        shutil.copytree(
+            _ROOT_DIR / "src",
+            code_dir / "src",
+            ignore=shutil.ignore_patterns("__pycache__"),
+        )
+        bundle_file = bundle.build_bundle(
+            code_dir / "src", pathlib.Path(tmp_dir) / "agent_code.pyz"
+        )
+
+        table = prettytable.PrettyTable()
+        table.field_names = [
+            "Module",
+            "Source (ms)",
+            "Bundle (ms)",
+            "Agent code from source (ms)",
+            "Agent code from bundle (ms)",
+        ]
+        for module in sorted({command.module for command in HelperCommand}):
+            source_ms, source_code_ms = time_start_up(module, code_dir, runs)
+            bundle_ms, bundle_code_ms = time_start_up(module, bundle_file, runs)
+            table.add_row(
+                [
+                    module,
+                    f"{source_ms:.1f}",
+                    f"{bundle_ms:.1f}",
+                    f"{source_code_ms:.1f}",
+                    f"{bundle_code_ms:.1f}",
+                ]
+            )
+    click.echo(table.get_string())
+
+
+if __name__ == "__main__":
+    main()
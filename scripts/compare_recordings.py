@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import base64
+import pathlib
+import platform
+import shutil
+import subprocess
+import tempfile
+import time
+
+import click
+import prettytable
+
+import src.terminal as terminal
+
+_ROOT_DIR = pathlib.Path(__file__).parents[1]
+
+
+def _text_payload(events: list[terminal.TerminalEvent]) -> str:
+    return terminal.strip_ansi(terminal.cast_to_string(events))
+
+
+def _styled_text_payload(events: list[terminal.TerminalEvent]) -> str:
+    return terminal.ansi_to_html(terminal.cast_to_string(events))
+
+
+def _cast_payload(cast_header: dict, events: list[terminal.TerminalEvent]) -> str:
+    return "".join(terminal.events_to_cast_lines(cast_header, events))
+
+
+def _gif_payload(agg: pathlib.Path, cast_file: pathlib.Path) -> str:
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        gif_file = pathlib.Path(tmp_dir) / "terminal.gif"
+        subprocess.run(
+            [
+                str(agg),
+                str(cast_file),
+                str(gif_file),
+                *terminal.RenderSettings(fps_cap=7, speed=3).agg_options,
+            ],
+            check=True,
+            capture_output=True,
+        )
+        image_base64 = base64.b64encode(gif_file.read_bytes()).decode("utf-8")
+    return "data:image/gif;base64," + image_base64
+
+
+@click.command()
+@click.argument(
+    "CAST_FILE",
+    type=click.Path(exists=True, dir_okay=False, path_type=pathlib.Path),
+    default=_ROOT_DIR / "tests/wordle.cast",
+)
+@click.option(
+    "--agg",
+    type=click.Path(dir_okay=False, path_type=pathlib.Path),
+    default=_ROOT_DIR / f"lib/agg_{platform.machine()}",
+)
+def main(cast_file: pathlib.Path, agg: pathlib.Path):
+    """Compare payload size and time of each terminal recording format"""
+    cast_header, events = terminal.read_cast(cast_file)
+    results = []
+    for mode, get_payload in (
+        ("TEXT_TERMINAL_RECORDING", lambda: _text_payload(events)),
+        ("STYLED_TEXT_TERMINAL_RECORDING", lambda: _styled_text_payload(events)),
+        ("CAST_TERMINAL_RECORDING", lambda: _cast_payload(cast_header, events)),
+        ("GIF_TERMINAL_RECORDING", lambda: _gif_payload(agg, cast_file)),
+    ):
+        if mode == "GIF_TERMINAL_RECORDING" and not (agg.exists() or shutil.which(agg)):
+            click.echo(f"Skipping {mode}: agg not found at {agg}", err=True)
+            continue
+
+        start = time.perf_counter()
+        payload = get_payload()
+        results.append((mode, len(payload.encode()), time.perf_counter() - start))
+
+    table = prettytable.PrettyTable()
+    table.field_names = ["Mode", "Payload bytes", "vs. cast", "Time (s)"]
+    cast_bytes = next(size for mode, size, _ in results if mode.startswith("CAST"))
+    for mode, size, elapsed in results:
+        table.add_row([mode, size, f"{size / cast_bytes:.2f}x", f"{elapsed:.3f}"])
+    table.align["Mode"] = "l"
+    click.echo(f"{cast_file} ({len(events)} events)")
+    click.echo(table.get_string())
+
+
+if __name__ == "__main__":
+    main()
@@ -6,8 +6,10 @@ _OPTIONS = {
     "terminal_recording": [
         "NO_TERMINAL_RECORDING",
         "TEXT_TERMINAL_RECORDING",
+        "STYLED_TEXT_TERMINAL_RECORDING",
         "GIF_TERMINAL_RECORDING",
         "FULL_TERMINAL_RECORDING",
+        "CAST_TERMINAL_RECORDING",
     ],
 }
 
@@ -1,3 +1,9 @@
+"""Fake vivaria hooks API for running the agent locally.
+
+Imports `src`, so run it from the repository root as a module:
+`python -m scripts.hooks_server [--port PORT] [--clear]`
+"""
+
 from __future__ import annotations
 
 import asyncio
@@ -5,15 +11,17 @@ import datetime
 import json
 import pathlib
 
-import aiofiles
 import click
 import fastapi
 import pyhooks
 import uvicorn
 
+from src.writer import BufferedWriter
+
 app = fastapi.FastAPI()
 
 ACTIVITY_LOG_FILE = pathlib.Path.cwd() / "hooks_activity.jsonl"
+_activity_log = BufferedWriter(ACTIVITY_LOG_FILE, "a")
 
 
 @app.get("/test")
@@ -50,9 +58,8 @@ async def local(request: fastapi.Request, hook: str):
         timestamp = datetime.datetime.now().isoformat()
         entry = json.dumps({"timestamp": timestamp, "hook": hook, "data": data})
         click.echo(entry)
-        ACTIVITY_LOG_FILE.parent.mkdir(parents=True, exist_ok=True)
-        async with aiofiles.open(ACTIVITY_LOG_FILE, "a") as f:
-            await f.write(f"{entry}\n")
+        await _activity_log.write(f"{entry}\n")
+        await _activity_log.flush()
 
         return {"result": {"success": True}}
     except Exception as e:
@@ -62,6 +69,7 @@ async def local(request: fastapi.Request, hook: str):
 async def _main(port: int, clear_log: bool = False):
     if clear_log:
         ACTIVITY_LOG_FILE.unlink(missing_ok=True)
+    ACTIVITY_LOG_FILE.parent.mkdir(parents=True, exist_ok=True)
     config = uvicorn.Config(app, host="0.0.0.0", port=port, loop="asyncio")
     server = uvicorn.Server(config)
     click.echo("Starting hooks server")
@@ -74,7 +82,10 @@ async def _main(port: int, clear_log: bool = False):
     ):
         click.echo(f"  export {key}={value}")
 
-    await server.serve()
+    try:
+        await server.serve()
+    finally:
+        await _activity_log.close()
 
 
 @click.command()
@@ -0,0 +1,245 @@
+from __future__ import annotations
+
+import array
+import itertools
+import json
+import operator
+import pathlib
+import statistics
+from typing import NamedTuple
+
+import click
+import prettytable
+
+import src.export as export
+import src.terminal as terminal
+
+_DEFAULT_IDLE_THRESHOLD = 30.0
+
+
+class EventArrays(NamedTuple):
+    """Contiguous per-event columns of one terminal window"""
+
+    times: array.array
+    # Payload bytes of output events, 0 for other events
+    output_lengths: array.array
+    keystrokes: array.array
+
+
+class ActivityMetrics(NamedTuple):
+    duration: float
+    active_time: float
+    idle_time: float
+    events: int
+    output_bytes: int
+    output_rate: float
+    keystrokes: int
+    keystrokes_per_minute: float
+    median_keystroke_interval: float | None
+
+
+def _is_keystroke(event_type: str, data: str) -> bool:
+    # Input is only recorded with `asciinema rec --stdin`, otherwise a keystroke
+    # shows up as the terminal echoing back a single printable character
+    return event_type == "i" or (
+        event_type == "o" and len(data) == 1 and data.isprintable()
+    )
+
+
+def _get_output_length(event_type: str, data: str) -> int:
+    return len(data.encode()) if event_type == "o" else 0
+
+
+def _parse_cast_events(lines: list[str]) -> list[terminal.TerminalEvent]:
+    """Parse all events with one json.loads call, or line by line (skipping
+    malformed lines, e.g. one still being written) if that fails
+    """
+    lines = list(filter(None, map(str.strip, lines)))
+    try:
+        return json.loads(f"[{','.join(lines)}]")
+    except json.JSONDecodeError:
+        pass
+
+    events = []
+    for line in lines:
+        try:
+            events.append(json.loads(line))
+        except json.JSONDecodeError:
+            continue
+    return events
+
+
+def load_cast_arrays(cast_file: pathlib.Path) -> EventArrays:
+    with terminal.open_cast(cast_file) as f:
+        f.readline()
+        events = _parse_cast_events(f.readlines())
+    if not events:
+        return EventArrays(array.array("d"), array.array("Q"), array.array("B"))
+
+    event_types = list(map(operator.itemgetter(1), events))
+    data = list(map(operator.itemgetter(2), events))
+    return EventArrays(
+        times=array.array("d", map(operator.itemgetter(0), events)),
+        output_lengths=array.array("Q", map(_get_output_length, event_types, data)),
+        keystrokes=array.array("B", map(_is_keystroke, event_types, data)),
+    )
+
+
+def load_export_arrays(session_dir: pathlib.Path) -> dict[int, EventArrays]:
+    """Load the arrays of each window from a columnar export, in one pass over the
+    events.
+
+    Only single-byte events need their payload read, to check for keystrokes.
+    """
+    columns = export.load_columns(session_dir)
+    kinds = json.loads((session_dir / "schema.json").read_text())["event_kinds"]
+    input_kind, output_kind = kinds.index("i"), kinds.index("o")
+    payloads = (session_dir / "events.blob").read_bytes()
+
+    window_arrays: dict[int, EventArrays] = {}
+    for window_id, event_time, kind, offset, length in zip(
+        columns["events.window"],
+        columns["events.time"],
+        columns["events.kind"],
+        columns["events.offset"],
+        columns["events.length"],
+    ):
+        arrays = window_arrays.get(window_id)
+        if arrays is None:
+            arrays = window_arrays[window_id] = EventArrays(
+                array.array("d"), array.array("Q"), array.array("B")
+            )
+        arrays.times.append(event_time)
+        arrays.output_lengths.append(length if kind == output_kind else 0)
+        arrays.keystrokes.append(
+            kind == input_kind
+            or (
+                kind == output_kind
+                and length == 1
+                and chr(payloads[offset]).isprintable()
+            )
+        )
+    return dict(sorted(window_arrays.items()))
+
+
+def compute_metrics(
+    events: EventArrays, idle_threshold: float = _DEFAULT_IDLE_THRESHOLD
+) -> ActivityMetrics:
+    """Activity statistics of one window.
+
+    Gaps between consecutive events longer than `idle_threshold` seconds count as
+    idle time, everything else as active time.
+    """
+    times = events.times
+    num_events = len(times)
+    duration = times[-1] - times[0] if num_events else 0.0
+    gaps = array.array("d", map(operator.sub, times[1:], times[:-1]))
+    active_time = sum(
+        itertools.compress(
+            gaps, map(operator.ge, itertools.repeat(idle_threshold), gaps)
+        ),
+        start=0.0,
+    )
+    output_bytes = sum(events.output_lengths)
+
+    keystroke_times = array.array("d", itertools.compress(times, events.keystrokes))
+    keystroke_intervals = [
+        interval
+        for interval in map(operator.sub, keystroke_times[1:], keystroke_times[:-1])
+        if interval <= idle_threshold
+    ]
+
+    return ActivityMetrics(
+        duration=duration,
+        active_time=active_time,
+        idle_time=duration - active_time,
+        events=num_events,
+        output_bytes=output_bytes,
+        output_rate=output_bytes / active_time if active_time else 0.0,
+        keystrokes=len(keystroke_times),
+        keystrokes_per_minute=(
+            60 * len(keystroke_times) / active_time if active_time else 0.0
+        ),
+        median_keystroke_interval=(
+            statistics.median(keystroke_intervals) if keystroke_intervals else None
+        ),
+    )
+
+
+def analyze_cast(
+    cast_file: pathlib.Path, idle_threshold: float = _DEFAULT_IDLE_THRESHOLD
+) -> ActivityMetrics:
+    return compute_metrics(load_cast_arrays(cast_file), idle_threshold)
+
+
+def _format_row(name: str, metrics: ActivityMetrics) -> list[str | int]:
+    median_interval = metrics.median_keystroke_interval
+    return [
+        name,
+        f"{metrics.duration:.0f}",
+        f"{metrics.active_time:.0f}",
+        f"{metrics.idle_time:.0f}",
+        metrics.events,
+        metrics.output_bytes,
+        f"{metrics.output_rate:.1f}",
+        metrics.keystrokes,
+        f"{metrics.keystrokes_per_minute:.1f}",
+        "-" if median_interval is None else f"{median_interval:.3f}",
+    ]
+
+
+@click.command()
+@click.argument(
+    "CAST_FILES",
+    nargs=-1,
+    type=click.Path(exists=True, dir_okay=False, path_type=pathlib.Path),
+)
+@click.option(
+    "--columns",
+    "session_dir",
+    type=click.Path(exists=True, file_okay=False, path_type=pathlib.Path),
+    help="Read a columnar export instead of cast files",
+)
+@click.option("--idle_threshold", type=float, default=_DEFAULT_IDLE_THRESHOLD)
+@click.option("--json", "as_json", is_flag=True)
+def main(
+    cast_files: tuple[pathlib.Path, ...],
+    session_dir: pathlib.Path | None,
+    idle_threshold: float,
+    as_json: bool,
+):
+    """Typing cadence, active vs idle time and output rate of terminal windows"""
+    results: dict[str, ActivityMetrics] = {}
+    if session_dir is not None:
+        for window_id, events in load_export_arrays(session_dir).items():
+            results[f"window {window_id}"] = compute_metrics(events, idle_threshold)
+    for cast_file in cast_files:
+        results[str(cast_file)] = analyze_cast(cast_file, idle_threshold)
+
+    if as_json:
+        click.echo(
+            json.dumps({name: metrics._asdict() for name, metrics in results.items()})
+        )
+        return
+
+    table = prettytable.PrettyTable()
+    table.field_names = [
+        "Window",
+        "Duration (s)",
+        "Active (s)",
+        "Idle (s)",
+        "Events",
+        "Output bytes",
+        "Bytes/active s",
+        "Keystrokes",
+        "Keys/active min",
+        "Median key interval (s)",
+    ]
+    for name, metrics in results.items():
+        table.add_row(_format_row(name, metrics))
+    table.align["Window"] = "l"
+    click.echo(table.get_string())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import pathlib
+import py_compile
+import tempfile
+import zipfile
+
+from src.settings import AGENT_CODE_DIR
+
+BUNDLE_FILE = AGENT_CODE_DIR / "agent_code.pyz"
+SOURCE_DIR = AGENT_CODE_DIR / "src"
+_MAIN = "from src.commands import main\n\nmain()\n"
+
+
+def _compile(source_file: pathlib.Path, display_file: str, pyc_file: str) -> bytes:
+    # Unchecked hash-based, so nothing needs to be compared with the source on import
+    py_compile.compile(
+        str(source_file),
+        cfile=pyc_file,
+        dfile=display_file,
+        doraise=True,
+        invalidation_mode=py_compile.PycInvalidationMode.UNCHECKED_HASH,
+    )
+    return pathlib.Path(pyc_file).read_bytes()
+
+
+def build_bundle(
+    source_dir: pathlib.Path = SOURCE_DIR, bundle_file: pathlib.Path = BUNDLE_FILE
+) -> pathlib.Path:
+    """Zip the agent code with precompiled bytecode.
+
+    Commands started from the bundle (as a PYTHONPATH entry, or as a zipapp with
+    `python agent_code.pyz COMMAND`) don't compile anything or scan `src/` on
+    start up. The sources are included too, for tracebacks.
+    """
+    package = source_dir.name
+    partial_file = bundle_file.with_name(f"{bundle_file.name}.partial")
+    with (
+        tempfile.TemporaryDirectory() as tmp_dir,
+        # Stored rather than compressed, as it is read on every start up
+        zipfile.ZipFile(partial_file, "w", zipfile.ZIP_STORED) as bundle,
+    ):
+        main_file = pathlib.Path(tmp_dir) / "__main__.py"
+        main_file.write_text(_MAIN)
+        bundle.writestr("__main__.py", _MAIN)
+        bundle.writestr(
+            "__main__.pyc",
+            _compile(main_file, f"{bundle_file}/__main__.py", f"{tmp_dir}/main.pyc"),
+        )
+
+        # src is a namespace package, which zipimport only finds by its directory
+        bundle.mkdir(package)
+        for source_file in sorted(source_dir.glob("*.py")):
+            name = f"{package}/{source_file.name}"
+            bundle.write(source_file, name)
+            bundle.writestr(
+                name.removesuffix(".py") + ".pyc",
+                _compile(source_file, f"{bundle_file}/{name}", f"{tmp_dir}/module.pyc"),
+            )
+
+    partial_file.replace(bundle_file)
+    return bundle_file
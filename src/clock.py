@@ -1,7 +1,16 @@
+from __future__ import annotations
+
+import array
 import asyncio
+import contextlib
 import datetime
 import enum
+import fcntl
 import json
+import os
+import pathlib
+import tempfile
+from typing import AsyncIterator, Iterator, NamedTuple
 
 import aiofiles
 import click
@@ -14,9 +23,22 @@ from src.settings import (
     get_timestamp,
     save_state,
 )
+from src.writer import BufferedWriter, FsyncPolicy
 
 EVENTS_LOG = AGENT_HOME_DIR / ".clock/log.jsonl"
+# Finished runs summarized from the events log, see `compact_log`
+INTERVALS_FILE = EVENTS_LOG.with_name("intervals.bin")
 STATUS_FILE = AGENT_CODE_DIR / ".clock/status.txt"
+CHECKPOINT_FILE = STATUS_FILE.with_name("checkpoint.json")
+PROMPT_STATE_FILE = STATUS_FILE.with_name("prompt_state")
+LOCK_FILE = STATUS_FILE.with_name("lock")
+_LOCK_POLL_INTERVAL = 0.01
+_COMPACT_LOG_BYTES = 16 * 1024
+# Interleaved (start, end, log offset) records: the start and end of the run in
+# microseconds since the (naive) epoch, and the log offset just after its end
+_INTERVAL_TYPECODE = "q"
+_INTERVAL_RECORD_SIZE = 3 * array.array(_INTERVAL_TYPECODE).itemsize
+_EPOCH = datetime.datetime(1970, 1, 1)
 _LOG_ATTRIBUTES = {
     "style": {
         "background-color": "#f7b7c5",
@@ -30,72 +52,367 @@ class ClockStatus(str, enum.Enum):
     STOPPED = "STOPPED"
 
 
-async def record_status(status: ClockStatus):
-    entry = {"timestamp": get_timestamp(), "status": status.value}
-    EVENTS_LOG.parent.mkdir(parents=True, exist_ok=True)
-    async with aiofiles.open(EVENTS_LOG, "a") as file:
-        await file.write(f"{json.dumps(entry)}\n")
+class ClockCheckpoint(NamedTuple):
+    """Elapsed time as of the end of the events log.
+
+    Kept up to date by `record_status`, so the time elapsed can be read without
+    going through the whole log. `log_size` and `intervals_size` are the sizes of
+    the log and intervals file it covers, and `compacted_log_size` how much of the
+    log the intervals cover.
+    """
+
+    elapsed_microseconds: int = 0
+    run_start: str | None = None
+    log_size: int = 0
+    intervals_size: int = 0
+    compacted_log_size: int = 0
+
+    def apply(self, timestamp: str, status: ClockStatus) -> ClockCheckpoint:
+        if status == ClockStatus.RUNNING and self.run_start is None:
+            return self._replace(run_start=timestamp)
+        if status == ClockStatus.STOPPED and self.run_start is not None:
+            run_time = datetime.datetime.fromisoformat(
+                timestamp
+            ) - datetime.datetime.fromisoformat(self.run_start)
+            return self._replace(
+                elapsed_microseconds=self.elapsed_microseconds
+                + run_time // datetime.timedelta(microseconds=1),
+                run_start=None,
+            )
+        return self
 
-    STATUS_FILE.parent.mkdir(parents=True, exist_ok=True)
-    async with aiofiles.open(STATUS_FILE, "w") as file:
-        await file.write(status.value)
+    def get_time_elapsed(self) -> datetime.timedelta:
+        time_elapsed = datetime.timedelta(microseconds=self.elapsed_microseconds)
+        if self.run_start is not None:
+            time_elapsed += datetime.datetime.now() - datetime.datetime.fromisoformat(
+                self.run_start
+            )
+        return time_elapsed - datetime.timedelta(microseconds=time_elapsed.microseconds)
 
 
-async def get_status() -> ClockStatus:
-    if not STATUS_FILE.exists():
-        return ClockStatus.RUNNING
+def _to_microseconds(timestamp: str) -> int:
+    return (datetime.datetime.fromisoformat(timestamp) - _EPOCH) // datetime.timedelta(
+        microseconds=1
+    )
 
-    async with aiofiles.open(STATUS_FILE, "r") as file:
-        return ClockStatus((await file.read()).strip())
 
+def _parse_intervals(data: bytes) -> array.array:
+    intervals = array.array(_INTERVAL_TYPECODE)
+    intervals.frombytes(data[: _get_intervals_size(len(data))])
+    return intervals
 
-async def get_time_elapsed() -> datetime.timedelta:
-    time_elapsed = datetime.timedelta()
+
+def get_total_microseconds(intervals: array.array) -> int:
+    return sum(intervals[1::3]) - sum(intervals[::3])
+
+
+def _get_compacted_log_size(intervals: array.array) -> int:
+    return intervals[-1] if intervals else 0
+
+
+def _get_intervals_size(file_size: int) -> int:
+    # Leaves out a record half written by a crash
+    return file_size - file_size % _INTERVAL_RECORD_SIZE
+
+
+def _get_file_size(path: pathlib.Path) -> int:
+    try:
+        return path.stat().st_size
+    except FileNotFoundError:
+        return 0
+
+
+async def _replace_file(path: pathlib.Path, content: str):
+    # Replace rather than overwrite, so readers never see a partial file and
+    # every write gets a new inode for `get_status` to notice. Each writer stages
+    # its own file, as writers don't all hold the transition lock.
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, partial_name = tempfile.mkstemp(
+        prefix=f".{path.name}.", suffix=".partial", dir=path.parent
+    )
+    os.close(fd)
+    partial_file = pathlib.Path(partial_name)
+    try:
+        # mkstemp only lets the owner read the file
+        partial_file.chmod(0o644)
+        async with BufferedWriter(partial_file, "w") as file:
+            await file.write(content)
+        os.replace(partial_file, path)
+    except BaseException:
+        partial_file.unlink(missing_ok=True)
+        raise
+
+
+async def _write_checkpoint(checkpoint: ClockCheckpoint):
+    await _replace_file(CHECKPOINT_FILE, json.dumps(checkpoint._asdict()))
+
+
+async def _write_prompt_state(status: ClockStatus, checkpoint: ClockCheckpoint):
+    """Status, seconds elapsed before the current run and the run's epoch start.
+
+    Space separated on one line, so the shell prompt can get it with `read`.
+    """
+    run_start = 0
+    if checkpoint.run_start is not None:
+        run_start = int(
+            datetime.datetime.fromisoformat(checkpoint.run_start).timestamp()
+        )
+    await _replace_file(
+        PROMPT_STATE_FILE,
+        f"{status.value} {checkpoint.elapsed_microseconds // 1_000_000} {run_start}\n",
+    )
+
+
+def read_intervals(intervals_file: pathlib.Path | None = None) -> array.array:
+    """Compacted runs of the clock, as interleaved (start, end, log offset) records.
+
+    `intervals[::3]` are the starts and `intervals[1::3]` the ends in microseconds,
+    e.g. for `get_total_microseconds`, and `intervals[2::3]` the offsets in the
+    events log just after each run. The file can also be loaded with numpy as "<i8"
+    triples.
+    """
+    try:
+        return _parse_intervals((intervals_file or INTERVALS_FILE).read_bytes())
+    except FileNotFoundError:
+        return array.array(_INTERVAL_TYPECODE)
+
+
+async def _read_intervals() -> array.array:
+    try:
+        async with aiofiles.open(INTERVALS_FILE, "rb") as file:
+            return _parse_intervals(await file.read())
+    except FileNotFoundError:
+        return array.array(_INTERVAL_TYPECODE)
+
+
+def iter_log(events_log: pathlib.Path | None = None) -> Iterator[dict[str, str]]:
+    """All clock entries in order"""
+    events_log = events_log or EVENTS_LOG
+    if not events_log.exists():
+        return
+    with open(events_log, "r") as file:
+        for line in file:
+            if line.strip():
+                yield json.loads(line)
+
+
+async def _replay_log(intervals: array.array) -> ClockCheckpoint:
+    compacted_log_size = _get_compacted_log_size(intervals)
+    checkpoint = ClockCheckpoint(
+        elapsed_microseconds=get_total_microseconds(intervals),
+        intervals_size=len(intervals) * intervals.itemsize,
+        compacted_log_size=compacted_log_size,
+    )
     if not EVENTS_LOG.exists():
-        return time_elapsed
+        return checkpoint
 
-    start_time = None
-    async with aiofiles.open(EVENTS_LOG, "r") as file:
+    # Only the entries since the last compacted run are left to replay
+    async with aiofiles.open(EVENTS_LOG, "rb") as file:
+        await file.seek(compacted_log_size)
         async for line in file:
+            if not line.strip():
+                continue
             entry = json.loads(line)
-            timestamp = datetime.datetime.fromisoformat(entry["timestamp"])
+            checkpoint = checkpoint.apply(
+                entry["timestamp"], ClockStatus(entry["status"])
+            )
+        log_size = await file.tell()
+    return checkpoint._replace(log_size=log_size)
 
-            status = ClockStatus(entry["status"])
-            if status == ClockStatus.RUNNING and start_time is None:
-                start_time = timestamp
-            elif status == ClockStatus.STOPPED and start_time is not None:
-                time_elapsed += timestamp - start_time
-                start_time = None
 
-    if start_time is not None:
-        time_elapsed += datetime.datetime.now() - start_time
+async def rebuild_checkpoint() -> ClockCheckpoint:
+    """Replay the intervals and events log, e.g. to audit or repair the checkpoint"""
+    return await _replay_log(await _read_intervals())
 
-    time_elapsed -= datetime.timedelta(microseconds=time_elapsed.microseconds)
-    return time_elapsed
 
+async def get_checkpoint() -> ClockCheckpoint:
+    """Read the checkpoint, rebuilding it if it is missing or behind the log.
 
-async def pause(force: bool = False):
-    if (await get_status()) == ClockStatus.STOPPED and not force:
-        return
+    A rebuilt checkpoint is only kept in memory. It is written by the next
+    transition, which holds the transition lock.
+    """
+    if not (EVENTS_LOG.exists() or INTERVALS_FILE.exists()):
+        return ClockCheckpoint()
 
-    await HOOKS.log_with_attributes(
-        _LOG_ATTRIBUTES, f"⏰ Clock paused at {get_timestamp()}"
-    )
-    await HOOKS.pause()
-    await record_status(ClockStatus.STOPPED)
+    log_size = _get_file_size(EVENTS_LOG)
+    intervals_size = _get_intervals_size(_get_file_size(INTERVALS_FILE))
 
+    try:
+        async with aiofiles.open(CHECKPOINT_FILE, "r") as file:
+            checkpoint = ClockCheckpoint(**json.loads(await file.read()))
+    except (FileNotFoundError, json.JSONDecodeError, TypeError):
+        checkpoint = None
+
+    if checkpoint is None or (checkpoint.log_size, checkpoint.intervals_size) != (
+        log_size,
+        intervals_size,
+    ):
+        checkpoint = await rebuild_checkpoint()
+    return checkpoint
+
+
+async def compact_log() -> ClockCheckpoint:
+    """Summarize the finished runs in the events log into the intervals file.
+
+    Each run becomes one fixed-width record, so the checkpoint can be rebuilt from
+    the intervals and the rest of the log after the last of them. The log itself
+    is never changed. Callers must hold the transition lock.
+    """
+    intervals = await _read_intervals()
+    log_offset = _get_compacted_log_size(intervals)
+    new_intervals = array.array(_INTERVAL_TYPECODE)
+    run_start = None
+    if EVENTS_LOG.exists():
+        async with aiofiles.open(EVENTS_LOG, "rb") as file:
+            await file.seek(log_offset)
+            async for line in file:
+                log_offset += len(line)
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                status = ClockStatus(entry["status"])
+                if status == ClockStatus.RUNNING and run_start is None:
+                    run_start = entry["timestamp"]
+                elif status == ClockStatus.STOPPED and run_start is not None:
+                    new_intervals.extend(
+                        (
+                            _to_microseconds(run_start),
+                            _to_microseconds(entry["timestamp"]),
+                            log_offset,
+                        )
+                    )
+                    run_start = None
+
+    if new_intervals:
+        INTERVALS_FILE.parent.mkdir(parents=True, exist_ok=True)
+        if INTERVALS_FILE.exists():
+            # Drop a record half written by a crash before appending after it
+            os.truncate(INTERVALS_FILE, len(intervals) * intervals.itemsize)
+        async with BufferedWriter(
+            INTERVALS_FILE, "a", fsync=FsyncPolicy.ON_CLOSE
+        ) as file:
+            await file.write(new_intervals.tobytes())
+
+    checkpoint = await rebuild_checkpoint()
+    await _write_checkpoint(checkpoint)
+    return checkpoint
 
-async def unpause(force: bool = False):
-    if (await get_status()) == ClockStatus.RUNNING and not force:
-        return
 
-    await HOOKS.unpause()
-    await asyncio.gather(
-        HOOKS.log_with_attributes(
-            _LOG_ATTRIBUTES, f"⏰ Clock unpaused at {get_timestamp()}"
-        ),
-        record_status(ClockStatus.RUNNING),
+async def record_status(status: ClockStatus):
+    timestamp = get_timestamp()
+    checkpoint = await get_checkpoint()
+
+    entry = {"timestamp": timestamp, "status": status.value}
+    EVENTS_LOG.parent.mkdir(parents=True, exist_ok=True)
+    async with BufferedWriter(EVENTS_LOG, "a", fsync=FsyncPolicy.ON_CLOSE) as file:
+        await file.write(f"{json.dumps(entry)}\n")
+    checkpoint = checkpoint.apply(timestamp, status)._replace(
+        log_size=EVENTS_LOG.stat().st_size
     )
+    if (
+        status == ClockStatus.STOPPED
+        and checkpoint.log_size - checkpoint.compacted_log_size > _COMPACT_LOG_BYTES
+    ):
+        checkpoint = await compact_log()
+    else:
+        await _write_checkpoint(checkpoint)
+    await _write_prompt_state(status, checkpoint)
+
+    await _replace_file(STATUS_FILE, status.value)
+
+
+class _CachedStatus(NamedTuple):
+    path: pathlib.Path
+    file_id: tuple[int, int, int]
+    status: ClockStatus
+
+
+_cached_status: _CachedStatus | None = None
+
+
+async def get_status() -> ClockStatus:
+    """Clock status, only read from disk when the status file has changed"""
+    global _cached_status
+    try:
+        stat = STATUS_FILE.stat()
+    except FileNotFoundError:
+        return ClockStatus.RUNNING
+
+    file_id = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+    if (
+        _cached_status is not None
+        and _cached_status.path == STATUS_FILE
+        and _cached_status.file_id == file_id
+    ):
+        return _cached_status.status
+
+    async with aiofiles.open(STATUS_FILE, "r") as file:
+        status = ClockStatus((await file.read()).strip())
+    _cached_status = _CachedStatus(STATUS_FILE, file_id, status)
+    return status
+
+
+async def wait_until_running(poll_interval: float = 0.5):
+    """Return once the clock is running, checking the status file's metadata only"""
+    while (await get_status()) != ClockStatus.RUNNING:
+        await asyncio.sleep(poll_interval)
+
+
+async def get_time_elapsed() -> datetime.timedelta:
+    return (await get_checkpoint()).get_time_elapsed()
+
+
+@contextlib.asynccontextmanager
+async def _transition_lock() -> AsyncIterator[None]:
+    """Serialize clock transitions across all terminals.
+
+    flock locks belong to the open file, so this also serializes transitions
+    within one process. Waiting is done by polling rather than in a thread, as
+    threads blocked on the lock would starve the executor the holder's file I/O
+    runs on.
+    """
+    LOCK_FILE.parent.mkdir(parents=True, exist_ok=True)
+    with open(LOCK_FILE, "w") as lock_file:
+        while True:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                break
+            except BlockingIOError:
+                await asyncio.sleep(_LOCK_POLL_INTERVAL)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+async def pause(force: bool = False) -> bool:
+    """Stop the clock, returning whether this call changed its status"""
+    async with _transition_lock():
+        if (await get_status()) == ClockStatus.STOPPED and not force:
+            return False
+
+        await HOOKS.log_with_attributes(
+            _LOG_ATTRIBUTES, f"⏰ Clock paused at {get_timestamp()}"
+        )
+        await HOOKS.pause()
+        await record_status(ClockStatus.STOPPED)
+    return True
+
+
+async def unpause(force: bool = False) -> bool:
+    """Start the clock, returning whether this call changed its status"""
+    async with _transition_lock():
+        if (await get_status()) == ClockStatus.RUNNING and not force:
+            return False
+
+        await HOOKS.unpause()
+        await asyncio.gather(
+            HOOKS.log_with_attributes(
+                _LOG_ATTRIBUTES, f"⏰ Clock unpaused at {get_timestamp()}"
+            ),
+            record_status(ClockStatus.RUNNING),
+        )
+    return True
 
 
 async def clock():
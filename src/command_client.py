@@ -0,0 +1,70 @@
+"""Thin client for helper commands, see `src.command_server`.
+
+Only uses the standard library and is run with `python -S`, so it starts in a few
+milliseconds. If the server isn't running the command is run directly instead.
+
+Usage: command_client.py SOCKET_FILE SCRIPT_FILE [ARGS]...
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import signal
+import socket
+import sys
+
+_FORWARDED_SIGNALS = (signal.SIGINT, signal.SIGTERM, signal.SIGHUP, signal.SIGQUIT)
+
+
+def _connect(socket_file: str, script: str, args: list[str]) -> socket.socket | None:
+    """Hand the command and this process's stdio over to the server"""
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(socket_file)
+        socket.send_fds(sock, [b"\0"], [0, 1, 2])
+        request = {
+            "script": script,
+            "args": args,
+            "cwd": os.getcwd(),
+            "env": dict(os.environ),
+        }
+        sock.sendall(json.dumps(request).encode() + b"\n")
+    except OSError:
+        sock.close()
+        return None
+    return sock
+
+
+def run_in_server(socket_file: str, script: str, args: list[str]) -> int | None:
+    """Run a helper script in the server, returning its exit code.
+
+    Returns None if the server isn't available and the command didn't start.
+    """
+    sock = _connect(socket_file, script, args)
+    if sock is None:
+        return None
+
+    with sock, sock.makefile("r") as responses:
+        pid = responses.readline()
+        if not pid:
+            return None
+
+        # The command isn't in this terminal's process group, so e.g. Ctrl+C has to
+        # be passed on
+        for signum in _FORWARDED_SIGNALS:
+            signal.signal(signum, lambda signum, _frame: os.kill(int(pid), signum))
+        exit_code = responses.readline()
+    return int(exit_code) if exit_code else 1
+
+
+def main():
+    socket_file, script_file, *args = sys.argv[1:]
+    exit_code = run_in_server(socket_file, os.path.basename(script_file), args)
+    if exit_code is None:
+        os.execv(sys.executable, [sys.executable, script_file, *args])
+    sys.exit(exit_code)
+
+
+if __name__ == "__main__":
+    main()
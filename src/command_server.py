@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+import asyncio
+import importlib
+import json
+import os
+import pathlib
+import runpy
+import signal
+import socket
+import socketserver
+import struct
+import sys
+import traceback
+from typing import Iterable, cast
+
+from src.settings import AGENT_CODE_DIR, COMMAND_SOCKET_FILE, detach_hooks_session
+
+SCRIPTS_DIR = AGENT_CODE_DIR / "src"
+
+
+def _get_exit_code(code: object) -> int:
+    if code is None:
+        return 0
+    if isinstance(code, int):
+        return code
+    print(code, file=sys.stderr)
+    return 1
+
+
+def run_script(
+    script_file: pathlib.Path,
+    args: list[str],
+    fds: list[int],
+    cwd: str,
+    env: dict[str, str],
+) -> int:
+    """Run a helper script in this (forked) process as if it had been started in
+    the client's terminal, returning its exit code.
+    """
+    for target_fd, fd in enumerate(fds):
+        os.dup2(fd, target_fd)
+        os.close(fd)
+    sys.stdin = open(0, "r", closefd=False)
+    sys.stdout = open(1, "w", buffering=1, closefd=False)
+    sys.stderr = open(2, "w", buffering=1, closefd=False)
+    os.chdir(cwd)
+    os.environ.clear()
+    os.environ.update(env)
+    sys.argv = [str(script_file), *args]
+
+    # Inherited from the server, whose event loop and HTTP session can't be shared
+    signal.set_wakeup_fd(-1)
+    signal.signal(signal.SIGINT, signal.default_int_handler)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    detach_hooks_session()
+
+    try:
+        runpy.run_path(str(script_file), run_name="__main__")
+        exit_code = 0
+    except SystemExit as error:
+        exit_code = _get_exit_code(error.code)
+    except KeyboardInterrupt:
+        exit_code = 130
+    except Exception:
+        traceback.print_exc()
+        exit_code = 1
+    finally:
+        sys.stdout.flush()
+        sys.stderr.flush()
+    return exit_code
+
+
+def _get_peer_uid(sock: socket.socket) -> int:
+    credentials = sock.getsockopt(
+        socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize("3i")
+    )
+    _, uid, _ = struct.unpack("3i", credentials)
+    return uid
+
+
+class _CommandHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        server = cast(CommandServer, self.server)
+        _, fds, _, _ = socket.recv_fds(self.request, 1, 3)
+        with self.request.makefile("rb") as requests:
+            request = json.loads(requests.readline())
+
+        script_file = server.scripts_dir / request["script"]
+        if (
+            len(fds) != 3
+            or request["script"] not in server.scripts
+            # Commands must not run as another user, e.g. if main.py runs as root
+            or _get_peer_uid(self.request) != os.getuid()
+        ):
+            # The client runs the command itself
+            return
+
+        self.request.sendall(f"{os.getpid()}\n".encode())
+        exit_code = run_script(
+            script_file, request["args"], fds, request["cwd"], request["env"]
+        )
+        self.request.sendall(f"{exit_code}\n".encode())
+
+
+class CommandServer(socketserver.ForkingMixIn, socketserver.UnixStreamServer):
+    """Runs helper commands for `command_client` in a fork of this process.
+
+    The fork already has Python, pyhooks and the helper modules loaded, so commands
+    skip most of their start up time. The client's stdin, stdout and stderr are
+    passed over the socket, so commands can still be interactive.
+    """
+
+    def __init__(
+        self,
+        socket_file: pathlib.Path = COMMAND_SOCKET_FILE,
+        scripts: set[str] | None = None,
+        scripts_dir: pathlib.Path = SCRIPTS_DIR,
+    ):
+        self.scripts_dir = scripts_dir
+        self.scripts = scripts or set()
+        socket_file.unlink(missing_ok=True)
+        super().__init__(str(socket_file), _CommandHandler)
+        self.socket_file = socket_file
+
+    def server_close(self):
+        super().server_close()
+        self.socket_file.unlink(missing_ok=True)
+
+
+async def serve(
+    scripts: set[str],
+    socket_file: pathlib.Path = COMMAND_SOCKET_FILE,
+    scripts_dir: pathlib.Path = SCRIPTS_DIR,
+    preload_modules: Iterable[str] = (),
+):
+    """Serve helper commands until cancelled.
+
+    `preload_modules` are imported once here instead of in every fork. The server
+    runs in its own thread, so commands are forked from a thread without a running
+    event loop.
+    """
+    for module in preload_modules:
+        importlib.import_module(module)
+    with CommandServer(socket_file, scripts, scripts_dir) as server:
+        serve_task = asyncio.create_task(asyncio.to_thread(server.serve_forever))
+        try:
+            await asyncio.shield(serve_task)
+        finally:
+            server.shutdown()
+            await serve_task
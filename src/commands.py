@@ -0,0 +1,67 @@
+"""Helper commands available in the agent's shell, and their dispatcher.
+
+`python -m src COMMAND [ARGS]...` runs a command, importing only the module that
+implements it. Keep the imports here light, as every command goes through them.
+"""
+
+from __future__ import annotations
+
+import enum
+import pathlib
+import runpy
+import sys
+
+from src.settings import AGENT_CODE_DIR, COMMAND_SOCKET_FILE
+
+
+class HelperCommand(enum.Enum):
+    clock = "clock.py"
+    note = "note.py"
+    record = "terminal.py"
+    score = "score.py score"
+    score_log = "score.py log"
+    search = "search.py"
+    setup = "human_setup.py"
+    skip = "submit.py BASELINE_SKIP"
+    submit = "submit.py"
+
+    @property
+    def served(self) -> bool:
+        """Whether the command is run by the command server started by main.py"""
+        # Recording needs its own terminal session, and setup looks at its parent
+        # process to find the shell
+        return self not in {HelperCommand.record, HelperCommand.setup}
+
+    @property
+    def module(self) -> str:
+        return f"src.{self.value.split()[0].removesuffix('.py')}"
+
+    def alias_def(self, code_path: pathlib.Path = AGENT_CODE_DIR) -> str:
+        """`code_path` is the agent code directory, or the bundle built from it"""
+        command = [f"PYTHONPATH={code_path}", sys.executable]
+        if self.served:
+            command += [
+                "-S",
+                AGENT_CODE_DIR / "src" / "command_client.py",
+                COMMAND_SOCKET_FILE,
+                AGENT_CODE_DIR / "src" / self.value,
+            ]
+        else:
+            # -P, so a src package in the current directory can't shadow ours
+            command += ["-P", "-m", "src", self.name]
+        return f"alias {self.name}='{' '.join(map(str, command))}'"
+
+
+def run(name: str, args: list[str]):
+    """Run a helper command's module as a script, with the given arguments"""
+    command = HelperCommand[name]
+    _, *command_args = command.value.split()
+    sys.argv = [sys.argv[0], *command_args, *args]
+    runpy.run_module(command.module, run_name="__main__", alter_sys=True)
+
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1] not in HelperCommand.__members__:
+        names = ", ".join(HelperCommand.__members__)
+        sys.exit(f"Usage: python -m src COMMAND [ARGS]...\nCommands: {names}")
+    run(sys.argv[1], sys.argv[2:])
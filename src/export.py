@@ -0,0 +1,349 @@
+from __future__ import annotations
+
+import array
+import datetime
+import heapq
+import json
+import math
+import pathlib
+import sys
+from typing import Any, Iterator, NamedTuple
+
+import click
+
+import src.clock as clock
+import src.note as note
+import src.registry as registry
+from src.terminal import LOG_DIR, open_cast
+
+
+class TimelineEntry(NamedTuple):
+    time: float
+    source: str
+    window_id: int | None
+    data: dict[str, Any]
+
+    def to_json(self) -> str:
+        timestamp = datetime.datetime.fromtimestamp(self.time).isoformat()
+        entry = {"time": self.time, "timestamp": timestamp, "source": self.source}
+        if self.window_id is not None:
+            entry["window"] = self.window_id
+        return json.dumps(entry | self.data)
+
+
+def get_cast_files(
+    log_dir: pathlib.Path, live_only: bool = False
+) -> list[tuple[int, pathlib.Path]]:
+    if live_only:
+        window_dirs = [
+            log_dir / str(window_id)
+            for window_id in registry.get_live_window_ids(log_dir)
+        ]
+    else:
+        window_dirs = [path for path in log_dir.iterdir() if path.name.isdigit()]
+
+    cast_files = []
+    for window_dir in window_dirs:
+        # Casts of finished windows may have been compressed to save space
+        for cast_file_name in ("terminal.cast", "terminal.cast.gz"):
+            if (window_dir / cast_file_name).exists():
+                cast_files.append((int(window_dir.name), window_dir / cast_file_name))
+                break
+    return sorted(cast_files)
+
+
+def iter_cast_entries(
+    window_id: int, cast_file: pathlib.Path
+) -> Iterator[TimelineEntry]:
+    with open_cast(cast_file) as f:
+        start_time = json.loads(f.readline()).get("timestamp")
+        if start_time is None:
+            click.echo(f"Skipping {cast_file}: no timestamp in header", err=True)
+            return
+
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                event_time, event_type, data = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            yield TimelineEntry(
+                start_time + event_time,
+                "terminal",
+                window_id,
+                {"type": event_type, "data": data},
+            )
+
+
+def iter_jsonl_entries(log_file: pathlib.Path, source: str) -> Iterator[TimelineEntry]:
+    if not log_file.exists():
+        return
+
+    with open(log_file, "r") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            timestamp = datetime.datetime.fromisoformat(entry.pop("timestamp"))
+            yield TimelineEntry(timestamp.timestamp(), source, None, entry)
+
+
+def iter_clock_entries(clock_log: pathlib.Path) -> Iterator[TimelineEntry]:
+    for entry in clock.iter_log(clock_log):
+        timestamp = datetime.datetime.fromisoformat(entry.pop("timestamp"))
+        yield TimelineEntry(timestamp.timestamp(), "clock", None, entry)
+
+
+def iter_timeline(
+    cast_files: list[tuple[int, pathlib.Path]],
+    clock_log: pathlib.Path = clock.EVENTS_LOG,
+    notes_log: pathlib.Path = note.LOG_FILE,
+) -> Iterator[TimelineEntry]:
+    """Merge all windows, clock and notes into one ordered stream.
+
+    Every source is already in time order, so a k-way merge only needs to hold one
+    pending entry per source in memory.
+    """
+    return heapq.merge(
+        *(
+            iter_cast_entries(window_id, cast_file)
+            for window_id, cast_file in cast_files
+        ),
+        iter_clock_entries(clock_log),
+        iter_jsonl_entries(notes_log, "note"),
+        key=lambda entry: entry.time,
+    )
+
+
+_EVENT_KINDS = ["o", "i", "r", "m"]
+_EVENT_KIND_CODES = {kind: code for code, kind in enumerate(_EVENT_KINDS)}
+_COLUMNS_FLUSH_SIZE = 64 * 1024
+
+
+class ColumnWriter:
+    """Appends values to a raw typed array file, in batches"""
+
+    def __init__(self, path: pathlib.Path, typecode: str):
+        self.path = path
+        self.typecode = typecode
+        self.count = 0
+        self._values = array.array(typecode)
+        self._file = open(path, "wb")
+
+    def append(self, value: int | float):
+        self._values.append(value)
+        if len(self._values) >= _COLUMNS_FLUSH_SIZE:
+            self.flush()
+
+    def flush(self):
+        self._values.tofile(self._file)
+        self.count += len(self._values)
+        self._values = array.array(self.typecode)
+
+    def close(self):
+        self.flush()
+        self._file.close()
+
+    def schema(self) -> dict[str, Any]:
+        # numpy dtype, so the files can also be loaded with numpy.fromfile
+        byte_order = "<" if sys.byteorder == "little" else ">"
+        kind = "f" if self.typecode == "d" else "u"
+        return {
+            "dtype": f"{byte_order}{kind}{self._values.itemsize}",
+            "typecode": self.typecode,
+            "count": self.count,
+        }
+
+
+class BlobWriter:
+    """Appends payloads to one blob file, returning the offset of each"""
+
+    def __init__(self, path: pathlib.Path):
+        self.path = path
+        self.size = 0
+        self._file = open(path, "wb")
+
+    def append(self, payload: str) -> tuple[int, int]:
+        data = payload.encode()
+        offset = self.size
+        self._file.write(data)
+        self.size += len(data)
+        return offset, len(data)
+
+    def close(self):
+        self._file.close()
+
+
+def iter_clock_intervals(
+    entries: Iterator[TimelineEntry],
+) -> Iterator[tuple[float, float]]:
+    """Yield (start, end) of each run of the clock, with end=NaN if still running"""
+    start_time = None
+    for entry in entries:
+        status = clock.ClockStatus(entry.data["status"])
+        if status == clock.ClockStatus.RUNNING and start_time is None:
+            start_time = entry.time
+        elif status == clock.ClockStatus.STOPPED and start_time is not None:
+            yield start_time, entry.time
+            start_time = None
+
+    if start_time is not None:
+        yield start_time, math.nan
+
+
+def write_columns(
+    timeline: Iterator[TimelineEntry], output_dir: pathlib.Path
+) -> dict[str, Any]:
+    """Write a session's timeline as typed column files plus payload blobs.
+
+    Terminal events and notes are stored as columns of times, windows, kinds and
+    payload offsets/lengths into a blob file. Clock events become run intervals.
+    """
+    output_dir.mkdir(parents=True, exist_ok=True)
+    columns = {
+        name: ColumnWriter(output_dir / f"{name}.bin", typecode)
+        for name, typecode in (
+            ("events.time", "d"),
+            ("events.window", "I"),
+            ("events.kind", "B"),
+            ("events.offset", "Q"),
+            ("events.length", "Q"),
+            ("notes.time", "d"),
+            ("notes.offset", "Q"),
+            ("notes.length", "Q"),
+            ("clock.start", "d"),
+            ("clock.end", "d"),
+        )
+    }
+    blobs = {
+        name: BlobWriter(output_dir / f"{name}.blob") for name in ("events", "notes")
+    }
+    clock_entries: list[TimelineEntry] = []
+
+    try:
+        for entry in timeline:
+            if entry.source == "terminal":
+                kind = _EVENT_KIND_CODES.get(entry.data["type"])
+                if kind is None:
+                    # asciicast v2 readers ignore event types they don't know
+                    continue
+                offset, length = blobs["events"].append(entry.data["data"])
+                columns["events.time"].append(entry.time)
+                columns["events.window"].append(entry.window_id or 0)
+                columns["events.kind"].append(kind)
+                columns["events.offset"].append(offset)
+                columns["events.length"].append(length)
+            elif entry.source == "note":
+                offset, length = blobs["notes"].append(entry.data["content"])
+                columns["notes.time"].append(entry.time)
+                columns["notes.offset"].append(offset)
+                columns["notes.length"].append(length)
+            elif entry.source == "clock":
+                # One entry per toggle, so this stays small
+                clock_entries.append(entry)
+
+        for start_time, end_time in iter_clock_intervals(iter(clock_entries)):
+            columns["clock.start"].append(start_time)
+            columns["clock.end"].append(end_time)
+    finally:
+        for column in columns.values():
+            column.close()
+        for blob in blobs.values():
+            blob.close()
+
+    schema = {
+        "columns": {name: column.schema() for name, column in columns.items()},
+        "blobs": {name: blob.size for name, blob in blobs.items()},
+        "event_kinds": _EVENT_KINDS,
+    }
+    (output_dir / "schema.json").write_text(json.dumps(schema, indent=4))
+    return schema
+
+
+def load_columns(session_dir: pathlib.Path) -> dict[str, array.array]:
+    schema = json.loads((session_dir / "schema.json").read_text())
+    columns = {}
+    for name, column_schema in schema["columns"].items():
+        column = array.array(column_schema["typecode"])
+        with open(session_dir / f"{name}.bin", "rb") as f:
+            column.fromfile(f, column_schema["count"])
+        columns[name] = column
+    return columns
+
+
+def load_payload(session_dir: pathlib.Path, blob: str, offset: int, length: int) -> str:
+    with open(session_dir / f"{blob}.blob", "rb") as f:
+        f.seek(offset)
+        return f.read(length).decode()
+
+
+@click.group()
+def main():
+    """Export recorded session data"""
+
+
+@main.command()
+@click.option(
+    "--log_dir",
+    type=click.Path(exists=True, file_okay=False, path_type=pathlib.Path),
+    default=LOG_DIR,
+)
+@click.option(
+    "--output",
+    type=click.Path(dir_okay=False, writable=True, path_type=pathlib.Path),
+    default=pathlib.Path("timeline.jsonl"),
+)
+@click.option("--live_only", is_flag=True, help="Skip windows that have closed")
+def timeline(log_dir: pathlib.Path, output: pathlib.Path, live_only: bool):
+    """Write all terminal windows, clock and notes events to one ordered file"""
+    num_entries = 0
+    with open(output, "w") as f:
+        for entry in iter_timeline(get_cast_files(log_dir, live_only)):
+            f.write(entry.to_json() + "\n")
+            num_entries += 1
+    click.echo(f"Wrote {num_entries} timeline entries to {output}")
+
+
+@main.command()
+@click.option(
+    "--log_dir",
+    type=click.Path(exists=True, file_okay=False, path_type=pathlib.Path),
+    default=LOG_DIR,
+)
+@click.option(
+    "--output_dir",
+    type=click.Path(file_okay=False, writable=True, path_type=pathlib.Path),
+    default=pathlib.Path("session_columns"),
+)
+@click.option("--live_only", is_flag=True, help="Skip windows that have closed")
+def columnar(log_dir: pathlib.Path, output_dir: pathlib.Path, live_only: bool):
+    """Write the session as typed column files for vectorized analysis"""
+    schema = write_columns(
+        iter_timeline(get_cast_files(log_dir, live_only)), output_dir
+    )
+    counts = {name: column["count"] for name, column in schema["columns"].items()}
+    click.echo(
+        f"Wrote {counts['events.time']} terminal events, {counts['notes.time']} notes "
+        f"and {counts['clock.start']} clock intervals to {output_dir}"
+    )
+
+
+@main.command()
+@click.option(
+    "--output",
+    type=click.Path(dir_okay=False, writable=True, path_type=pathlib.Path),
+    default=pathlib.Path("clock_log.jsonl"),
+)
+def clock_log(output: pathlib.Path):
+    """Write every entry of the clock's events log, which is never truncated"""
+    num_entries = 0
+    with open(output, "w") as f:
+        for entry in clock.iter_log():
+            f.write(json.dumps(entry) + "\n")
+            num_entries += 1
+    click.echo(f"Wrote {num_entries} clock entries to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,11 @@
 from __future__ import annotations
 
 import asyncio
-import enum
+import hashlib
 import json
 import os
 import pathlib
+import re
 import sys
 import textwrap
 
@@ -12,6 +13,7 @@ import aiofiles
 import click
 
 import src.clock as clock
+from src.commands import HelperCommand
 from src.settings import (
     AGENT_CODE_DIR,
     AGENT_HOME_DIR,
@@ -22,28 +24,11 @@ from src.settings import (
 )
 
 AGENT_PROFILE_FILE = AGENT_CODE_DIR / "profile.sh"
+# Written once the shell is set up and the clock started, so new shells skip setup
+SETUP_COMPLETE_FILE = AGENT_CODE_DIR / ".setup_complete"
 WELCOME_MESSAGE_FILE = AGENT_HOME_DIR / "welcome.txt"
 
 
-class HelperCommand(enum.Enum):
-    clock = "clock.py"
-    note = "note.py"
-    record = "terminal.py"
-    score = "score.py score"
-    score_log = "score.py log"
-    setup = "human_setup.py"
-    skip = "submit.py BASELINE_SKIP"
-    submit = "submit.py"
-
-    def alias_def(self) -> str:
-        command = [
-            f"PYTHONPATH={AGENT_CODE_DIR}",
-            sys.executable,
-            AGENT_CODE_DIR / "src" / self.value,
-        ]
-        return f"alias {self.name}='{' '.join(map(str, command))}'"
-
-
 async def _get_shell_path() -> pathlib.Path:
     """Get the shell that the human is using"""
     # Method 1: Check SHELL environment variable
@@ -146,6 +131,12 @@ async def introduction(run_info: dict) -> tuple[str, str, str]:
             }
         )
 
+    if run_info.get("agent", {}).get("terminal_recording") not in {
+        None,
+        "NO_TERMINAL_RECORDING",
+    }:
+        commands[HelperCommand.search.name] = "Search the history of all terminals."
+
     welcome_saved, welcome_unsaved, instructions = await _get_welcome_message(
         commands, run_info["task"]["instructions"]
     )
@@ -154,66 +145,151 @@ async def introduction(run_info: dict) -> tuple[str, str, str]:
     return welcome_saved, welcome_unsaved, instructions
 
 
-def get_conditional_run_command(env_var: str, setup_command: HelperCommand):
+def get_conditional_run_command(
+    env_var: str,
+    setup_command: HelperCommand,
+    marker_file: pathlib.Path | None = None,
+):
+    """Shell line running a command unless env_var is set or marker_file exists.
+
+    Runs in every new interactive shell, so it only uses builtins: no subshells and
+    no Python.
+    """
     return " && ".join(
         [
-            f"[ -z ${{{env_var}}} ]",
-            f"$(type -t {setup_command.name} > /dev/null)",
+            f'[ -z "${{{env_var}}}" ]',
+            *([f'[ ! -e "{marker_file}" ]'] if marker_file is not None else []),
+            f"alias {setup_command.name} >/dev/null 2>&1",
             setup_command.name,
             f"export {env_var}=1",
         ]
     )
 
 
+def get_clock_prompt_segment(
+    state_file: pathlib.Path = clock.PROMPT_STATE_FILE,
+) -> str:
+    """Shell code showing the elapsed time and clock status in the prompt.
+
+    Runs before every prompt, so it only uses builtins: no subshells and no Python.
+    Set METR_CLOCK_PROMPT=0 to hide it.
+    """
+    segment = """
+    __metr_clock_prompt() {{
+        local clock_status elapsed run_start now label=" paused"
+        __metr_clock_segment=
+        [ "$METR_CLOCK_PROMPT" = 0 ] && return 0
+        {{ read -r clock_status elapsed run_start < "{state_file}"; }} 2>/dev/null || return 0
+        if [ "$clock_status" = RUNNING ]; then
+            if [ -n "$EPOCHSECONDS" ]; then
+                now=$EPOCHSECONDS
+            else
+                printf -v now '%(%s)T' -1
+            fi
+            elapsed=$(( elapsed + now - run_start ))
+            label=
+        fi
+        printf -v __metr_clock_segment '[%d:%02d:%02d%s] ' \\
+            $(( elapsed / 3600 )) $(( elapsed / 60 % 60 )) $(( elapsed % 60 )) "$label"
+    }}
+    if [ -n "$ZSH_VERSION" ]; then
+        zmodload zsh/datetime 2>/dev/null
+        setopt PROMPT_SUBST
+        if (( ! ${{precmd_functions[(I)__metr_clock_prompt]}} )); then
+            precmd_functions+=(__metr_clock_prompt)
+            RPROMPT='${{__metr_clock_segment}}'"$RPROMPT"
+        fi
+    elif [[ "$PROMPT_COMMAND" != *__metr_clock_prompt* ]]; then
+        PROMPT_COMMAND="__metr_clock_prompt${{PROMPT_COMMAND:+; $PROMPT_COMMAND}}"
+        PS1='${{__metr_clock_segment}}'"$PS1"
+    fi
+    """
+    return textwrap.dedent(segment).strip().format(state_file=state_file)
+
+
 async def create_profile_file(
     *,
     intermediate_scoring: bool = False,
     with_recording: bool = True,
+    with_clock_prompt: bool = False,
     env: dict[str, str],
     profile_file: pathlib.Path = AGENT_PROFILE_FILE,
+    code_path: pathlib.Path = AGENT_CODE_DIR,
 ) -> pathlib.Path:
     profile_file.parent.mkdir(parents=True, exist_ok=True)
     profile = """
     {aliases}
     {exports}
+    {clock_prompt}
     {setup_command}
     {recording_command}
     """
-    async with aiofiles.open(profile_file, "w") as f:
-        await f.write(
-            textwrap.dedent(profile)
-            .lstrip()
-            .format(
-                aliases="\n".join(
-                    [
-                        command.alias_def()
-                        for command in HelperCommand
-                        if not (
-                            command in {HelperCommand.score, HelperCommand.score_log}
-                            and not intermediate_scoring
-                        )
-                        and not (command == HelperCommand.record and not with_recording)
-                    ]
-                ),
-                exports="\n".join(
-                    [
-                        *(f"export {key}='{value}'" for key, value in env.items()),
-                        "export SHELL",
-                    ]
-                ),
-                setup_command=get_conditional_run_command(
-                    "METR_BASELINE_SETUP_COMPLETE", HelperCommand.setup
-                ),
-                recording_command=get_conditional_run_command(
-                    "METR_RECORDING_STARTED", HelperCommand.record
-                )
-                if with_recording
-                else "",
+    content = (
+        textwrap.dedent(profile)
+        .lstrip()
+        .format(
+            aliases="\n".join(
+                [
+                    command.alias_def(code_path)
+                    for command in HelperCommand
+                    if not (
+                        command in {HelperCommand.score, HelperCommand.score_log}
+                        and not intermediate_scoring
+                    )
+                    and not (
+                        command in {HelperCommand.record, HelperCommand.search}
+                        and not with_recording
+                    )
+                ]
+            ),
+            exports="\n".join(
+                [
+                    *(f"export {key}='{value}'" for key, value in env.items()),
+                    "export SHELL",
+                ]
+            ),
+            clock_prompt=get_clock_prompt_segment() if with_clock_prompt else "",
+            setup_command=get_conditional_run_command(
+                "METR_BASELINE_SETUP_COMPLETE",
+                HelperCommand.setup,
+                SETUP_COMPLETE_FILE,
+            ),
+            recording_command=get_conditional_run_command(
+                "METR_RECORDING_STARTED", HelperCommand.record
             )
+            if with_recording
+            else "",
         )
+    )
+    async with aiofiles.open(profile_file, "w") as f:
+        await f.write(content)
+    async with aiofiles.open(get_profile_hash_file(profile_file), "w") as f:
+        await f.write(_hash_profile(content))
     return profile_file
 
 
+def get_profile_hash_file(profile_file: pathlib.Path) -> pathlib.Path:
+    return profile_file.with_name(f"{profile_file.name}.sha256")
+
+
+def _hash_profile(content: str) -> str:
+    return hashlib.sha256(content.encode()).hexdigest()
+
+
+def _is_sourced_by(shell_config: str, profile_file: pathlib.Path) -> bool:
+    """Whether a line of shell_config sources profile_file, e.g. the line added by
+    `ensure_sourced`. Commented out lines don't count.
+    """
+    pattern = re.compile(
+        rf"""(?:^|[\s;&|])(?:\.|source)\s+(["']?){re.escape(str(profile_file))}\1\s*$"""
+    )
+    return any(
+        pattern.search(line)
+        for line in shell_config.splitlines()
+        if not line.lstrip().startswith("#")
+    )
+
+
 async def ensure_sourced(
     shell_config_file: pathlib.Path, profile_file: pathlib.Path
 ) -> bool:
@@ -254,7 +330,49 @@ async def show_welcome_message() -> tuple[clock.ClockStatus, str]:
     return clock_status, instructions
 
 
-async def is_alias_defined(shell_path: pathlib.Path) -> bool:
+async def _is_alias_defined_statically(
+    shell_config_file: pathlib.Path, profile_file: pathlib.Path
+) -> bool:
+    """Whether shell_config_file sources profile_file, and profile_file is what
+    `create_profile_file` wrote and defines the helper aliases.
+
+    False means inconclusive rather than not defined: e.g. the profile could be
+    sourced from another file, which only the shell itself can tell.
+    """
+    try:
+        async with aiofiles.open(shell_config_file, "r") as f:
+            shell_config = await f.read()
+        async with aiofiles.open(profile_file, "r") as f:
+            profile = await f.read()
+        async with aiofiles.open(get_profile_hash_file(profile_file), "r") as f:
+            profile_hash = (await f.read()).strip()
+    except (FileNotFoundError, UnicodeDecodeError):
+        return False
+
+    return (
+        _is_sourced_by(shell_config, profile_file)
+        and _hash_profile(profile) == profile_hash
+        and re.search(rf"^alias {HelperCommand.clock.name}=", profile, re.MULTILINE)
+        is not None
+    )
+
+
+async def is_alias_defined(
+    shell_path: pathlib.Path,
+    shell_config_file: pathlib.Path | None = None,
+    profile_file: pathlib.Path = AGENT_PROFILE_FILE,
+) -> bool:
+    """Whether new interactive shells will have the helper aliases.
+
+    Checks the shell config file and profile first, and only starts a login shell
+    (which sources all of the user's dotfiles, and can be slow) if that's
+    inconclusive.
+    """
+    if shell_config_file is not None and await _is_alias_defined_statically(
+        shell_config_file, profile_file
+    ):
+        return True
+
     process = await asyncio.create_subprocess_exec(
         str(shell_path),
         "--login",
@@ -311,7 +429,7 @@ async def main() -> int:
     os.environ["METR_BASELINE_SETUP_COMPLETE"] = "1"
 
     exit_code = 0
-    if not await is_alias_defined(shell_path):
+    if not await is_alias_defined(shell_path, shell_config_file):
         await ensure_sourced(shell_config_file, AGENT_PROFILE_FILE)
         click.echo(
             "Please run the following commands to complete the setup and start the task:"
@@ -321,6 +439,9 @@ async def main() -> int:
         exit_code = 1
     elif not await check_started(clock_status, instructions):
         exit_code = 1
+    else:
+        SETUP_COMPLETE_FILE.parent.mkdir(parents=True, exist_ok=True)
+        SETUP_COMPLETE_FILE.touch()
 
     await async_cleanup()
     return exit_code
@@ -1,11 +1,11 @@
 import asyncio
 import json
 
-import aiofiles
 import click
 
 import src.clock as clock
 from src.settings import AGENT_HOME_DIR, HOOKS, async_cleanup, get_timestamp
+from src.writer import BufferedWriter, FsyncPolicy
 
 LOG_FILE = AGENT_HOME_DIR / "notes.jsonl"
 _LOG_ATTRIBUTES = {
@@ -37,7 +37,7 @@ async def append_to_jsonl(text):
     entry = {"timestamp": get_timestamp(), "content": text}
 
     LOG_FILE.parent.mkdir(parents=True, exist_ok=True)
-    async with aiofiles.open(LOG_FILE, "a") as file:
+    async with BufferedWriter(LOG_FILE, "a", fsync=FsyncPolicy.ON_CLOSE) as file:
         await file.write(json.dumps(entry) + "\n")
 
 
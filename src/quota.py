@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+import fcntl
+import gzip
+import os
+import pathlib
+import shutil
+from typing import NamedTuple
+
+import click
+import prettytable
+
+import src.registry as registry
+import src.search as search
+from src.settings import TERMINAL_LOG_DIR
+
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024
+DEFAULT_MIN_FREE_BYTES = 512 * 1024 * 1024
+_LOCK_FILE_NAME = "quota.lock"
+# Rewritten from terminal.cast for every chunk, so safe to delete
+_REGENERABLE_FILE_NAMES = ("trimmed_terminal.cast", "terminal.gif")
+# Not needed while recording, so gzipped once the window is closed. The text log
+# is only appended to, so the offsets logged for it still hold in the gunzipped
+# copy.
+_COMPRESSIBLE_FILE_NAMES = ("terminal_text.log", "terminal.cast")
+
+
+class WindowUsage(NamedTuple):
+    window_id: int
+    path: pathlib.Path
+    bytes: int
+    last_modified: float
+    live: bool
+
+
+class Eviction(NamedTuple):
+    path: pathlib.Path
+    action: str
+    bytes_freed: int
+
+
+def _get_dir_usage(path: pathlib.Path) -> tuple[int, float]:
+    total_bytes, last_modified = 0, 0.0
+    for entry in os.scandir(path):
+        if entry.is_file(follow_symlinks=False):
+            stat = entry.stat(follow_symlinks=False)
+            total_bytes += stat.st_size
+            last_modified = max(last_modified, stat.st_mtime)
+    return total_bytes, last_modified
+
+
+def get_usage(log_dir: pathlib.Path = TERMINAL_LOG_DIR) -> list[WindowUsage]:
+    live_window_ids = registry.get_live_window_ids(log_dir)
+    usage = []
+    for window_dir in log_dir.iterdir():
+        if not (window_dir.is_dir() and window_dir.name.isdigit()):
+            continue
+        window_bytes, last_modified = _get_dir_usage(window_dir)
+        usage.append(
+            WindowUsage(
+                window_id=int(window_dir.name),
+                path=window_dir,
+                bytes=window_bytes,
+                last_modified=last_modified,
+                live=int(window_dir.name) in live_window_ids,
+            )
+        )
+    return sorted(usage, key=lambda window: window.last_modified)
+
+
+def get_total_bytes(log_dir: pathlib.Path, usage: list[WindowUsage]) -> int:
+    """Bytes used by the windows and the search index.
+
+    The search index (with its write-ahead log) is never evicted, as search needs
+    it, but it counts towards the quota.
+    """
+    total_bytes = sum(window.bytes for window in usage)
+    for index_file in log_dir.glob(f"{search.INDEX_FILE.name}*"):
+        total_bytes += index_file.stat().st_size
+    return total_bytes
+
+
+def compress_file(path: pathlib.Path) -> pathlib.Path:
+    """Replace a finished file with a gzipped copy, e.g. a cast readable with
+    `open_cast`
+    """
+    compressed_file = path.with_name(path.name + ".gz")
+    partial_file = compressed_file.with_name(compressed_file.name + ".partial")
+    with open(path, "rb") as f_in, gzip.open(partial_file, "wb") as f_out:
+        shutil.copyfileobj(f_in, f_out)
+    partial_file.replace(compressed_file)
+    path.unlink()
+    return compressed_file
+
+
+def _iter_candidates(log_dir: pathlib.Path, usage: list[WindowUsage]):
+    """Files to free, cheapest to lose first, oldest first within each group"""
+    # Windows that are still recording rewrite these for every chunk
+    finished_windows = [window for window in usage if not window.live]
+    for window in finished_windows:
+        for file_name in _REGENERABLE_FILE_NAMES:
+            yield window.path / file_name, "delete"
+    for file_name in _COMPRESSIBLE_FILE_NAMES:
+        for window in finished_windows:
+            yield window.path / file_name, "compress"
+
+
+def enforce_quota(
+    log_dir: pathlib.Path = TERMINAL_LOG_DIR,
+    max_bytes: int = DEFAULT_MAX_BYTES,
+    min_free_bytes: int = DEFAULT_MIN_FREE_BYTES,
+) -> list[Eviction]:
+    """Free space until the logs are under max_bytes and the disk has min_free_bytes.
+
+    Only one process enforces the quota at a time, the others skip it.
+    """
+    if not log_dir.is_dir():
+        return []
+
+    with open(log_dir / _LOCK_FILE_NAME, "w") as lock_file:
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return []
+
+        usage = get_usage(log_dir)
+        total_bytes = get_total_bytes(log_dir, usage)
+        free_bytes = shutil.disk_usage(log_dir).free
+        evictions: list[Eviction] = []
+        for path, action in _iter_candidates(log_dir, usage):
+            if total_bytes <= max_bytes and free_bytes >= min_free_bytes:
+                break
+            if not path.exists():
+                continue
+
+            size = path.stat().st_size
+            if action == "compress":
+                size -= compress_file(path).stat().st_size
+            else:
+                path.unlink()
+            total_bytes -= size
+            free_bytes += size
+            evictions.append(Eviction(path, action, size))
+
+        fcntl.flock(lock_file, fcntl.LOCK_UN)
+    return evictions
+
+
+@click.command()
+@click.option(
+    "--log_dir",
+    type=click.Path(exists=True, file_okay=False, path_type=pathlib.Path),
+    default=TERMINAL_LOG_DIR,
+)
+@click.option("--enforce", is_flag=True, help="Free space if over the quota")
+@click.option("--max_bytes", type=int, default=DEFAULT_MAX_BYTES)
+@click.option("--min_free_bytes", type=int, default=DEFAULT_MIN_FREE_BYTES)
+def main(log_dir: pathlib.Path, enforce: bool, max_bytes: int, min_free_bytes: int):
+    """Show (and optionally enforce) disk usage of terminal recordings"""
+    if enforce:
+        for eviction in enforce_quota(log_dir, max_bytes, min_free_bytes):
+            click.echo(
+                f"{eviction.action}: {eviction.path} ({eviction.bytes_freed} bytes)"
+            )
+
+    usage = get_usage(log_dir)
+    table = prettytable.PrettyTable()
+    table.field_names = ["Window", "Bytes", "Live"]
+    for window in sorted(usage):
+        table.add_row([window.window_id, window.bytes, "yes" if window.live else ""])
+    click.echo(table.get_string())
+    click.echo(f"Total: {get_total_bytes(log_dir, usage)} of {max_bytes} bytes")
+
+
+if __name__ == "__main__":
+    main()
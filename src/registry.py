@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import json
+import os
+import pathlib
+import time
+from typing import Iterator, NamedTuple
+
+from src.settings import TERMINAL_LOG_DIR
+
+_LIVE_DIR_NAME = "live"
+_NEXT_ID_FILE_NAME = "next_window_id"
+RECORDER_FILE_NAME = "recorder.json"
+
+
+class WindowInfo(NamedTuple):
+    window_id: int
+    pid: int
+    start_time: float
+    # When the recorder process started, see `get_process_start_ticks`
+    process_start_ticks: int | None = None
+
+
+def get_process_start_ticks(pid: int) -> int | None:
+    """Clock ticks after boot that the process started at, None if unknown.
+
+    Together with the pid this identifies a process, as pids get reused.
+    """
+    try:
+        stat = pathlib.Path(f"/proc/{pid}/stat").read_text()
+    except OSError:
+        return None
+    # The command name can contain spaces, so count fields from after it. The
+    # start time is field 22, and the fields after the name start at field 3.
+    return int(stat.rpartition(")")[2].split()[19])
+
+
+def is_alive(pid: int, process_start_ticks: int | None = None) -> bool:
+    """Whether the process is running, and is still the same process if its start
+    ticks are given
+    """
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # Exists, but belongs to another user
+        pass
+    if process_start_ticks is None:
+        return True
+    # Unknown if /proc isn't available, or the process just exited
+    current_start_ticks = get_process_start_ticks(pid)
+    return current_start_ticks is None or current_start_ticks == process_start_ticks
+
+
+def _read_next_id(log_dir: pathlib.Path) -> int:
+    try:
+        return int((log_dir / _NEXT_ID_FILE_NAME).read_text())
+    except (FileNotFoundError, ValueError):
+        return 0
+
+
+def allocate_window_id(log_dir: pathlib.Path = TERMINAL_LOG_DIR) -> int:
+    """Claim the next free window id by creating its directory.
+
+    mkdir either creates the directory or fails, so two recorders can never get the
+    same id. The next id file is only a hint of where to start looking.
+    """
+    log_dir.mkdir(parents=True, exist_ok=True)
+    window_id = _read_next_id(log_dir)
+    while True:
+        try:
+            (log_dir / str(window_id)).mkdir()
+            break
+        except FileExistsError:
+            window_id += 1
+
+    next_id_file = log_dir / _NEXT_ID_FILE_NAME
+    partial_file = next_id_file.with_name(f"{next_id_file.name}.{window_id}")
+    partial_file.write_text(str(window_id + 1))
+    partial_file.replace(next_id_file)
+    return window_id
+
+
+def register_window(
+    log_dir: pathlib.Path = TERMINAL_LOG_DIR, pid: int | None = None
+) -> WindowInfo:
+    """Allocate a window for this recorder and mark it as live"""
+    pid = os.getpid() if pid is None else pid
+    window = WindowInfo(
+        window_id=allocate_window_id(log_dir),
+        pid=pid,
+        start_time=time.time(),
+        process_start_ticks=get_process_start_ticks(pid),
+    )
+    (log_dir / str(window.window_id) / RECORDER_FILE_NAME).write_text(
+        json.dumps(window._asdict())
+    )
+    live_dir = log_dir / _LIVE_DIR_NAME
+    live_dir.mkdir(exist_ok=True)
+    (live_dir / str(window.window_id)).touch()
+    return window
+
+
+def unregister_window(window_id: int, log_dir: pathlib.Path = TERMINAL_LOG_DIR):
+    (log_dir / _LIVE_DIR_NAME / str(window_id)).unlink(missing_ok=True)
+
+
+def get_window_info(
+    window_id: int, log_dir: pathlib.Path = TERMINAL_LOG_DIR
+) -> WindowInfo | None:
+    try:
+        recorder_info = json.loads(
+            (log_dir / str(window_id) / RECORDER_FILE_NAME).read_text()
+        )
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+    return WindowInfo(**recorder_info)
+
+
+def iter_live_windows(
+    log_dir: pathlib.Path = TERMINAL_LOG_DIR,
+) -> Iterator[WindowInfo]:
+    """Windows whose recorder is still running.
+
+    Only the live directory is listed, so this doesn't slow down as closed windows
+    pile up. Entries left behind by recorders that were killed are removed.
+    """
+    live_dir = log_dir / _LIVE_DIR_NAME
+    if not live_dir.is_dir():
+        return
+
+    for live_file in live_dir.iterdir():
+        if not live_file.name.isdigit():
+            continue
+        window = get_window_info(int(live_file.name), log_dir)
+        if window is not None and is_alive(window.pid, window.process_start_ticks):
+            yield window
+        else:
+            live_file.unlink(missing_ok=True)
+
+
+def get_live_window_ids(log_dir: pathlib.Path = TERMINAL_LOG_DIR) -> set[int]:
+    return {window.window_id for window in iter_live_windows(log_dir)}
@@ -0,0 +1,317 @@
+from __future__ import annotations
+
+import asyncio
+import base64
+import collections
+import concurrent.futures
+import os
+import pathlib
+import subprocess
+import tempfile
+from typing import Iterator, NamedTuple
+
+import click
+
+import src.terminal as terminal
+from src.settings import AGENT_BIN_DIR, HOOKS, async_cleanup
+
+
+_MAX_PENDING_PER_WORKER = 2
+
+
+class ChunkJob(NamedTuple):
+    window_id: int
+    chunk_index: int
+    cast_header: dict
+    events: list[terminal.TerminalEvent]
+    time_offset: float
+    log_text: bool
+    styled_text: bool
+    agg: str | None
+    render_settings_ladder: list[terminal.RenderSettings]
+    max_image_bytes: int | None
+
+
+class RenderedChunk(NamedTuple):
+    window_id: int
+    chunk_index: int
+    text: str | None
+    cast_lines: list[str]
+    gif: bytes | None
+    render_settings: terminal.RenderSettings | None
+
+
+def iter_chunks(
+    events: list[terminal.TerminalEvent], prompt_buffer: int
+) -> Iterator[tuple[list[terminal.TerminalEvent], float]]:
+    """Split a finished cast the same way LogMonitor does while recording.
+
+    Yields each chunk with the time offset of its trimmed cast. Events after the last
+    complete chunk are yielded as a final chunk, since the cast won't grow any more.
+    The prompts are found in one pass: as in `terminal.split_at_prompt`, every
+    `prompt_buffer`th prompt starts a new chunk.
+    """
+    if not events:
+        return
+    if prompt_buffer < 1:
+        raise ValueError("prompt_buffer must be at least 1")
+
+    terminal_prefix = terminal.get_terminal_prefix(events)
+    prompt_indices = [
+        idx for idx, event in enumerate(events) if terminal_prefix in event[2]
+    ]
+    last_cast_time = 0
+    start = 0
+    # The part of the last split event that starts the next chunk
+    remainder: list[terminal.TerminalEvent] = []
+    for split_index in prompt_indices[prompt_buffer::prompt_buffer]:
+        event_before_prompt, event_from_prompt = terminal.split_event_at_prompt(
+            events[split_index], terminal_prefix
+        )
+        complete_events = [*remainder, *events[start:split_index], event_before_prompt]
+        yield complete_events, last_cast_time
+        last_cast_time = complete_events[-1][0]
+        start = split_index + 1
+        remainder = [event_from_prompt]
+
+    remaining_events = [*remainder, *events[start:]]
+    if any(event[2].strip() for event in remaining_events):
+        yield remaining_events, last_cast_time
+
+
+def _render_gif(
+    cast_lines: list[str],
+    agg: str,
+    render_settings_ladder: list[terminal.RenderSettings],
+    max_image_bytes: int | None,
+) -> tuple[bytes, terminal.RenderSettings] | tuple[None, None]:
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cast_file = pathlib.Path(tmp_dir) / "trimmed_terminal.cast"
+        gif_file = pathlib.Path(tmp_dir) / "terminal.gif"
+        cast_file.write_text("".join(cast_lines))
+        for render_settings in render_settings_ladder:
+            subprocess.run(
+                [agg, cast_file, gif_file, *render_settings.agg_options],
+                check=True,
+                capture_output=True,
+            )
+            gif = gif_file.read_bytes()
+            # Budget applies to the base64 data URL, as when recording
+            image_url_bytes = 4 * ((len(gif) + 2) // 3) + len("data:image/gif;base64,")
+            if max_image_bytes is None or image_url_bytes <= max_image_bytes:
+                return gif, render_settings
+    return None, None
+
+
+def render_chunk(job: ChunkJob) -> RenderedChunk:
+    time_offset_events = terminal.adjust_event_times(job.events, job.time_offset)
+    cast_lines = terminal.events_to_cast_lines(job.cast_header, time_offset_events)
+    text = None
+    if job.log_text:
+        text = terminal.format_text_log(job.events, styled=job.styled_text)
+
+    gif, render_settings = None, None
+    if job.agg is not None:
+        gif, render_settings = _render_gif(
+            cast_lines, job.agg, job.render_settings_ladder, job.max_image_bytes
+        )
+
+    return RenderedChunk(
+        window_id=job.window_id,
+        chunk_index=job.chunk_index,
+        text=text,
+        cast_lines=cast_lines,
+        gif=gif,
+        render_settings=render_settings,
+    )
+
+
+def _get_window_id(cast_file: pathlib.Path, default: int) -> int:
+    window_id = cast_file.parent.name
+    return int(window_id) if window_id.isdigit() else default
+
+
+def get_jobs(
+    cast_files: list[pathlib.Path],
+    *,
+    prompt_buffer: int,
+    log_text: bool,
+    styled_text: bool,
+    agg: str | None,
+    fps_cap: int,
+    speed: float,
+    max_image_bytes: int | None,
+) -> Iterator[ChunkJob]:
+    render_settings_ladder = terminal.get_render_settings_ladder(fps_cap, speed)
+    for idx_cast, cast_file in enumerate(cast_files):
+        cast_header, events = terminal.read_cast(cast_file)
+        window_id = _get_window_id(cast_file, idx_cast)
+        for chunk_index, (chunk_events, time_offset) in enumerate(
+            iter_chunks(events, prompt_buffer)
+        ):
+            yield ChunkJob(
+                window_id=window_id,
+                chunk_index=chunk_index,
+                cast_header=cast_header,
+                events=chunk_events,
+                time_offset=time_offset,
+                log_text=log_text,
+                styled_text=styled_text,
+                agg=agg,
+                render_settings_ladder=render_settings_ladder,
+                max_image_bytes=max_image_bytes,
+            )
+
+
+async def _write_chunk(output_dir: pathlib.Path, chunk: RenderedChunk):
+    chunk_dir = output_dir / str(chunk.window_id)
+    chunk_dir.mkdir(parents=True, exist_ok=True)
+    chunk_file = chunk_dir / f"chunk_{chunk.chunk_index:05d}"
+    await asyncio.to_thread(
+        chunk_file.with_suffix(".cast").write_text, "".join(chunk.cast_lines)
+    )
+    if chunk.text is not None:
+        await asyncio.to_thread(chunk_file.with_suffix(".txt").write_text, chunk.text)
+    if chunk.gif is not None:
+        await asyncio.to_thread(chunk_file.with_suffix(".gif").write_bytes, chunk.gif)
+
+
+async def _upload_chunk(
+    monitors: dict[int, terminal.LogMonitor],
+    output_dir: pathlib.Path,
+    chunk: RenderedChunk,
+    log_casts: bool,
+):
+    if chunk.window_id not in monitors:
+        monitors[chunk.window_id] = terminal.LogMonitor(
+            window_id=chunk.window_id,
+            log_gifs=False,
+            log_text=False,
+            log_casts=False,
+            styled_text=False,
+            log_dir=output_dir,
+        )
+    monitor = monitors[chunk.window_id]
+
+    if chunk.text is not None:
+        await monitor.send_formatted_text(chunk.text)
+    if chunk.gif is not None and chunk.render_settings is not None:
+        image_url = "data:image/gif;base64," + base64.b64encode(chunk.gif).decode()
+        await HOOKS.log_image(
+            image_url,
+            description=(
+                f"Terminal window: {chunk.window_id} "
+                f"({chunk.render_settings.describe()})"
+            ),
+        )
+    if log_casts:
+        await monitor.send_cast_log(chunk.cast_lines)
+
+
+async def reprocess(
+    jobs: Iterator[ChunkJob],
+    output_dir: pathlib.Path,
+    *,
+    upload: bool = False,
+    log_casts: bool = False,
+    max_workers: int | None = None,
+) -> int:
+    """Render chunks in a process pool and write or upload them in order.
+
+    Only a few chunks per worker are submitted ahead of the one being written, so
+    memory doesn't grow with the size of the casts.
+    """
+    loop = asyncio.get_running_loop()
+    monitors: dict[int, terminal.LogMonitor] = {}
+    max_workers = max_workers or os.cpu_count() or 1
+    pending: collections.deque[asyncio.Future[RenderedChunk]] = collections.deque()
+    num_chunks = 0
+
+    async def handle_next():
+        nonlocal num_chunks
+        chunk = await pending.popleft()
+        if upload:
+            await _upload_chunk(monitors, output_dir, chunk, log_casts)
+        else:
+            await _write_chunk(output_dir, chunk)
+        num_chunks += 1
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=max_workers) as pool:
+        for job in jobs:
+            pending.append(loop.run_in_executor(pool, render_chunk, job))
+            if len(pending) >= _MAX_PENDING_PER_WORKER * max_workers:
+                await handle_next()
+        while pending:
+            await handle_next()
+    return num_chunks
+
+
+@click.command()
+@click.argument(
+    "CAST_FILES",
+    nargs=-1,
+    required=True,
+    type=click.Path(exists=True, dir_okay=False, path_type=pathlib.Path),
+)
+@click.option(
+    "--output_dir",
+    type=click.Path(file_okay=False, writable=True, path_type=pathlib.Path),
+    default=pathlib.Path("reprocessed_terminals"),
+)
+@click.option("--upload", is_flag=True, help="Send logs through hooks, in order")
+@click.option("--text/--no_text", default=True)
+@click.option("--styled_text", is_flag=True)
+@click.option("--gif", is_flag=True)
+@click.option("--cast", "log_casts", is_flag=True, help="Upload trimmed casts")
+@click.option("--agg", type=str, default=str(AGENT_BIN_DIR / "agg"))
+@click.option("--prompt_buffer", type=int, default=5)
+@click.option("--fps_cap", type=int, default=7)
+@click.option("--speed", type=float, default=3)
+@click.option("--max_image_bytes", type=int, default=2 * 1024 * 1024)
+@click.option("--workers", type=int, default=os.cpu_count())
+def main(
+    cast_files: tuple[pathlib.Path, ...],
+    output_dir: pathlib.Path,
+    upload: bool,
+    text: bool,
+    styled_text: bool,
+    gif: bool,
+    log_casts: bool,
+    agg: str,
+    prompt_buffer: int,
+    fps_cap: int,
+    speed: float,
+    max_image_bytes: int,
+    workers: int,
+):
+    """Regenerate terminal logs from recorded CAST_FILES"""
+    jobs = get_jobs(
+        list(cast_files),
+        prompt_buffer=prompt_buffer,
+        log_text=text,
+        styled_text=styled_text,
+        agg=agg if gif else None,
+        fps_cap=fps_cap,
+        speed=speed,
+        max_image_bytes=max_image_bytes or None,
+    )
+
+    async def _main():
+        num_chunks = await reprocess(
+            jobs,
+            output_dir,
+            upload=upload,
+            log_casts=log_casts,
+            max_workers=workers,
+        )
+        click.echo(
+            f"{'Uploaded' if upload else 'Wrote'} {num_chunks} chunks"
+            + ("" if upload else f" to {output_dir}")
+        )
+        await async_cleanup()
+
+    asyncio.run(_main())
+
+
+if __name__ == "__main__":
+    main()
@@ -5,7 +5,6 @@ import enum
 import json
 
 import aiofiles
-import prettytable
 
 import src.clock as clock
 from src.settings import HOOKS, async_cleanup, save_state
@@ -88,6 +87,9 @@ async def log():
         await HOOKS.log(output)
         return []
 
+    # Only needed here, so scoring doesn't import it
+    import prettytable
+
     table = prettytable.PrettyTable()
     table.field_names = ["Attempt", "Time", "Score", "Message"]
     for idx, entry in enumerate(score_log, start=1):
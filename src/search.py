@@ -0,0 +1,223 @@
+from __future__ import annotations
+
+import datetime
+import enum
+import pathlib
+import re
+import sqlite3
+import time
+from typing import Iterable, Iterator, NamedTuple
+
+import click
+
+from src.settings import TERMINAL_LOG_DIR
+
+INDEX_FILE = TERMINAL_LOG_DIR / "search.sqlite"
+
+_ESCAPE_PATTERN = re.compile(
+    r"""
+    \x1B\][^\x07\x1B]*(?:\x07|\x1B\\)?  # OSC (e.g. window title)
+    |\x1B\[[0-?]*[ -/]*[@-~]            # CSI
+    |\x1B[@-Z\\-_=>]                    # Other escapes
+    """,
+    re.VERBOSE,
+)
+_CONTROL_PATTERN = re.compile(r"[\x00-\x08\x0B-\x1F\x7F]")
+_PROMPT_END_PATTERN = re.compile(r"[$#%>] ")
+_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS lines USING fts5(
+    text,
+    kind UNINDEXED,
+    window UNINDEXED,
+    time UNINDEXED,
+    tokenize = "unicode61 tokenchars '-_./'"
+);
+"""
+
+
+class LineKind(str, enum.Enum):
+    COMMAND = "command"
+    OUTPUT = "output"
+
+
+class SearchHit(NamedTuple):
+    window_id: int
+    time: float
+    kind: LineKind
+    text: str
+
+
+def clean_line(line: str) -> str:
+    """Drop escape sequences and keep what is left on screen after carriage returns"""
+    line = _ESCAPE_PATTERN.sub("", line).rstrip("\r\n")
+    line = line.rpartition("\r")[2]
+    chars: list[str] = []
+    for char in line:
+        if char != "\b":
+            chars.append(char)
+        elif chars:
+            chars.pop()
+    return _CONTROL_PATTERN.sub("", "".join(chars)).strip()
+
+
+def iter_lines(
+    events: Iterable[tuple[float, str, str]], terminal_prefix: str | None
+) -> Iterator[tuple[float, LineKind, str]]:
+    """Yield the time, kind and cleaned text of each line of terminal output.
+
+    Lines containing the prompt are commands, with the prompt itself removed.
+    """
+    line, line_time = "", 0.0
+    for event_time, event_type, data in events:
+        if event_type != "o":
+            continue
+        for piece in data.splitlines(keepends=True):
+            if not line:
+                line_time = event_time
+            line += piece
+            if line.endswith(("\n", "\r\n")):
+                yield from _get_indexed_line(line_time, line, terminal_prefix)
+                line = ""
+    if line:
+        yield from _get_indexed_line(line_time, line, terminal_prefix)
+
+
+def _get_indexed_line(
+    line_time: float, line: str, terminal_prefix: str | None
+) -> Iterator[tuple[float, LineKind, str]]:
+    kind = LineKind.OUTPUT
+    if terminal_prefix and terminal_prefix in line:
+        kind = LineKind.COMMAND
+        line = line.partition(terminal_prefix)[2]
+    text = clean_line(line)
+    if kind == LineKind.COMMAND:
+        match = _PROMPT_END_PATTERN.search(text)
+        text = text[match.end() :].strip() if match else ""
+    if text:
+        yield line_time, kind, text
+
+
+class SearchIndex:
+    """Full-text index of the terminal history of all windows.
+
+    Each recorder appends to the same SQLite FTS5 table, so a query is a single
+    index lookup instead of a scan over every cast.
+    """
+
+    def __init__(self, index_file: pathlib.Path = INDEX_FILE):
+        self.index_file = index_file
+        self._connection: sqlite3.Connection | None = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None:
+            self.index_file.parent.mkdir(parents=True, exist_ok=True)
+            # Several recorders write concurrently
+            connection = sqlite3.connect(
+                self.index_file, timeout=10, check_same_thread=False
+            )
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript(_SCHEMA)
+            self._connection = connection
+        return self._connection
+
+    def add_events(
+        self,
+        window_id: int,
+        start_time: float,
+        events: Iterable[tuple[float, str, str]],
+        terminal_prefix: str | None,
+    ) -> int:
+        rows = [
+            (text, kind.value, window_id, start_time + line_time)
+            for line_time, kind, text in iter_lines(events, terminal_prefix)
+        ]
+        connection = self._connect()
+        with connection:
+            connection.executemany(
+                "INSERT INTO lines (text, kind, window, time) VALUES (?, ?, ?, ?)",
+                rows,
+            )
+        return len(rows)
+
+    def search(
+        self,
+        query: str,
+        *,
+        window_id: int | None = None,
+        kind: LineKind | None = None,
+        limit: int = 20,
+    ) -> list[SearchHit]:
+        """Lines matching all words of the query, most recent first.
+
+        Each word matches as a prefix, e.g. `pyt` matches `python3`.
+        """
+        terms = " ".join(
+            '"{}"*'.format(word.replace('"', '""')) for word in query.split()
+        )
+        if not terms or not self.index_file.exists():
+            return []
+
+        sql = "SELECT window, time, kind, text FROM lines WHERE lines MATCH ?"
+        params: list[str | int] = [terms]
+        if window_id is not None:
+            sql += " AND window = ?"
+            params.append(window_id)
+        if kind is not None:
+            sql += " AND kind = ?"
+            params.append(kind.value)
+        sql += " ORDER BY time DESC LIMIT ?"
+        params.append(limit)
+
+        return [
+            SearchHit(window, line_time, LineKind(line_kind), text)
+            for window, line_time, line_kind, text in self._connect().execute(
+                sql, params
+            )
+        ]
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+
+@click.command()
+@click.argument("QUERY", nargs=-1, required=True)
+@click.option("--window", "window_id", type=int, help="Only search this window")
+@click.option("--commands", is_flag=True, help="Only search commands")
+@click.option("--limit", type=int, default=20)
+@click.option(
+    "--index_file",
+    type=click.Path(dir_okay=False, path_type=pathlib.Path),
+    default=INDEX_FILE,
+)
+def main(
+    query: tuple[str, ...],
+    window_id: int | None,
+    commands: bool,
+    limit: int,
+    index_file: pathlib.Path,
+):
+    """Search the terminal history of all windows"""
+    start = time.perf_counter()
+    index = SearchIndex(index_file)
+    hits = index.search(
+        " ".join(query),
+        window_id=window_id,
+        kind=LineKind.COMMAND if commands else None,
+        limit=limit,
+    )
+    index.close()
+
+    for hit in reversed(hits):
+        timestamp = datetime.datetime.fromtimestamp(hit.time).strftime("%H:%M:%S")
+        prefix = "$ " if hit.kind == LineKind.COMMAND else "  "
+        click.echo(f"[{timestamp} window {hit.window_id}] {prefix}{hit.text}")
+    click.echo(
+        f"{len(hits)} matches in {(time.perf_counter() - start) * 1000:.0f}ms",
+        err=True,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,28 +1,200 @@
+from __future__ import annotations
+
 import datetime
+import enum
+import functools
 import json
 import os
 import pathlib
+import sys
+from typing import Any, NamedTuple
+
+
+def _get_source_code_dir() -> pathlib.Path:
+    """The directory src/ is in, also when imported from the bundle built from it"""
+    code_dir = pathlib.Path(__file__).parents[1]
+    if code_dir.is_file():
+        # .../agent_code.pyz/src/settings.py, see `src.bundle`
+        code_dir = code_dir.parent
+    return code_dir
 
-import pyhooks
 
 try:
-    LOCAL_MODE = (pathlib.Path(__file__).parents[1] / ".local").exists()
+    LOCAL_MODE = (_get_source_code_dir() / ".local").exists()
 except Exception:
     LOCAL_MODE = False
 
 AGENT_HOME_DIR = pathlib.Path.cwd() if LOCAL_MODE else pathlib.Path("/home/agent")
 AGENT_BIN_DIR = AGENT_HOME_DIR / ".local/bin"
 AGENT_CODE_DIR = (
-    pathlib.Path(__file__).parents[1] if LOCAL_MODE else AGENT_HOME_DIR / ".agent_code"
+    _get_source_code_dir() if LOCAL_MODE else AGENT_HOME_DIR / ".agent_code"
 )
 
-HOOKS = pyhooks.Hooks()
+
+class _LazyHooks:
+    """`pyhooks.Hooks`, only imported and created when first used.
+
+    pyhooks pulls in its whole HTTP stack, which many helper command code paths
+    never need. Attributes set on this object (e.g. by mocks) are set on the hooks.
+    """
+
+    def __init__(self):
+        object.__setattr__(self, "_hooks", None)
+
+    def _get_hooks(self):
+        if self._hooks is None:
+            import pyhooks
+
+            object.__setattr__(self, "_hooks", pyhooks.Hooks())
+        return self._hooks
+
+    def __getattr__(self, name: str):
+        return getattr(self._get_hooks(), name)
+
+    def __setattr__(self, name: str, value):
+        setattr(self._get_hooks(), name, value)
+
+    def __delattr__(self, name: str):
+        delattr(self._get_hooks(), name)
+
+    def __dir__(self):
+        return dir(self._get_hooks())
+
+
+HOOKS = _LazyHooks()
 INSTRUCTIONS_FILE = AGENT_HOME_DIR / "instructions.txt"
 RUN_INFO_FILE = AGENT_CODE_DIR / "run_info.json"
+TERMINAL_LOG_DIR = AGENT_CODE_DIR / ".terminals"
+COMMAND_SOCKET_FILE = AGENT_CODE_DIR / ".command.sock"
+MANIFEST_FILE = AGENT_CODE_DIR / "manifest.json"
+
+
+class TerminalRecording(str, enum.Enum):
+    NO_TERMINAL_RECORDING = "NO_TERMINAL_RECORDING"
+    TEXT_TERMINAL_RECORDING = "TEXT_TERMINAL_RECORDING"
+    STYLED_TEXT_TERMINAL_RECORDING = "STYLED_TEXT_TERMINAL_RECORDING"
+    GIF_TERMINAL_RECORDING = "GIF_TERMINAL_RECORDING"
+    FULL_TERMINAL_RECORDING = "FULL_TERMINAL_RECORDING"
+    CAST_TERMINAL_RECORDING = "CAST_TERMINAL_RECORDING"
+
+    @property
+    def logs_gifs(self) -> bool:
+        return self in {
+            TerminalRecording.GIF_TERMINAL_RECORDING,
+            TerminalRecording.FULL_TERMINAL_RECORDING,
+        }
+
+    @property
+    def logs_text(self) -> bool:
+        return self in {
+            TerminalRecording.TEXT_TERMINAL_RECORDING,
+            TerminalRecording.STYLED_TEXT_TERMINAL_RECORDING,
+            TerminalRecording.FULL_TERMINAL_RECORDING,
+            TerminalRecording.CAST_TERMINAL_RECORDING,
+        }
+
+    @property
+    def styled_text(self) -> bool:
+        return self == TerminalRecording.STYLED_TEXT_TERMINAL_RECORDING
+
+    @property
+    def logs_casts(self) -> bool:
+        return self == TerminalRecording.CAST_TERMINAL_RECORDING
+
+
+class Settings(NamedTuple):
+    """The contents of `run_info.json`: the task info and the agent's settings"""
+
+    run_info: dict[str, Any]
+
+    @property
+    def terminal_recording(self) -> TerminalRecording:
+        return TerminalRecording(self.run_info["agent"]["terminal_recording"])
 
+    @property
+    def ai_tools(self) -> str:
+        return self.run_info["agent"]["ai_tools"]
 
-def get_settings():
-    return json.loads(RUN_INFO_FILE.read_text())
+    @property
+    def intermediate_scoring(self) -> bool:
+        return self.run_info["task"]["scoring"]["intermediate"]
+
+    @property
+    def permissions(self) -> list[str]:
+        return self.run_info.get("task", {}).get("permissions") or []
+
+
+@functools.cache
+def _get_settings_schema(manifest_file: pathlib.Path) -> dict[str, Any] | None:
+    try:
+        return json.loads(manifest_file.read_text())["settingsSchema"]
+    except FileNotFoundError:
+        return None
+
+
+def validate_schema(value: Any, schema: dict[str, Any], path: str = "settings"):
+    """Check value against the subset of JSON Schema used by the manifest's
+    settingsSchema, raising ValueError if it doesn't match.
+    """
+    types = {"object": dict, "string": str, "boolean": bool, "array": list}
+    expected_type = schema.get("type")
+    if expected_type in types and not isinstance(value, types[expected_type]):
+        raise ValueError(f"{path} should be of type {expected_type}, got {value!r}")
+    if "enum" in schema and value not in schema["enum"]:
+        raise ValueError(f"{path} should be one of {schema['enum']}, got {value!r}")
+    if expected_type != "object":
+        return
+
+    properties = schema.get("properties", {})
+    missing = [key for key in schema.get("required", []) if key not in value]
+    if missing:
+        raise ValueError(f"{path} is missing {', '.join(missing)}")
+    for key, item in value.items():
+        if key in properties:
+            validate_schema(item, properties[key], f"{path}.{key}")
+        elif schema.get("additionalProperties", True) is False:
+            raise ValueError(f"{path} has unexpected property {key}")
+
+
+class _CachedSettings(NamedTuple):
+    path: pathlib.Path
+    file_id: tuple[int, int, int]
+    settings: Settings
+
+
+_cached_settings: _CachedSettings | None = None
+
+
+def load_settings() -> Settings:
+    """Settings from `run_info.json`, only read again when the file has changed.
+
+    The agent settings are validated against the manifest's settingsSchema when
+    the file is read.
+    """
+    global _cached_settings
+    stat = RUN_INFO_FILE.stat()
+    file_id = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+    if (
+        _cached_settings is not None
+        and _cached_settings.path == RUN_INFO_FILE
+        and _cached_settings.file_id == file_id
+    ):
+        return _cached_settings.settings
+
+    run_info = json.loads(RUN_INFO_FILE.read_text())
+    schema = _get_settings_schema(MANIFEST_FILE)
+    if schema is not None:
+        validate_schema(run_info.get("agent"), schema, "agent settings")
+    settings = Settings(run_info)
+    _cached_settings = _CachedSettings(RUN_INFO_FILE, file_id, settings)
+    return settings
+
+
+def get_settings() -> dict[str, Any]:
+    """`run_info.json` as a dict, see `load_settings`. Don't modify it: it is shared
+    with every other caller in this process.
+    """
+    return load_settings().run_info
 
 
 def get_timestamp():
@@ -50,9 +222,22 @@ def get_task_env():
     } | {"PYHOOKS_DEBUG": os.getenv("PYHOOKS_DEBUG", "false")}
 
 
-async def async_cleanup():
+def detach_hooks_session() -> Any:
+    """Take pyhooks' shared HTTP session, so the next hooks call creates its own.
+
+    Returns None if there is no session, without importing pyhooks if it was never
+    used.
+    """
+    pyhooks: Any = sys.modules.get("pyhooks")
+    if pyhooks is None:
+        return None
     client_session = pyhooks.hooks_api_http_session
+    pyhooks.hooks_api_http_session = None
+    return client_session
+
+
+async def async_cleanup():
+    client_session = detach_hooks_session()
     if not client_session or client_session.closed:
         return
     await client_session.close()
-    pyhooks.hooks_api_http_session = None
@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import asyncio
+import pathlib
+import shutil
+import time
+from typing import Awaitable, Callable, NamedTuple, Sequence
+
+import click
+
+from src.settings import AGENT_CODE_DIR
+
+CHECKPOINT_DIR = AGENT_CODE_DIR / ".setup"
+
+
+class Step(NamedTuple):
+    """A setup step, which must be safe to run again if it was interrupted"""
+
+    name: str
+    run: Callable[[], Awaitable[object]]
+    depends_on: tuple[str, ...] = ()
+
+
+class StepResult(NamedTuple):
+    name: str
+    # None if the step was already done
+    seconds: float | None
+
+
+def get_checkpoint_file(
+    name: str, checkpoint_dir: pathlib.Path = CHECKPOINT_DIR
+) -> pathlib.Path:
+    return checkpoint_dir / f"{name}.done"
+
+
+def is_done(
+    steps: Sequence[Step], checkpoint_dir: pathlib.Path = CHECKPOINT_DIR
+) -> bool:
+    return all(
+        get_checkpoint_file(step.name, checkpoint_dir).exists() for step in steps
+    )
+
+
+def reset(checkpoint_dir: pathlib.Path = CHECKPOINT_DIR):
+    shutil.rmtree(checkpoint_dir, ignore_errors=True)
+
+
+def _validate(steps: Sequence[Step]):
+    names = [step.name for step in steps]
+    if len(set(names)) != len(names):
+        raise ValueError(f"Duplicate setup steps in {names}")
+    for step in steps:
+        unknown = set(step.depends_on) - set(names)
+        if unknown:
+            raise ValueError(f"{step.name} depends on unknown steps {unknown}")
+
+    # Depth first search for cycles, which would otherwise wait forever
+    dependencies = {step.name: step.depends_on for step in steps}
+    visited: set[str] = set()
+
+    def visit(name: str, path: tuple[str, ...]):
+        if name in path:
+            raise ValueError(f"Setup steps depend on each other: {path + (name,)}")
+        if name in visited:
+            return
+        for dependency in dependencies[name]:
+            visit(dependency, path + (name,))
+        visited.add(name)
+
+    for name in names:
+        visit(name, ())
+
+
+async def run_steps(
+    steps: Sequence[Step], checkpoint_dir: pathlib.Path = CHECKPOINT_DIR
+) -> list[StepResult]:
+    """Run each step once all of its dependencies are done, skipping steps that
+    finished in an earlier run.
+
+    Independent steps run concurrently. If a step fails, the steps that depend on it
+    are skipped, but the others still finish and are checkpointed, so running setup
+    again only redoes what is missing. The first step to fail has its error raised
+    at the end.
+    """
+    _validate(steps)
+    checkpoint_dir.mkdir(parents=True, exist_ok=True)
+    tasks: dict[str, asyncio.Task[StepResult | None]] = {}
+    errors: dict[str, Exception] = {}
+
+    async def run_step(step: Step) -> StepResult | None:
+        # None if the step failed or was skipped
+        dependency_results = await asyncio.gather(
+            *(tasks[dependency] for dependency in step.depends_on)
+        )
+        if None in dependency_results:
+            not_done = [
+                dependency
+                for dependency, result in zip(step.depends_on, dependency_results)
+                if result is None
+            ]
+            click.echo(
+                f"Setup step {step.name}: skipped, {not_done} not done", err=True
+            )
+            return None
+
+        checkpoint_file = get_checkpoint_file(step.name, checkpoint_dir)
+        if checkpoint_file.exists():
+            click.echo(f"Setup step {step.name}: already done")
+            return StepResult(step.name, None)
+
+        start = time.perf_counter()
+        try:
+            await step.run()
+        except Exception as error:
+            errors[step.name] = error
+            click.echo(f"Setup step {step.name} failed: {error!r}", err=True)
+            return None
+        seconds = time.perf_counter() - start
+        checkpoint_file.write_text(f"{seconds:.3f}\n")
+        click.echo(f"Setup step {step.name}: done in {seconds:.2f}s")
+        return StepResult(step.name, seconds)
+
+    for step in steps:
+        tasks[step.name] = asyncio.create_task(run_step(step))
+    results = await asyncio.gather(*tasks.values())
+
+    if errors:
+        raise next(iter(errors.values()))
+    return [result for result in results if result is not None]
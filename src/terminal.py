@@ -2,7 +2,8 @@ from __future__ import annotations
 
 import asyncio
 import base64
-import fcntl
+import gzip
+import html
 import json
 import os
 import pathlib
@@ -10,20 +11,24 @@ import re
 import subprocess
 import sys
 import time
-from typing import TYPE_CHECKING, cast
+from typing import IO, TYPE_CHECKING, NamedTuple, cast
 
 import aiofiles
 import click
 
 import src.clock as clock
+import src.quota as quota
+import src.registry as registry
+import src.search as search
 from src.settings import (
     AGENT_BIN_DIR,
-    AGENT_CODE_DIR,
     HOOKS,
+    TERMINAL_LOG_DIR,
     async_cleanup,
-    get_settings,
     get_task_env,
+    load_settings,
 )
+from src.writer import BufferedWriter
 
 if TYPE_CHECKING:
     from _typeshed import StrPath
@@ -36,9 +41,45 @@ _LOG_ATTRIBUTES = {
         "background-color": "#424345",
     }
 }
-_LOG_DIR = AGENT_CODE_DIR / ".terminals"
-_WINDOW_IDS_FILE = _LOG_DIR / "window_ids.json"
-_WINDOW_IDS_LOCK_FILE = _LOG_DIR / "window_ids.lock"
+LOG_DIR = TERMINAL_LOG_DIR
+_IDLE_TIME_LIMIT = 1
+_LAST_FRAME_DURATION = 5
+_DEFAULT_FONT_SIZE = 14
+_DEFAULT_MAX_IMAGE_BYTES = 2 * 1024 * 1024
+_DEFAULT_MAX_TEXT_ENTRY_CHARS = 64 * 1024
+_DEFAULT_MAX_TEXT_CHARS = 1024 * 1024
+_QUOTA_CHECK_INTERVAL = 60
+
+
+class RenderSettings(NamedTuple):
+    fps_cap: int
+    speed: float
+    font_size: int = _DEFAULT_FONT_SIZE
+
+    @property
+    def agg_options(self) -> list[str]:
+        return [
+            f"--fps-cap={self.fps_cap:d}",
+            f"--speed={self.speed:f}",
+            f"--font-size={self.font_size:d}",
+            f"--idle-time-limit={_IDLE_TIME_LIMIT}",
+            f"--last-frame-duration={_LAST_FRAME_DURATION}",
+        ]
+
+    def describe(self) -> str:
+        return ", ".join(f"{key}={value:g}" for key, value in self._asdict().items())
+
+
+def get_render_settings_ladder(fps_cap: int, speed: float) -> list[RenderSettings]:
+    """Render settings to try in order, each producing a smaller GIF than the last"""
+    ladder = [
+        RenderSettings(fps_cap, speed),
+        RenderSettings(max(fps_cap // 2, 1), speed),
+        RenderSettings(max(fps_cap // 2, 1), speed * 2, 12),
+        RenderSettings(max(fps_cap // 4, 1), speed * 4, 10),
+        RenderSettings(1, speed * 8, 8),
+    ]
+    return list(dict.fromkeys(ladder))
 
 
 async def file_to_base64(file_path: StrPath) -> str:
@@ -67,6 +108,163 @@ def strip_ansi(text: str) -> str:
     return ansi_escape.sub("", text)
 
 
+_SGR_PATTERN = re.compile(
+    r"""
+    \x1B\[([0-9;]*)m                      # SGR, which we turn into styles
+    |\x1B\][^\x07\x1B]*(?:\x07|\x1B\\)?  # OSC (e.g. window title), dropped
+    """,
+    re.VERBOSE,
+)
+_ANSI_COLORS = [
+    "#000000",
+    "#cd3131",
+    "#0dbc79",
+    "#e5e510",
+    "#2472c8",
+    "#bc3fbc",
+    "#11a8cd",
+    "#e5e5e5",
+    "#666666",
+    "#f14c4c",
+    "#23d18b",
+    "#f5f543",
+    "#3b8eea",
+    "#d670d6",
+    "#29b8db",
+    "#ffffff",
+]
+
+
+def _xterm_color(index: int) -> str:
+    if index < 16:
+        return _ANSI_COLORS[index]
+    if index < 232:
+        red, green, blue = (
+            (index - 16) // 36,
+            (index - 16) // 6 % 6,
+            (index - 16) % 6,
+        )
+        levels = [0, 95, 135, 175, 215, 255]
+        return f"#{levels[red]:02x}{levels[green]:02x}{levels[blue]:02x}"
+    gray = 8 + (index - 232) * 10
+    return f"#{gray:02x}{gray:02x}{gray:02x}"
+
+
+def _apply_sgr(style: dict[str, str], params: str) -> dict[str, str]:
+    codes = [int(code) if code else 0 for code in params.split(";")]
+    style = dict(style)
+    while codes:
+        code = codes.pop(0)
+        if code == 0:
+            style.clear()
+        elif code == 1:
+            style["font-weight"] = "bold"
+        elif code == 2:
+            style["opacity"] = "0.7"
+        elif code == 3:
+            style["font-style"] = "italic"
+        elif code == 4:
+            style["text-decoration"] = "underline"
+        elif code == 22:
+            style.pop("font-weight", None)
+            style.pop("opacity", None)
+        elif code == 23:
+            style.pop("font-style", None)
+        elif code == 24:
+            style.pop("text-decoration", None)
+        elif code in {38, 48} and codes:
+            key = "color" if code == 38 else "background-color"
+            mode = codes.pop(0)
+            if mode == 5 and codes:
+                style[key] = _xterm_color(codes.pop(0) % 256)
+            elif mode == 2 and len(codes) >= 3:
+                red, green, blue = (codes.pop(0) % 256 for _ in range(3))
+                style[key] = f"#{red:02x}{green:02x}{blue:02x}"
+        elif code == 39:
+            style.pop("color", None)
+        elif code == 49:
+            style.pop("background-color", None)
+        elif 30 <= code <= 37 or 90 <= code <= 97:
+            style["color"] = _ANSI_COLORS[code - 30 if code < 90 else code - 82]
+        elif 40 <= code <= 47 or 100 <= code <= 107:
+            style["background-color"] = _ANSI_COLORS[
+                code - 40 if code < 100 else code - 92
+            ]
+    return style
+
+
+def ansi_to_html(text: str) -> str:
+    """Convert SGR colors and styles into <span> tags with inline CSS.
+
+    Uses the same CSS property names as the `style` attribute passed to
+    `HOOKS.log_with_attributes`. All other escape sequences are stripped.
+    """
+    output = []
+    style: dict[str, str] = {}
+    position = 0
+
+    def add_text(segment: str):
+        segment = html.escape(strip_ansi(segment), quote=False)
+        if not segment:
+            return
+        if not style:
+            output.append(segment)
+            return
+        # One span per line, so that the log can be split on line boundaries
+        css = ";".join(f"{key}:{value}" for key, value in style.items())
+        output.append(
+            "\n".join(
+                f'<span style="{css}">{line}</span>' if line else line
+                for line in segment.split("\n")
+            )
+        )
+
+    for match in _SGR_PATTERN.finditer(text):
+        add_text(text[position : match.start()])
+        position = match.end()
+        if match.group(1) is not None:
+            style = _apply_sgr(style, match.group(1))
+    add_text(text[position:])
+
+    return "".join(output)
+
+
+def format_text_log(events: list[TerminalEvent], styled: bool = False) -> str:
+    text = cast_to_string(events)
+    return ansi_to_html(text) if styled else strip_ansi(text)
+
+
+def split_text(text: str, max_chars: int) -> list[str]:
+    """Split text into parts of at most max_chars, on line boundaries where possible"""
+    parts: list[str] = []
+    current = ""
+    for line in text.splitlines(keepends=True):
+        if len(current) + len(line) > max_chars and current:
+            parts.append(current)
+            current = ""
+        while len(line) > max_chars:
+            parts.append(line[:max_chars])
+            line = line[max_chars:]
+        current += line
+    if current or not parts:
+        parts.append(current)
+    return parts
+
+
+def open_cast(cast_file: StrPath) -> IO[str]:
+    """Open a cast for reading, whether or not the quota manager compressed it"""
+    if str(cast_file).endswith(".gz"):
+        return gzip.open(cast_file, "rt")
+    return open(cast_file, "r")
+
+
+def read_cast(cast_file: StrPath) -> tuple[dict, list[TerminalEvent]]:
+    with open_cast(cast_file) as f:
+        cast_header = json.loads(f.readline())
+        events = [json.loads(line) for line in f if line.strip()]
+    return cast_header, events
+
+
 async def get_time_from_last_entry_of_cast(cast_file: StrPath) -> float:
     async with aiofiles.open(cast_file, "r") as f:
         lines = await f.readlines()
@@ -101,34 +299,100 @@ def adjust_event_times(
     return time_offset_events
 
 
+def events_to_cast_lines(
+    cast_header: dict | None, events: list[TerminalEvent]
+) -> list[str]:
+    header = [json.dumps(cast_header) + "\n"] if cast_header else []
+    return header + [json.dumps(event) + "\n" for event in events]
+
+
+def get_terminal_prefix(events: list[TerminalEvent]) -> str:
+    return events[0][-1].strip().split(" ")[0]
+
+
+def split_at_prompt(
+    events: list[TerminalEvent], terminal_prefix: str, prompt_buffer: int
+) -> tuple[list[TerminalEvent], list[TerminalEvent]] | None:
+    """Split events into a complete chunk and the events to keep for the next one.
+
+    Returns None if there are not yet more than `prompt_buffer` prompts.
+    """
+    if not (
+        events and has_events_with_string(events, terminal_prefix, prompt_buffer + 1)
+    ):
+        return None
+
+    # Find the index of the (N+1)th prompt (we want to send everything up to but not
+    # including this prompt)
+    prompt_indices = [
+        i for i, event in enumerate(events) if terminal_prefix in event[2]
+    ]
+    if len(prompt_indices) < prompt_buffer + 1:
+        return None
+
+    n1_prompt_index = prompt_indices[prompt_buffer]
+    event_before_prompt, event_from_prompt = split_event_at_prompt(
+        events[n1_prompt_index], terminal_prefix
+    )
+    complete_events = events[:n1_prompt_index] + [event_before_prompt]
+    remaining_events = [event_from_prompt] + events[n1_prompt_index + 1 :]
+    return complete_events, remaining_events
+
+
+def split_event_at_prompt(
+    event: TerminalEvent, terminal_prefix: str
+) -> tuple[TerminalEvent, TerminalEvent]:
+    """Split an event's content just before the prompt, so that the current log ends
+    with everything up to the prompt and the next one starts with the prompt
+    """
+    content_before, prefix, content_after = event[2].partition(terminal_prefix)
+    return (
+        cast(TerminalEvent, [event[0], event[1], content_before]),
+        cast(TerminalEvent, [event[0], event[1], prefix + content_after]),
+    )
+
+
 class LogMonitor:
     def __init__(
         self,
         window_id: int,
         log_gifs: bool | None = None,
         log_text: bool | None = None,
-        log_dir: pathlib.Path = _LOG_DIR,
+        log_casts: bool | None = None,
+        styled_text: bool | None = None,
+        log_dir: pathlib.Path = LOG_DIR,
         prompt_buffer: int = 5,
         fps_cap: int = 7,
         speed: float = 3,
+        max_image_bytes: int | None = _DEFAULT_MAX_IMAGE_BYTES,
+        max_text_entry_chars: int = _DEFAULT_MAX_TEXT_ENTRY_CHARS,
+        max_text_chars: int = _DEFAULT_MAX_TEXT_CHARS,
+        max_log_bytes: int | None = quota.DEFAULT_MAX_BYTES,
     ):
         self.window_id = window_id
         self.log_dir = log_dir / str(window_id)
         self.log_dir.mkdir(parents=True, exist_ok=True)
+        self.search_index = search.SearchIndex(log_dir / search.INDEX_FILE.name)
 
-        if log_gifs is None:
-            log_gifs = get_settings()["agent"]["terminal_recording"] in {
-                "GIF_TERMINAL_RECORDING",
-                "FULL_TERMINAL_RECORDING",
-            }
+        if (
+            log_gifs is None
+            or log_text is None
+            or styled_text is None
+            or log_casts is None
+        ):
+            recording = load_settings().terminal_recording
+            if log_gifs is None:
+                log_gifs = recording.logs_gifs
+            if log_text is None:
+                log_text = recording.logs_text
+            if styled_text is None:
+                styled_text = recording.styled_text
+            if log_casts is None:
+                log_casts = recording.logs_casts
         self.log_gifs = log_gifs
-        if log_text is None:
-            log_text = get_settings()["agent"]["terminal_recording"] in {
-                "TEXT_TERMINAL_RECORDING",
-                "FULL_TERMINAL_RECORDING",
-            }
-
         self.log_text = log_text
+        self.styled_text = styled_text
+        self.log_casts = log_casts
 
         self.last_position = 0
         self.last_update = 0
@@ -136,6 +400,12 @@ class LogMonitor:
         self.last_hooks_log_time = 0
         self.fps_cap = fps_cap
         self.speed = speed
+        self.max_image_bytes = max_image_bytes
+        self.max_text_entry_chars = max_text_entry_chars
+        self.max_text_chars = max_text_chars
+        self.max_log_bytes = max_log_bytes
+        self.last_quota_check = 0
+        self.text_chunk_count = 0
         self.cast_header = None
         self.terminal_log_buffer = ""
         self.terminal_prefix = None
@@ -154,6 +424,10 @@ class LogMonitor:
     def gif_file(self) -> pathlib.Path:
         return self.log_dir / "terminal.gif"
 
+    @property
+    def text_log_file(self) -> pathlib.Path:
+        return self.log_dir / "terminal_text.log"
+
     async def read_from_log_file(self) -> list[TerminalEvent]:
         events: list[TerminalEvent] = []
         async with aiofiles.open(self.log_file, "r") as f:
@@ -171,7 +445,7 @@ class LogMonitor:
             self.last_position = await f.tell()
 
         if events and self.terminal_prefix is None:
-            self.terminal_prefix = events[0][-1].strip().split(" ")[0]
+            self.terminal_prefix = get_terminal_prefix(events)
 
         self.new_events.extend(events)
         return events
@@ -179,12 +453,33 @@ class LogMonitor:
     async def run(self):
         try:
             while True:
-                if (await clock.get_status()) == clock.ClockStatus.RUNNING:
-                    await self.check_for_updates()
+                await self.check_quota()
+                # Sleeps while the clock is stopped
+                await clock.wait_until_running()
+                await self.check_for_updates()
                 await asyncio.sleep(0.5)
         except KeyboardInterrupt:
             click.echo("Monitoring stopped.")
 
+    async def check_quota(self):
+        if (
+            self.max_log_bytes is None
+            or time.time() - self.last_quota_check < _QUOTA_CHECK_INTERVAL
+        ):
+            return
+
+        self.last_quota_check = time.time()
+        try:
+            evictions = await asyncio.to_thread(
+                quota.enforce_quota, self.log_dir.parent, self.max_log_bytes
+            )
+        except OSError as error:
+            click.echo(f"Error enforcing terminal log quota: {error!r}")
+            return
+        if evictions:
+            freed_bytes = sum(eviction.bytes_freed for eviction in evictions)
+            click.echo(f"Freed {freed_bytes} bytes of old terminal logs")
+
     async def check_for_updates(self):
         if (
             not self.log_file.exists()
@@ -205,20 +500,57 @@ class LogMonitor:
         if not complete_events:
             return
 
-        formatted_entry = cast_to_string(complete_events)
-        formatted_entry = strip_ansi(formatted_entry)
-        formatted_entry = f"Terminal window: {self.window_id}\n\n{formatted_entry}"
-        await HOOKS.log_with_attributes(_LOG_ATTRIBUTES, formatted_entry)
+        await self.send_formatted_text(
+            format_text_log(complete_events, styled=self.styled_text)
+        )
 
-    async def _send_gif_log(self):
+    async def send_formatted_text(self, formatted_entry: str):
+        chunk_id = f"{self.window_id}-{self.text_chunk_count}"
+        self.text_chunk_count += 1
+        title = f"Terminal window: {self.window_id}"
+        if len(formatted_entry) > self.max_text_chars:
+            formatted_entry = await self._truncate_text_log(formatted_entry)
+            title = f"{title} (chunk {chunk_id}, truncated)"
+
+        # Send parts one at a time so they appear in order
+        parts = split_text(formatted_entry, self.max_text_entry_chars)
+        for idx_part, part in enumerate(parts, start=1):
+            part_title = title
+            if len(parts) > 1:
+                part_title = f"{title} (chunk {chunk_id}, part {idx_part}/{len(parts)})"
+            await HOOKS.log_with_attributes(_LOG_ATTRIBUTES, f"{part_title}\n\n{part}")
+
+    async def _truncate_text_log(self, text: str) -> str:
+        """Save the full text locally and keep only its head and tail"""
+        offset = self.text_log_file.stat().st_size if self.text_log_file.exists() else 0
+        content = text.encode()
+        async with BufferedWriter(self.text_log_file, "a") as f:
+            await f.write(content)
+
+        # Leave room for the omitted marker, scaled down for small limits
+        margin = min(256, self.max_text_entry_chars // 4)
+        keep_chars = min(self.max_text_entry_chars // 2 - margin, len(text) // 2)
+        head = tail = ""
+        if keep_chars > 0:
+            # Cut at line boundaries where possible
+            head = text[:keep_chars].rpartition("\n")[0] or text[:keep_chars]
+            tail = text[-keep_chars:].partition("\n")[2] or text[-keep_chars:]
+        return "\n".join(
+            [
+                head,
+                f"[... {len(text) - len(head) - len(tail)} characters omitted. "
+                f"Full output is in {self.text_log_file} at byte offset {offset}, "
+                f"length {len(content)} ...]",
+                tail,
+            ]
+        )
+
+    async def _render_gif(self, render_settings: RenderSettings) -> pathlib.Path:
         args = [
             str(AGENT_BIN_DIR / "agg"),
             self.trimmed_log_file,
             self.gif_file,
-            f"--fps-cap={self.fps_cap:d}",
-            f"--speed={self.speed:f}",
-            "--idle-time-limit=1",
-            "--last-frame-duration=5",
+            *render_settings.agg_options,
         ]
         process = await asyncio.subprocess.create_subprocess_exec(
             *args,
@@ -233,59 +565,69 @@ class LogMonitor:
                 args,
                 output=stdout.decode(),
             )
-        image_url = await file_to_base64(self.gif_file)
-        await HOOKS.log_image(image_url)
+        return self.gif_file
+
+    async def _send_gif_log(self):
+        # Downscale until the image fits the budget
+        ladder = get_render_settings_ladder(self.fps_cap, self.speed)
+        image_url = ""
+        for render_settings in ladder:
+            gif_file = await self._render_gif(render_settings)
+            image_url = await file_to_base64(gif_file)
+            if self.max_image_bytes is None or len(image_url) <= self.max_image_bytes:
+                await HOOKS.log_image(
+                    image_url,
+                    description=(
+                        f"Terminal window: {self.window_id} "
+                        f"({render_settings.describe()})"
+                    ),
+                )
+                return
+
+        await HOOKS.log_with_attributes(
+            _LOG_ATTRIBUTES,
+            f"Terminal window: {self.window_id}\n\nGIF not logged: {len(image_url)} "
+            f"bytes is over the {self.max_image_bytes} byte budget even with "
+            f"{ladder[-1].describe()}",
+        )
+
+    async def send_cast_log(self, cast_lines: list[str]):
+        await HOOKS.log_with_attributes(
+            _LOG_ATTRIBUTES,
+            f"Terminal window: {self.window_id} (asciicast)\n\n{''.join(cast_lines)}",
+        )
+
+    async def _index_events(self, events: list[TerminalEvent]):
+        start_time = (self.cast_header or {}).get("timestamp", 0)
+        await asyncio.to_thread(
+            self.search_index.add_events,
+            self.window_id,
+            start_time,
+            events,
+            self.terminal_prefix,
+        )
 
     async def _update(self):
         await self.read_from_log_file()
-        if not (
-            self.new_events
-            and self.terminal_prefix is not None
-            and has_events_with_string(
-                self.new_events, self.terminal_prefix, self.prompt_buffer + 1
-            )
-        ):
-            return
-
-        # Find the index of the (N+1)th prompt (we want to send everything up to but not
-        # including this prompt)
-        prompt_indices = [
-            i
-            for i, event in enumerate(self.new_events)
-            if self.terminal_prefix in event[2]
-        ]
-        if len(prompt_indices) < self.prompt_buffer + 1:
+        if self.terminal_prefix is None:
             return
 
-        # Split the content of the event containing the (N+1)th prompt so that we print
-        # all the content up to but not including the prompt at the end of the current log,
-        # and can then print the prompt and any content after in at the start of the next
-        n1_prompt_index = prompt_indices[self.prompt_buffer]
-        n1_prompt_event = self.new_events[n1_prompt_index]
-        n1_prompt_content = n1_prompt_event[2].partition(self.terminal_prefix)
-        event_before_prompt, event_from_prompt = (
-            [n1_prompt_event[0], n1_prompt_event[1], n1_prompt_content[0]],
-            [n1_prompt_event[0], n1_prompt_event[1], "".join(n1_prompt_content[1:])],
+        split_events = split_at_prompt(
+            self.new_events, self.terminal_prefix, self.prompt_buffer
         )
+        if split_events is None:
+            return
 
-        complete_events = self.new_events[:n1_prompt_index] + [
-            cast(TerminalEvent, event_before_prompt)
-        ]
-        remaining_events = [cast(TerminalEvent, event_from_prompt)] + self.new_events[
-            n1_prompt_index + 1 :
-        ]
-
+        complete_events, remaining_events = split_events
         new_cast_time = complete_events[-1][0]
         time_offset_events = adjust_event_times(complete_events, self.last_cast_time)
         self.last_cast_time = new_cast_time
 
         # Write to the trimmed terminal cast file, writing the header and then the time offset events
         self.last_hooks_log_time = time.time()
-        async with aiofiles.open(self.trimmed_log_file, "w") as f:
-            if self.cast_header:
-                await f.write(json.dumps(self.cast_header) + "\n")
-            for event in time_offset_events:
-                await f.write(json.dumps(event) + "\n")
+        trimmed_cast_lines = events_to_cast_lines(self.cast_header, time_offset_events)
+        async with BufferedWriter(self.trimmed_log_file, "w") as f:
+            await f.writelines(trimmed_cast_lines)
 
         # Keep the remaining events for next time
         self.new_events = remaining_events
@@ -296,9 +638,19 @@ class LogMonitor:
         if self.log_gifs:
             await self._send_gif_log()
 
+        if self.log_casts:
+            await self.send_cast_log(trimmed_cast_lines)
+
+        await self._index_events(complete_events)
+
 
 async def start_recording(
-    window_id: int, log_dir: pathlib.Path, fps_cap: int, speed: float
+    window_id: int,
+    log_dir: pathlib.Path,
+    fps_cap: int,
+    speed: float,
+    max_image_bytes: int | None = _DEFAULT_MAX_IMAGE_BYTES,
+    max_log_bytes: int | None = quota.DEFAULT_MAX_BYTES,
 ):
     recording_started = os.getenv("METR_RECORDING_STARTED", None)
     os.environ["METR_RECORDING_STARTED"] = "1"
@@ -309,6 +661,8 @@ async def start_recording(
         log_dir=log_dir,
         fps_cap=fps_cap,
         speed=speed,
+        max_image_bytes=max_image_bytes,
+        max_log_bytes=max_log_bytes,
     )
     monitor_task = asyncio.create_task(monitor.run())
     try:
@@ -336,36 +690,47 @@ async def start_recording(
         await async_cleanup()
 
 
-def _get_window_id():
-    _WINDOW_IDS_LOCK_FILE.parent.mkdir(parents=True, exist_ok=True)
-    with open(_WINDOW_IDS_LOCK_FILE, "w") as f:
-        fcntl.flock(f, fcntl.LOCK_EX)
-
-        if _WINDOW_IDS_FILE.exists():
-            existing_ids = json.loads(_WINDOW_IDS_FILE.read_text())
-        else:
-            existing_ids = []
-        window_id = max(existing_ids or [-1]) + 1
-        existing_ids.append(window_id)
-        _WINDOW_IDS_FILE.write_text(json.dumps(existing_ids))
-
-        fcntl.flock(f, fcntl.LOCK_UN)
-    return window_id
-
-
 @click.command()
 @click.option(
     "--log_dir",
     type=click.Path(file_okay=False, writable=True, path_type=pathlib.Path),
-    default=_LOG_DIR,
+    default=LOG_DIR,
 )
 @click.option("--fps_cap", type=int, default=7)
 @click.option("--speed", type=float, default=3)
-def main(log_dir: pathlib.Path, fps_cap: int, speed: float):
-    window_id = _get_window_id()
+@click.option(
+    "--max_image_bytes",
+    type=int,
+    default=_DEFAULT_MAX_IMAGE_BYTES,
+    help="Largest GIF payload to log, 0 for no limit",
+)
+@click.option(
+    "--max_log_bytes",
+    type=int,
+    default=quota.DEFAULT_MAX_BYTES,
+    help="Disk quota for all terminal logs, 0 for no limit",
+)
+def main(
+    log_dir: pathlib.Path,
+    fps_cap: int,
+    speed: float,
+    max_image_bytes: int,
+    max_log_bytes: int,
+):
+    window_id = registry.register_window(log_dir).window_id
     try:
-        asyncio.run(start_recording(window_id, log_dir, fps_cap, speed))
+        asyncio.run(
+            start_recording(
+                window_id,
+                log_dir,
+                fps_cap,
+                speed,
+                max_image_bytes or None,
+                max_log_bytes or None,
+            )
+        )
     finally:
+        registry.unregister_window(window_id, log_dir)
         click.echo("=======================================================")
         click.echo("ATTENTION: TERMINAL RECORDING HAS STOPPED")
         click.echo("=======================================================")
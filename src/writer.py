@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import asyncio
+import enum
+import os
+import pathlib
+import threading
+from typing import TYPE_CHECKING, Iterable
+
+if TYPE_CHECKING:
+    from _typeshed import StrPath
+
+_IOV_MAX = os.sysconf("SC_IOV_MAX") if hasattr(os, "sysconf") else 1024
+
+
+class FsyncPolicy(str, enum.Enum):
+    NEVER = "NEVER"
+    ON_FLUSH = "ON_FLUSH"
+    ON_CLOSE = "ON_CLOSE"
+
+
+def _writev_all(fd: int, buffers: list[bytes]) -> int:
+    total = 0
+    index = 0
+    # Bytes of buffers[index] already written by an earlier partial write
+    offset = 0
+    while index < len(buffers):
+        written = os.writev(
+            fd,
+            [
+                memoryview(buffers[index])[offset:],
+                *buffers[index + 1 : index + _IOV_MAX],
+            ],
+        )
+        total += written
+        written += offset
+        while index < len(buffers) and written >= len(buffers[index]):
+            written -= len(buffers[index])
+            index += 1
+        offset = written
+    return total
+
+
+class BufferedWriter:
+    """Collects writes in memory and sends each batch to disk with one writev call.
+
+    Data is flushed when the buffer grows past `flush_bytes`, when `flush()` is
+    awaited, and when the writer is closed. Each flush is a single thread-pool hop.
+    """
+
+    def __init__(
+        self,
+        path: StrPath,
+        mode: str = "a",
+        *,
+        flush_bytes: int = 64 * 1024,
+        fsync: FsyncPolicy = FsyncPolicy.NEVER,
+    ):
+        if mode not in {"a", "w"}:
+            raise ValueError(f"Unsupported mode: {mode!r}")
+
+        self.path = pathlib.Path(path)
+        self.mode = mode
+        self.flush_bytes = flush_bytes
+        self.fsync = fsync
+        self.position = 0
+        self._fd: int | None = None
+        self._buffer: list[bytes] = []
+        self._buffered_bytes = 0
+        # Flushes run in worker threads, and concurrent ones must not each open
+        # the file or interleave their writes
+        self._lock = threading.Lock()
+
+    def _open(self) -> int:
+        if self._fd is None:
+            flags = os.O_WRONLY | os.O_CREAT
+            flags |= os.O_TRUNC if self.mode == "w" else os.O_APPEND
+            self._fd = os.open(self.path, flags, 0o644)
+            self.position = os.lseek(self._fd, 0, os.SEEK_END)
+        return self._fd
+
+    def _sync_flush(self, buffer: list[bytes], fsync: bool, close: bool) -> None:
+        with self._lock:
+            fd = self._open()
+            try:
+                if buffer:
+                    self.position += _writev_all(fd, buffer)
+                if fsync:
+                    os.fsync(fd)
+            finally:
+                if close:
+                    os.close(fd)
+                    self._fd = None
+
+    def _take_buffer(self) -> list[bytes]:
+        buffer, self._buffer = self._buffer, []
+        self._buffered_bytes = 0
+        return buffer
+
+    async def write(self, data: str | bytes) -> None:
+        await self.writelines([data])
+
+    async def writelines(self, lines: Iterable[str | bytes]) -> None:
+        for line in lines:
+            encoded = line.encode() if isinstance(line, str) else line
+            self._buffer.append(encoded)
+            self._buffered_bytes += len(encoded)
+
+        if self._buffered_bytes >= self.flush_bytes:
+            await self.flush()
+
+    async def flush(self) -> None:
+        if not self._buffer:
+            return
+
+        await asyncio.to_thread(
+            self._sync_flush,
+            self._take_buffer(),
+            fsync=self.fsync == FsyncPolicy.ON_FLUSH,
+            close=False,
+        )
+
+    async def close(self) -> None:
+        buffer = self._take_buffer()
+        await asyncio.to_thread(
+            self._sync_flush,
+            buffer,
+            fsync=self.fsync == FsyncPolicy.ON_CLOSE
+            or (self.fsync == FsyncPolicy.ON_FLUSH and bool(buffer)),
+            close=True,
+        )
+
+    async def __aenter__(self) -> BufferedWriter:
+        return self
+
+    async def __aexit__(self, *_exc_info) -> None:
+        await self.close()
@@ -0,0 +1,163 @@
+from __future__ import annotations
+
+import array
+import json
+import pathlib
+
+import pytest
+
+TEST_ROOT = pathlib.Path(__file__).parent
+
+
+def test_compute_metrics():
+    import src.analytics
+
+    events = src.analytics.EventArrays(
+        times=array.array("d", [0, 1, 1.5, 2, 62, 63]),
+        output_lengths=array.array("Q", [10, 1, 1, 100, 1, 1]),
+        keystrokes=array.array("B", [0, 1, 1, 0, 1, 1]),
+    )
+
+    metrics = src.analytics.compute_metrics(events, idle_threshold=30)
+
+    assert metrics.duration == 63
+    assert metrics.active_time == 3
+    assert metrics.idle_time == 60
+    assert metrics.events == 6
+    assert metrics.output_bytes == 114
+    assert metrics.output_rate == 38
+    assert metrics.keystrokes == 4
+    assert metrics.keystrokes_per_minute == 80
+    # 0.5 and 1 between keystrokes, 60.5 is idle
+    assert metrics.median_keystroke_interval == 0.75
+
+
+def test_compute_metrics_empty():
+    import src.analytics
+
+    events = src.analytics.EventArrays(
+        array.array("d"), array.array("Q"), array.array("B")
+    )
+
+    metrics = src.analytics.compute_metrics(events)
+
+    assert metrics.duration == metrics.active_time == metrics.output_rate == 0
+    assert metrics.median_keystroke_interval is None
+
+
+def test_analyze_cast_matches_columnar_export(tmp_path: pathlib.Path):
+    import src.analytics
+    import src.export
+
+    window_dir = tmp_path / "terminals" / "0"
+    window_dir.mkdir(parents=True)
+    cast_file = window_dir / "terminal.cast"
+    cast_file.write_text((TEST_ROOT / "wordle.cast").read_text())
+    src.export.write_columns(
+        src.export.iter_timeline(
+            src.export.get_cast_files(tmp_path / "terminals"),
+            tmp_path / "no_clock.jsonl",
+            tmp_path / "no_notes.jsonl",
+        ),
+        tmp_path / "columns",
+    )
+
+    metrics = src.analytics.analyze_cast(cast_file)
+    export_metrics = src.analytics.compute_metrics(
+        src.analytics.load_export_arrays(tmp_path / "columns")[0]
+    )
+
+    assert metrics.events == 397
+    assert metrics.keystrokes > 0
+    assert 0 < metrics.active_time < metrics.duration
+    for field, value in export_metrics._asdict().items():
+        if isinstance(value, float):
+            assert value == pytest.approx(getattr(metrics, field), abs=1e-3)
+        else:
+            assert value == getattr(metrics, field)
+
+
+def test_load_export_arrays_bins_windows(tmp_path: pathlib.Path):
+    import src.analytics
+    import src.export
+
+    for window_id in (0, 4):
+        window_dir = tmp_path / "terminals" / str(window_id)
+        window_dir.mkdir(parents=True)
+        (window_dir / "terminal.cast").write_text(
+            (TEST_ROOT / "wordle.cast").read_text()
+        )
+    src.export.write_columns(
+        src.export.iter_timeline(
+            src.export.get_cast_files(tmp_path / "terminals"),
+            tmp_path / "no_clock.jsonl",
+            tmp_path / "no_notes.jsonl",
+        ),
+        tmp_path / "columns",
+    )
+
+    window_arrays = src.analytics.load_export_arrays(tmp_path / "columns")
+    cast_arrays = src.analytics.load_cast_arrays(TEST_ROOT / "wordle.cast")
+
+    assert list(window_arrays) == [0, 4]
+    for arrays in window_arrays.values():
+        assert arrays.output_lengths == cast_arrays.output_lengths
+        assert arrays.keystrokes == cast_arrays.keystrokes
+
+
+def test_output_bytes_excludes_input(tmp_path: pathlib.Path):
+    import src.analytics
+    import src.export
+
+    cast_file = tmp_path / "terminals" / "0" / "terminal.cast"
+    cast_file.parent.mkdir(parents=True)
+    events = [[0.0, "o", "$ "], [0.5, "i", "l"], [0.6, "i", "s"], [0.7, "o", "ls\r\n"]]
+    cast_file.write_text(
+        "".join(
+            json.dumps(line) + "\n"
+            for line in [{"version": 2, "timestamp": 1000}, *events]
+        )
+    )
+    src.export.write_columns(
+        src.export.iter_timeline(
+            src.export.get_cast_files(tmp_path / "terminals"),
+            tmp_path / "no_clock.jsonl",
+            tmp_path / "no_notes.jsonl",
+        ),
+        tmp_path / "columns",
+    )
+
+    cast_metrics = src.analytics.analyze_cast(cast_file)
+    export_metrics = src.analytics.compute_metrics(
+        src.analytics.load_export_arrays(tmp_path / "columns")[0]
+    )
+
+    assert cast_metrics.output_bytes == export_metrics.output_bytes == 6
+    assert cast_metrics.keystrokes == export_metrics.keystrokes == 2
+
+
+def test_load_cast_arrays_skips_partial_line(tmp_path: pathlib.Path):
+    import src.analytics
+
+    cast_file = tmp_path / "terminal.cast"
+    cast_file.write_text((TEST_ROOT / "wordle.cast").read_text() + '[99.0, "o", "ab')
+
+    arrays = src.analytics.load_cast_arrays(cast_file)
+
+    assert (
+        len(arrays.times) == len(arrays.output_lengths) == len(arrays.keystrokes) == 397
+    )
+    assert (
+        arrays.times == src.analytics.load_cast_arrays(TEST_ROOT / "wordle.cast").times
+    )
+
+
+def test_cli_json(capsys: pytest.CaptureFixture):
+    import src.analytics
+
+    with pytest.raises(SystemExit) as error:
+        src.analytics.main([str(TEST_ROOT / "wordle.cast"), "--json"])
+
+    assert error.value.code == 0
+    output = json.loads(capsys.readouterr().out)
+    assert output[str(TEST_ROOT / "wordle.cast")]["events"] == 397
@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import os
+import pathlib
+import subprocess
+import sys
+import zipfile
+
+import pytest
+
+_SOURCE_DIR = pathlib.Path(__file__).parents[1] / "src"
+
+
+@pytest.fixture(name="bundle_file")
+def fixture_bundle_file(tmp_path: pathlib.Path) -> pathlib.Path:
+    import src.bundle
+
+    return src.bundle.build_bundle(_SOURCE_DIR, tmp_path / "agent_code.pyz")
+
+
+def _run_python(
+    *args: str, python_path: pathlib.Path, cwd: pathlib.Path
+) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, *args],
+        capture_output=True,
+        text=True,
+        cwd=cwd,
+        env=os.environ
+        | {
+            "PYTHONPATH": os.pathsep.join(
+                filter(None, [str(python_path), os.getenv("PYTHONPATH")])
+            ),
+            "PYTHONDONTWRITEBYTECODE": "1",
+        },
+    )
+
+
+def test_build_bundle(bundle_file: pathlib.Path):
+    with zipfile.ZipFile(bundle_file) as bundle:
+        names = set(bundle.namelist())
+
+    assert {"__main__.py", "__main__.pyc", "src/"} <= names
+    for source_file in _SOURCE_DIR.glob("*.py"):
+        assert f"src/{source_file.name}" in names
+        assert f"src/{source_file.stem}.pyc" in names
+    assert not bundle_file.with_name(f"{bundle_file.name}.partial").exists()
+
+
+def test_bundle_imports_bytecode(bundle_file: pathlib.Path, tmp_path: pathlib.Path):
+    # A src package in the current directory must not shadow the bundle's
+    (tmp_path / "src").mkdir()
+    (tmp_path / "src" / "clock.py").write_text("raise ImportError('shadowed')\n")
+
+    result = _run_python(
+        "-P",
+        "-c",
+        "import src.clock; print(src.clock.__file__)",
+        python_path=bundle_file,
+        cwd=tmp_path,
+    )
+
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == f"{bundle_file}/src/clock.pyc"
+
+
+def test_bundle_as_zipapp(bundle_file: pathlib.Path, tmp_path: pathlib.Path):
+    result = _run_python(str(bundle_file), python_path=bundle_file, cwd=tmp_path)
+
+    assert result.returncode == 1
+    assert result.stderr.startswith("Usage: python -m src COMMAND")
+
+
+@pytest.mark.parametrize("local", [True, False])
+def test_bundle_settings_paths(
+    bundle_file: pathlib.Path, tmp_path: pathlib.Path, local: bool
+):
+    if local:
+        (tmp_path / ".local").touch()
+
+    result = _run_python(
+        "-P",
+        "-c",
+        "import src.settings as s; print(s.LOCAL_MODE, s.AGENT_CODE_DIR)",
+        python_path=bundle_file,
+        cwd=tmp_path,
+    )
+
+    assert result.returncode == 0, result.stderr
+    code_dir = tmp_path if local else "/home/agent/.agent_code"
+    assert result.stdout.strip() == f"{local} {code_dir}"
@@ -0,0 +1,400 @@
+from __future__ import annotations
+
+import asyncio
+import concurrent.futures
+import datetime
+import json
+import pathlib
+import threading
+from typing import TYPE_CHECKING
+
+import pytest
+
+if TYPE_CHECKING:
+    from pytest_mock import MockerFixture
+
+
+@pytest.fixture(name="clock_files")
+def fixture_clock_files(tmp_path: pathlib.Path, mocker: MockerFixture):
+    import src.clock
+
+    clock_files = {
+        "EVENTS_LOG": tmp_path / "home" / ".clock" / "log.jsonl",
+        "INTERVALS_FILE": tmp_path / "home" / ".clock" / "intervals.bin",
+        "STATUS_FILE": tmp_path / "code" / ".clock" / "status.txt",
+        "CHECKPOINT_FILE": tmp_path / "code" / ".clock" / "checkpoint.json",
+        "PROMPT_STATE_FILE": tmp_path / "code" / ".clock" / "prompt_state",
+    }
+    for name, path in clock_files.items():
+        mocker.patch.object(src.clock, name, path)
+    return clock_files
+
+
+def _set_now(mocker: MockerFixture, now: datetime.datetime):
+    import src.clock
+
+    mocker.patch.object(src.clock, "get_timestamp", return_value=now.isoformat())
+
+
+@pytest.mark.asyncio
+async def test_time_elapsed_from_checkpoint(
+    clock_files: dict[str, pathlib.Path], mocker: MockerFixture
+):
+    import src.clock
+
+    start = datetime.datetime.now() - datetime.timedelta(seconds=230)
+    for seconds, status in [
+        (0, src.clock.ClockStatus.RUNNING),
+        (10, src.clock.ClockStatus.RUNNING),
+        (60.5, src.clock.ClockStatus.STOPPED),
+        (100, src.clock.ClockStatus.STOPPED),
+        (200, src.clock.ClockStatus.RUNNING),
+    ]:
+        _set_now(mocker, start + datetime.timedelta(seconds=seconds))
+        await src.clock.record_status(status)
+
+    mock_rebuild = mocker.spy(src.clock, "rebuild_checkpoint")
+
+    # 60.5s of the first run plus 30s (and a bit) of the current one
+    assert await src.clock.get_time_elapsed() in {
+        datetime.timedelta(seconds=90),
+        datetime.timedelta(seconds=91),
+    }
+    assert not mock_rebuild.called
+    checkpoint = json.loads(clock_files["CHECKPOINT_FILE"].read_text())
+    assert checkpoint == {
+        "elapsed_microseconds": 60_500_000,
+        "run_start": (start + datetime.timedelta(seconds=200)).isoformat(),
+        "log_size": clock_files["EVENTS_LOG"].stat().st_size,
+        "intervals_size": 0,
+        "compacted_log_size": 0,
+    }
+    assert await src.clock.rebuild_checkpoint() == src.clock.ClockCheckpoint(
+        **checkpoint
+    )
+
+
+@pytest.mark.asyncio
+async def test_checkpoint_rebuilt_when_behind_log(
+    clock_files: dict[str, pathlib.Path], mocker: MockerFixture
+):
+    import src.clock
+
+    start = datetime.datetime(2025, 1, 1, 12)
+    _set_now(mocker, start)
+    await src.clock.record_status(src.clock.ClockStatus.RUNNING)
+
+    # e.g. written by a version without checkpoints
+    with open(clock_files["EVENTS_LOG"], "a") as file:
+        stop_time = (start + datetime.timedelta(seconds=30)).isoformat()
+        file.write(json.dumps({"timestamp": stop_time, "status": "STOPPED"}) + "\n")
+
+    assert await src.clock.get_time_elapsed() == datetime.timedelta(seconds=30)
+    clock_files["CHECKPOINT_FILE"].unlink()
+    assert await src.clock.get_time_elapsed() == datetime.timedelta(seconds=30)
+    # Readers don't write the checkpoint, the next transition does
+    assert not clock_files["CHECKPOINT_FILE"].exists()
+
+    _set_now(mocker, start + datetime.timedelta(seconds=60))
+    await src.clock.record_status(src.clock.ClockStatus.RUNNING)
+    checkpoint = json.loads(clock_files["CHECKPOINT_FILE"].read_text())
+    assert checkpoint["elapsed_microseconds"] == 30_000_000
+    assert not list(clock_files["CHECKPOINT_FILE"].parent.glob("*.partial"))
+
+
+@pytest.mark.asyncio
+async def test_time_elapsed_without_log(clock_files: dict[str, pathlib.Path]):
+    import src.clock
+
+    assert await src.clock.get_time_elapsed() == datetime.timedelta()
+
+
+@pytest.mark.asyncio
+async def test_get_status_reads_file_only_when_changed(
+    clock_files: dict[str, pathlib.Path], mocker: MockerFixture
+):
+    import src.clock
+
+    assert await src.clock.get_status() == src.clock.ClockStatus.RUNNING
+    await src.clock.record_status(src.clock.ClockStatus.STOPPED)
+    spy_open = mocker.spy(src.clock.aiofiles, "open")
+
+    for _ in range(3):
+        assert await src.clock.get_status() == src.clock.ClockStatus.STOPPED
+    assert spy_open.call_count == 1
+
+    await src.clock.record_status(src.clock.ClockStatus.RUNNING)
+    assert await src.clock.get_status() == src.clock.ClockStatus.RUNNING
+
+
+@pytest.mark.asyncio
+async def test_wait_until_running(clock_files: dict[str, pathlib.Path]):
+    import asyncio
+
+    import src.clock
+
+    await src.clock.record_status(src.clock.ClockStatus.STOPPED)
+    wait_task = asyncio.create_task(src.clock.wait_until_running(poll_interval=0.01))
+    await asyncio.sleep(0.05)
+    assert not wait_task.done()
+
+    await src.clock.record_status(src.clock.ClockStatus.RUNNING)
+    await asyncio.wait_for(wait_task, timeout=1)
+
+
+@pytest.mark.asyncio
+async def test_prompt_state(
+    clock_files: dict[str, pathlib.Path], mocker: MockerFixture
+):
+    import src.clock
+
+    prompt_state_file = clock_files["PROMPT_STATE_FILE"]
+    start = datetime.datetime(2025, 1, 1, 12)
+    for seconds, status in [
+        (0, src.clock.ClockStatus.RUNNING),
+        (61.5, src.clock.ClockStatus.STOPPED),
+    ]:
+        _set_now(mocker, start + datetime.timedelta(seconds=seconds))
+        await src.clock.record_status(status)
+    assert prompt_state_file.read_text() == "STOPPED 61 0\n"
+
+    _set_now(mocker, start + datetime.timedelta(seconds=100))
+    await src.clock.record_status(src.clock.ClockStatus.RUNNING)
+    run_start = int((start + datetime.timedelta(seconds=100)).timestamp())
+    assert prompt_state_file.read_text() == f"RUNNING 61 {run_start}\n"
+
+
+async def _record_runs(
+    mocker: MockerFixture, start: datetime.datetime, num_runs: int, running: bool
+):
+    import src.clock
+
+    for idx_run in range(num_runs):
+        for seconds, status in [
+            (0, src.clock.ClockStatus.RUNNING),
+            (10.25, src.clock.ClockStatus.STOPPED),
+        ]:
+            _set_now(mocker, start + datetime.timedelta(seconds=60 * idx_run + seconds))
+            await src.clock.record_status(status)
+    if running:
+        _set_now(mocker, start + datetime.timedelta(seconds=60 * num_runs))
+        await src.clock.record_status(src.clock.ClockStatus.RUNNING)
+
+
+@pytest.mark.asyncio
+async def test_compact_log(clock_files: dict[str, pathlib.Path], mocker: MockerFixture):
+    import src.clock
+
+    start = datetime.datetime(2025, 1, 1, 12)
+    await _record_runs(mocker, start, num_runs=5, running=True)
+    log = clock_files["EVENTS_LOG"].read_bytes()
+    full_log = list(src.clock.iter_log())
+    checkpoint = await src.clock.get_checkpoint()
+
+    compacted = await src.clock.compact_log()
+
+    assert (
+        compacted.elapsed_microseconds == checkpoint.elapsed_microseconds == 51_250_000
+    )
+    assert compacted.run_start == checkpoint.run_start
+    assert await src.clock.rebuild_checkpoint() == compacted
+    assert await src.clock.get_checkpoint() == compacted
+    assert clock_files["INTERVALS_FILE"].stat().st_size == 5 * 24
+    assert clock_files["EVENTS_LOG"].read_bytes() == log
+    assert list(src.clock.iter_log()) == full_log
+
+    intervals = src.clock.read_intervals()
+    assert src.clock.get_total_microseconds(intervals) == 51_250_000
+    assert list(intervals[1::3]) == [
+        (start - datetime.datetime(1970, 1, 1)) // datetime.timedelta(microseconds=1)
+        + (60 * idx_run + 10.25) * 1_000_000
+        for idx_run in range(5)
+    ]
+    # Each run's offset is just after the entry that stopped it
+    assert [log[:log_offset].splitlines()[-1] for log_offset in intervals[2::3]] == [
+        json.dumps(entry).encode() for entry in full_log[1:-1:2]
+    ]
+    assert compacted.compacted_log_size == intervals[-1] < len(log)
+
+    # Compacting again only adds the runs since
+    await _record_runs(mocker, start + datetime.timedelta(hours=1), 2, running=False)
+    compacted = await src.clock.compact_log()
+    assert (
+        compacted.elapsed_microseconds
+        == 51_250_000 + 3600_000_000 - 300_000_000 + 20_500_000
+    )
+    assert compacted.run_start is None
+    assert compacted.compacted_log_size == clock_files["EVENTS_LOG"].stat().st_size
+    assert len(list(src.clock.iter_log())) == len(full_log) + 4
+    # The run left open above ended with the first of the new runs
+    assert len(src.clock.read_intervals()) == 3 * 7
+
+
+@pytest.mark.asyncio
+async def test_compact_log_interrupted(
+    clock_files: dict[str, pathlib.Path], mocker: MockerFixture
+):
+    import src.clock
+
+    await _record_runs(mocker, datetime.datetime(2025, 1, 1, 12), 3, running=False)
+    log_size = clock_files["EVENTS_LOG"].stat().st_size
+    await src.clock.compact_log()
+
+    # Killed half way through appending the next record
+    with open(clock_files["INTERVALS_FILE"], "ab") as file:
+        file.write(b"\0" * 5)
+
+    expected = src.clock.ClockCheckpoint(
+        elapsed_microseconds=30_750_000,
+        log_size=log_size,
+        intervals_size=3 * 24,
+        compacted_log_size=log_size,
+    )
+    assert await src.clock.rebuild_checkpoint() == expected
+    assert await src.clock.get_checkpoint() == expected
+    assert len(list(src.clock.iter_log())) == 6
+
+    # The next run is appended after the last whole record
+    await _record_runs(mocker, datetime.datetime(2025, 1, 1, 13), 1, running=False)
+    compacted = await src.clock.compact_log()
+    assert clock_files["INTERVALS_FILE"].stat().st_size == 4 * 24
+    assert compacted.elapsed_microseconds == 41_000_000
+
+
+@pytest.mark.asyncio
+async def test_record_status_compacts_long_log(
+    clock_files: dict[str, pathlib.Path], mocker: MockerFixture
+):
+    import src.clock
+
+    mocker.patch.object(src.clock, "_COMPACT_LOG_BYTES", 500)
+    spy_compact_log = mocker.spy(src.clock, "compact_log")
+
+    await _record_runs(mocker, datetime.datetime(2025, 1, 1, 12), 10, running=False)
+
+    assert spy_compact_log.called
+    checkpoint = await src.clock.get_checkpoint()
+    assert checkpoint.elapsed_microseconds == 102_500_000
+    assert checkpoint.log_size - checkpoint.compacted_log_size <= 500
+    assert src.clock.read_intervals()
+    assert len(list(src.clock.iter_log())) == 20
+
+
+@pytest.mark.asyncio
+async def test_iter_log_keeps_every_entry(
+    clock_files: dict[str, pathlib.Path], mocker: MockerFixture
+):
+    import src.clock
+
+    mocker.patch.object(src.clock, "_COMPACT_LOG_BYTES", 500)
+    start = datetime.datetime(2025, 1, 1, 12)
+    entries = []
+    expected = src.clock.ClockCheckpoint()
+    # Redundant and forced transitions, and the clock sometimes going backwards
+    for idx_entry in range(1000):
+        seconds = 5 * idx_entry - (3600 if idx_entry % 97 == 0 else 0)
+        timestamp = (start + datetime.timedelta(seconds=seconds)).isoformat()
+        status = src.clock.ClockStatus.STOPPED
+        if idx_entry % 5 in {0, 1}:
+            status = src.clock.ClockStatus.RUNNING
+        _set_now(mocker, datetime.datetime.fromisoformat(timestamp))
+        await src.clock.record_status(status)
+        entries.append({"timestamp": timestamp, "status": status.value})
+        expected = expected.apply(timestamp, status)
+
+    assert src.clock.read_intervals()
+    assert list(src.clock.iter_log()) == entries
+    checkpoint = await src.clock.rebuild_checkpoint()
+    assert checkpoint.elapsed_microseconds == expected.elapsed_microseconds
+    assert checkpoint.run_start == expected.run_start is None
+
+
+_HOOK_CALLS_FILE = "hook_calls.txt"
+
+
+async def _record_hook_call(*args, **kwargs):
+    # Appended by many threads at once, one short line per write
+    with open(_HOOK_CALLS_FILE, "a") as file:
+        file.write(f"{args[-1] if args else 'hook'}\n")
+
+
+def _toggle_clock(num_toggles: int) -> int:
+    import src.clock
+
+    async def toggle() -> int:
+        changes = 0
+        for idx_toggle in range(num_toggles):
+            if idx_toggle % 2:
+                changes += await src.clock.unpause()
+            else:
+                changes += await src.clock.pause()
+        return changes
+
+    return asyncio.run(toggle())
+
+
+def _read_clock(stop: threading.Event) -> int:
+    import src.clock
+
+    async def read() -> int:
+        num_reads = 0
+        while not (stop.is_set() and num_reads):
+            await src.clock.get_time_elapsed()
+            await src.clock.get_checkpoint()
+            num_reads += 1
+        return num_reads
+
+    return asyncio.run(read())
+
+
+def _get_last_status(events_log: pathlib.Path) -> str:
+    return json.loads(events_log.read_text().splitlines()[-1])["status"]
+
+
+def test_concurrent_transitions(
+    clock_files: dict[str, pathlib.Path],
+    mocker: MockerFixture,
+    monkeypatch: pytest.MonkeyPatch,
+    tmp_path: pathlib.Path,
+):
+    import src.clock
+
+    monkeypatch.chdir(tmp_path)
+    mocker.patch.object(src.clock, "LOCK_FILE", tmp_path / "lock")
+    for hook in ("pause", "unpause", "log_with_attributes"):
+        mocker.patch.object(src.clock.HOOKS, hook, _record_hook_call)
+
+    # Each thread has its own event loop and opens the lock file itself, like
+    # clocks running in separate terminals, while others read the time elapsed
+    stop_reading = threading.Event()
+    with concurrent.futures.ThreadPoolExecutor(12) as pool:
+        readers = [pool.submit(_read_clock, stop_reading) for _ in range(4)]
+        toggles = [pool.submit(_toggle_clock, 10) for _ in range(16)]
+        try:
+            changes = sum(toggle.result() for toggle in toggles)
+        finally:
+            stop_reading.set()
+        assert all(reader.result() for reader in readers)
+    assert clock_files["STATUS_FILE"].read_text() == _get_last_status(
+        clock_files["EVENTS_LOG"]
+    )
+
+    async def pause_concurrently() -> int:
+        return sum(await asyncio.gather(*(src.clock.pause() for _ in range(10))))
+
+    changes += asyncio.run(pause_concurrently())
+
+    statuses = [
+        json.loads(line)["status"]
+        for line in clock_files["EVENTS_LOG"].read_text().splitlines()
+    ]
+    assert len(statuses) == changes
+    # Every transition changed the status
+    assert statuses[0] == "STOPPED"
+    assert all(status != previous for previous, status in zip(statuses, statuses[1:]))
+    # One pause or unpause hook call and one log entry per transition
+    hook_calls = (tmp_path / _HOOK_CALLS_FILE).read_text().splitlines()
+    assert len(hook_calls) == 2 * changes
+    assert statuses[-1] == "STOPPED"
+    assert clock_files["STATUS_FILE"].read_text() == "STOPPED"
+    assert not list(clock_files["STATUS_FILE"].parent.glob("*.partial"))
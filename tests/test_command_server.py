@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import os
+import pathlib
+import subprocess
+import sys
+import textwrap
+import threading
+
+import pytest
+
+_SCRIPT = """
+import os
+import sys
+
+print(sys.argv[1:], os.getcwd(), os.environ.get("TEST_VAR"), os.getpid())
+print(f"Got {input()}")
+sys.exit(3)
+"""
+
+
+@pytest.fixture(name="scripts_dir")
+def fixture_scripts_dir(tmp_path: pathlib.Path) -> pathlib.Path:
+    scripts_dir = tmp_path / "scripts"
+    scripts_dir.mkdir()
+    (scripts_dir / "echo.py").write_text(textwrap.dedent(_SCRIPT))
+    (scripts_dir / "other.py").write_text(textwrap.dedent(_SCRIPT))
+    return scripts_dir
+
+
+@pytest.fixture(name="socket_file")
+def fixture_socket_file(tmp_path: pathlib.Path, scripts_dir: pathlib.Path):
+    import src.command_server
+
+    socket_file = tmp_path / "command.sock"
+    with src.command_server.CommandServer(
+        socket_file, {"echo.py"}, scripts_dir
+    ) as server:
+        thread = threading.Thread(target=server.serve_forever)
+        thread.start()
+        yield socket_file
+        server.shutdown()
+        thread.join()
+    assert not socket_file.exists()
+
+
+def _run_client(
+    socket_file: pathlib.Path, script_file: pathlib.Path, cwd: pathlib.Path
+) -> tuple[subprocess.Popen, str, str]:
+    import src.command_client
+
+    client = subprocess.Popen(
+        [
+            sys.executable,
+            "-S",
+            src.command_client.__file__,
+            str(socket_file),
+            str(script_file),
+            "a",
+            "b c",
+        ],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        cwd=cwd,
+        env=os.environ | {"TEST_VAR": "test_value"},
+    )
+    stdout, stderr = client.communicate("hello\n", timeout=30)
+    return client, stdout, stderr
+
+
+def test_command_server_runs_script(
+    socket_file: pathlib.Path, scripts_dir: pathlib.Path, tmp_path: pathlib.Path
+):
+    client, stdout, stderr = _run_client(socket_file, scripts_dir / "echo.py", tmp_path)
+
+    assert client.returncode == 3, stderr
+    args, pid = stdout.splitlines()[0].rsplit(" ", 1)
+    assert args == f"['a', 'b c'] {tmp_path} test_value"
+    assert stdout.splitlines()[1] == "Got hello"
+    # Run in a fork of the server rather than by the client
+    assert int(pid) not in {client.pid, os.getpid()}
+
+
+@pytest.mark.parametrize("served", [True, False])
+def test_command_client_falls_back_to_running_script(
+    socket_file: pathlib.Path,
+    scripts_dir: pathlib.Path,
+    tmp_path: pathlib.Path,
+    served: bool,
+):
+    if not served:
+        socket_file = tmp_path / "missing.sock"
+
+    # other.py isn't served, so the client runs it itself
+    client, stdout, stderr = _run_client(
+        socket_file, scripts_dir / "other.py", tmp_path
+    )
+
+    assert client.returncode == 3, stderr
+    assert stdout.splitlines() == [
+        f"['a', 'b c'] {tmp_path} test_value {client.pid}",
+        "Got hello",
+    ]
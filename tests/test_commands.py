@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import os
+import pathlib
+import subprocess
+import sys
+from typing import TYPE_CHECKING
+
+import pytest
+
+if TYPE_CHECKING:
+    from pytest_mock import MockerFixture
+
+_ROOT_DIR = pathlib.Path(__file__).parents[1]
+
+
+def _get_python_env() -> dict[str, str]:
+    return os.environ | {
+        "PYTHONPATH": os.pathsep.join(
+            filter(None, [str(_ROOT_DIR), os.getenv("PYTHONPATH")])
+        )
+    }
+
+
+def test_command_modules_import_hooks_lazily():
+    from src.commands import HelperCommand
+
+    modules = sorted({command.module for command in HelperCommand})
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            f"import sys, {', '.join(modules)}; print('pyhooks' in sys.modules)",
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+        env=_get_python_env(),
+    )
+
+    assert result.stdout.strip() == "False"
+
+
+def test_hooks_loaded_on_first_use(mocker: MockerFixture):
+    import src.settings
+
+    hooks = src.settings._LazyHooks()
+    assert hooks._hooks is None
+
+    mock_pause = mocker.patch.object(hooks, "pause")
+    assert hooks._hooks is not None
+    assert hooks.pause is mock_pause
+    mocker.stopall()
+    assert hooks.pause is not mock_pause
+
+
+@pytest.mark.parametrize(
+    ("name", "args", "expected_module", "expected_args"),
+    [
+        ("clock", [], "src.clock", []),
+        ("score_log", [], "src.score", ["log"]),
+        ("skip", ["--flag"], "src.submit", ["BASELINE_SKIP", "--flag"]),
+    ],
+)
+def test_run(
+    mocker: MockerFixture,
+    monkeypatch: pytest.MonkeyPatch,
+    name: str,
+    args: list[str],
+    expected_module: str,
+    expected_args: list[str],
+):
+    import src.commands
+
+    monkeypatch.setattr(sys, "argv", ["src", name, *args])
+    mock_run_module = mocker.patch.object(src.commands.runpy, "run_module")
+
+    src.commands.run(name, args)
+
+    mock_run_module.assert_called_once_with(
+        expected_module, run_name="__main__", alter_sys=True
+    )
+    assert sys.argv[1:] == expected_args
+
+
+def test_dispatcher_usage():
+    result = subprocess.run(
+        [sys.executable, "-m", "src", "unknown"],
+        capture_output=True,
+        text=True,
+        env=_get_python_env(),
+    )
+
+    assert result.returncode == 1
+    assert "Commands: clock, note" in result.stderr
+
+
+def test_alias_def():
+    from src.commands import HelperCommand
+
+    assert HelperCommand.clock.served
+    assert "command_client.py" in HelperCommand.clock.alias_def()
+    assert not HelperCommand.record.served
+    assert HelperCommand.record.alias_def().endswith(" -m src record'")
@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+import datetime
+import json
+import pathlib
+
+import pytest
+
+
+def write_cast(cast_file: pathlib.Path, start_time: int, events: list) -> None:
+    cast_file.parent.mkdir(parents=True, exist_ok=True)
+    with open(cast_file, "w") as f:
+        f.write(json.dumps({"version": 2, "timestamp": start_time}) + "\n")
+        for event in events:
+            f.write(json.dumps(event) + "\n")
+
+
+def write_jsonl(log_file: pathlib.Path, entries: list[dict]) -> None:
+    log_file.write_text("".join(json.dumps(entry) + "\n" for entry in entries))
+
+
+def get_timestamp(time: float) -> str:
+    return datetime.datetime.fromtimestamp(time).isoformat()
+
+
+@pytest.fixture(name="session")
+def fixture_session(tmp_path: pathlib.Path) -> dict[str, pathlib.Path]:
+    log_dir = tmp_path / ".terminals"
+    write_cast(
+        log_dir / "0" / "terminal.cast",
+        1000,
+        [[0.5, "o", "a"], [10.0, "o", "c"], [30.0, "o", "f"]],
+    )
+    write_cast(
+        log_dir / "1" / "terminal.cast",
+        1005,
+        [[0.0, "o", "b"], [20.0, "o", "e"]],
+    )
+    (log_dir / "search.sqlite").touch()
+
+    clock_log = tmp_path / "clock.jsonl"
+    write_jsonl(
+        clock_log,
+        [
+            {"timestamp": get_timestamp(999), "status": "RUNNING"},
+            {"timestamp": get_timestamp(1040), "status": "STOPPED"},
+        ],
+    )
+    notes_log = tmp_path / "notes.jsonl"
+    write_jsonl(notes_log, [{"timestamp": get_timestamp(1015), "content": "d"}])
+    return {"log_dir": log_dir, "clock_log": clock_log, "notes_log": notes_log}
+
+
+def test_iter_timeline(session: dict[str, pathlib.Path]):
+    import src.export
+
+    cast_files = src.export.get_cast_files(session["log_dir"])
+    assert [window_id for window_id, _ in cast_files] == [0, 1]
+
+    timeline = list(
+        src.export.iter_timeline(cast_files, session["clock_log"], session["notes_log"])
+    )
+
+    assert [entry.time for entry in timeline] == [
+        999,
+        1000.5,
+        1005,
+        1010,
+        1015,
+        1025,
+        1030,
+        1040,
+    ]
+    assert [
+        (entry.source, entry.window_id, entry.data.get("data")) for entry in timeline
+    ] == [
+        ("clock", None, None),
+        ("terminal", 0, "a"),
+        ("terminal", 1, "b"),
+        ("terminal", 0, "c"),
+        ("note", None, None),
+        ("terminal", 1, "e"),
+        ("terminal", 0, "f"),
+        ("clock", None, None),
+    ]
+    assert timeline[4].data == {"content": "d"}
+
+
+def test_iter_timeline_missing_logs(session: dict[str, pathlib.Path]):
+    import src.export
+
+    timeline = list(
+        src.export.iter_timeline(
+            src.export.get_cast_files(session["log_dir"]),
+            session["clock_log"].with_name("missing.jsonl"),
+            session["notes_log"].with_name("missing.jsonl"),
+        )
+    )
+
+    assert [entry.source for entry in timeline] == ["terminal"] * 5
+
+
+def test_write_columns(session: dict[str, pathlib.Path], tmp_path: pathlib.Path):
+    import src.export
+
+    output_dir = tmp_path / "columns"
+    timeline = src.export.iter_timeline(
+        src.export.get_cast_files(session["log_dir"]),
+        session["clock_log"],
+        session["notes_log"],
+    )
+    schema = src.export.write_columns(timeline, output_dir)
+
+    assert schema["columns"]["events.time"]["dtype"] == "<f8"
+    columns = src.export.load_columns(output_dir)
+    assert list(columns["events.time"]) == [1000.5, 1005, 1010, 1025, 1030]
+    assert list(columns["events.window"]) == [0, 1, 0, 1, 0]
+    assert list(columns["events.kind"]) == [0] * 5
+    payloads = [
+        src.export.load_payload(output_dir, "events", offset, length)
+        for offset, length in zip(columns["events.offset"], columns["events.length"])
+    ]
+    assert payloads == ["a", "b", "c", "e", "f"]
+
+    assert list(columns["notes.time"]) == [1015]
+    assert (
+        src.export.load_payload(
+            output_dir, "notes", columns["notes.offset"][0], columns["notes.length"][0]
+        )
+        == "d"
+    )
+
+    assert list(columns["clock.start"]) == [999]
+    assert list(columns["clock.end"]) == [1040]
+
+
+def test_write_columns_skips_unknown_event_types(tmp_path: pathlib.Path):
+    import src.export
+
+    log_dir = tmp_path / ".terminals"
+    write_cast(
+        log_dir / "0" / "terminal.cast",
+        1000,
+        [[0.5, "o", "a"], [1.0, "x", "unknown"], [2.0, "i", "b"], [3.0, "m", "c"]],
+    )
+    output_dir = tmp_path / "columns"
+    src.export.write_columns(
+        src.export.iter_timeline(src.export.get_cast_files(log_dir)), output_dir
+    )
+
+    columns = src.export.load_columns(output_dir)
+    assert list(columns["events.time"]) == [1000.5, 1002, 1003]
+    assert list(columns["events.kind"]) == [0, 1, 3]
+
+
+def test_iter_clock_intervals_running():
+    import math
+
+    import src.export
+
+    entries = [
+        src.export.TimelineEntry(time, "clock", None, {"status": status})
+        for time, status in [
+            (1, "RUNNING"),
+            (2, "STOPPED"),
+            (3, "STOPPED"),
+            (4, "RUNNING"),
+            (5, "RUNNING"),
+        ]
+    ]
+    intervals = list(src.export.iter_clock_intervals(iter(entries)))
+
+    assert intervals[0] == (1, 2)
+    assert intervals[1][0] == 4 and math.isnan(intervals[1][1])
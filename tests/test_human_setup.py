@@ -1,7 +1,10 @@
 from __future__ import annotations
 
 import json
+import os
 import pathlib
+import shutil
+import subprocess
 import textwrap
 from typing import TYPE_CHECKING
 from unittest.mock import AsyncMock
@@ -26,6 +29,7 @@ def fixture_env_setup(mocker: MockerFixture, tmp_path: pathlib.Path, mock_hooks)
 
     welcome_file = tmp_path / "some" / "path" / "welcome.txt"
     mocker.patch("src.human_setup.WELCOME_MESSAGE_FILE", welcome_file)
+    mocker.patch("src.human_setup.SETUP_COMPLETE_FILE", tmp_path / ".setup_complete")
 
     mocker.patch("src.clock.get_status", return_value=ClockStatus.RUNNING)
 
@@ -165,10 +169,51 @@ async def test_get_welcome_message():
 def test_get_conditional_run_command():
     from src.human_setup import HelperCommand, get_conditional_run_command
 
-    expected = "[ -z ${SETUP_DONE} ] && $(type -t setup > /dev/null) && setup && export SETUP_DONE=1"
+    expected = '[ -z "${SETUP_DONE}" ] && alias setup >/dev/null 2>&1 && setup && export SETUP_DONE=1'
     assert get_conditional_run_command("SETUP_DONE", HelperCommand.setup) == expected
 
 
+@pytest.mark.skipif(shutil.which("bash") is None, reason="bash not installed")
+@pytest.mark.parametrize(
+    ("env", "marker_exists", "alias_defined", "expected_output"),
+    [
+        ({}, False, True, "ran\n1\n"),
+        ({}, True, True, "\n"),
+        ({}, False, False, "\n"),
+        ({"SETUP_DONE": "1"}, False, True, "1\n"),
+    ],
+)
+def test_conditional_run_command_in_shell(
+    tmp_path: pathlib.Path,
+    env: dict[str, str],
+    marker_exists: bool,
+    alias_defined: bool,
+    expected_output: str,
+):
+    from src.human_setup import HelperCommand, get_conditional_run_command
+
+    marker_file = tmp_path / ".setup_complete"
+    if marker_exists:
+        marker_file.touch()
+    script = "\n".join(
+        [
+            "shopt -s expand_aliases",
+            "alias setup='echo ran'" if alias_defined else "",
+            get_conditional_run_command("SETUP_DONE", HelperCommand.setup, marker_file),
+            'echo "$SETUP_DONE"',
+        ]
+    )
+
+    result = subprocess.run(
+        ["bash", "--norc", "-c", script],
+        capture_output=True,
+        text=True,
+        env={"PATH": os.environ["PATH"], **env},
+    )
+
+    assert result.stdout == expected_output
+
+
 @pytest.mark.asyncio
 async def test_create_profile_file(tmp_path: pathlib.Path):
     from src.human_setup import HelperCommand, create_profile_file
@@ -199,6 +244,23 @@ async def test_create_profile_file(tmp_path: pathlib.Path):
     assert "METR_RECORDING_STARTED" in content
 
 
+@pytest.mark.asyncio
+async def test_create_profile_file_code_path(tmp_path: pathlib.Path):
+    from src.human_setup import create_profile_file
+
+    profile_file = tmp_path / "profile.sh"
+    bundle_file = tmp_path / "agent_code.pyz"
+
+    await create_profile_file(env={}, profile_file=profile_file, code_path=bundle_file)
+
+    content = profile_file.read_text()
+    assert f"alias clock='PYTHONPATH={bundle_file} " in content
+    assert f"alias record='PYTHONPATH={bundle_file} " in content
+    assert content.count(f"PYTHONPATH={bundle_file} ") == sum(
+        line.startswith("alias ") for line in content.splitlines()
+    )
+
+
 @pytest.mark.asyncio
 async def test_create_profile_file_no_scoring_no_recording(tmp_path: pathlib.Path):
     from src.human_setup import create_profile_file
@@ -227,6 +289,60 @@ async def test_create_profile_file_no_scoring_no_recording(tmp_path: pathlib.Pat
     assert "alias submit=" in content
 
 
+@pytest.mark.asyncio
+@pytest.mark.parametrize("with_clock_prompt", [True, False])
+async def test_create_profile_file_clock_prompt(
+    tmp_path: pathlib.Path, with_clock_prompt: bool
+):
+    from src.human_setup import create_profile_file
+
+    profile_file = tmp_path / "profile.sh"
+
+    await create_profile_file(
+        with_clock_prompt=with_clock_prompt, env={}, profile_file=profile_file
+    )
+
+    assert ("__metr_clock_prompt" in profile_file.read_text()) == with_clock_prompt
+
+
+@pytest.mark.skipif(shutil.which("bash") is None, reason="bash not installed")
+@pytest.mark.parametrize(
+    "state, expected",
+    [
+        ("RUNNING 3600 {now_minus_65}", {"[1:01:05] ", "[1:01:06] "}),
+        ("STOPPED 59 0", {"[0:00:59 paused] "}),
+        (None, {""}),
+    ],
+)
+def test_clock_prompt_segment(
+    tmp_path: pathlib.Path, state: str | None, expected: set[str]
+):
+    import time
+
+    from src.human_setup import get_clock_prompt_segment
+
+    state_file = tmp_path / "prompt_state"
+    if state is not None:
+        state_file.write_text(state.format(now_minus_65=int(time.time()) - 65) + "\n")
+    segment_file = tmp_path / "segment.sh"
+    segment_file.write_text(get_clock_prompt_segment(state_file))
+
+    result = subprocess.run(
+        [
+            "bash",
+            "-c",
+            f'PS1="$ "; . {segment_file}; . {segment_file}; '
+            'eval "$PROMPT_COMMAND"; printf %s "$__metr_clock_segment"',
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    assert result.stdout in expected
+    assert result.stderr == ""
+
+
 @pytest.mark.asyncio
 async def test_ensure_sourced_new_entry(tmp_path: pathlib.Path):
     from src.human_setup import ensure_sourced
@@ -256,6 +372,63 @@ async def test_ensure_sourced_already_exists(tmp_path: pathlib.Path):
     assert shell_config.read_text() == f"some content\n. {profile_file}\nmore content"
 
 
+@pytest.mark.parametrize(
+    ("line", "expected"),
+    [
+        ("[[ $- == *i* ]] && . {profile_file}", True),
+        ("source '{profile_file}'", True),
+        ('  . "{profile_file}"  ', True),
+        ("# . {profile_file}", False),
+        (". {profile_file}.bak", False),
+        ("echo {profile_file}", False),
+    ],
+)
+def test_is_sourced_by(line: str, expected: bool):
+    from src.human_setup import _is_sourced_by
+
+    profile_file = pathlib.Path("/home/agent/.agent_code/profile.sh")
+    shell_config = f"export FOO=1\n{line.format(profile_file=profile_file)}\n"
+
+    assert _is_sourced_by(shell_config, profile_file) == expected
+
+
+@pytest.mark.parametrize(
+    ("sourced", "modify_profile", "expected_probe"),
+    [
+        (True, False, False),
+        (True, True, True),
+        (False, False, True),
+    ],
+)
+@pytest.mark.asyncio
+async def test_is_alias_defined_static_check(
+    mocker: MockerFixture,
+    tmp_path: pathlib.Path,
+    sourced: bool,
+    modify_profile: bool,
+    expected_probe: bool,
+):
+    from src.human_setup import create_profile_file, ensure_sourced, is_alias_defined
+
+    profile_file = await create_profile_file(
+        env={}, profile_file=tmp_path / "profile.sh"
+    )
+    shell_config = tmp_path / ".bashrc"
+    shell_config.touch()
+    if sourced:
+        await ensure_sourced(shell_config, profile_file)
+    if modify_profile:
+        with profile_file.open("a") as f:
+            f.write("unalias clock\n")
+    mock_process = mocker.Mock(returncode=0, wait=AsyncMock())
+    mock_exec = mocker.patch(
+        "asyncio.create_subprocess_exec", AsyncMock(return_value=mock_process)
+    )
+
+    assert await is_alias_defined(pathlib.Path("/bin/bash"), shell_config, profile_file)
+    assert mock_exec.called == expected_probe
+
+
 @pytest.mark.parametrize(
     "clock_status, expected_echo_count",
     [
@@ -425,7 +598,9 @@ async def test_main_needs_source(mocker: MockerFixture, env_setup):
 
 
 @pytest.mark.asyncio
-async def test_main_clock_not_running(mocker: MockerFixture, env_setup):
+async def test_main_clock_not_running(
+    mocker: MockerFixture, tmp_path: pathlib.Path, env_setup
+):
     from src.human_setup import main
 
     mocker.patch.dict("os.environ", {})
@@ -439,10 +614,11 @@ async def test_main_clock_not_running(mocker: MockerFixture, env_setup):
     mocker.patch("src.human_setup.check_started", AsyncMock(return_value=False))
 
     assert await main() == 1
+    assert not (tmp_path / ".setup_complete").exists()
 
 
 @pytest.mark.asyncio
-async def test_main_success(mocker: MockerFixture, env_setup):
+async def test_main_success(mocker: MockerFixture, tmp_path: pathlib.Path, env_setup):
     from src.human_setup import clock, main
 
     mocker.patch.dict("os.environ", {})
@@ -454,3 +630,4 @@ async def test_main_success(mocker: MockerFixture, env_setup):
     mocker.patch("src.clock.get_status", return_value=clock.ClockStatus.RUNNING)
 
     assert await main() == 0
+    assert (tmp_path / ".setup_complete").exists()
@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import gzip
+import os
+import pathlib
+from typing import TYPE_CHECKING
+
+import pytest
+
+if TYPE_CHECKING:
+    from pytest_mock import MockerFixture
+
+TEST_ROOT = pathlib.Path(__file__).parent
+
+
+@pytest.fixture(name="log_dir")
+def fixture_log_dir(tmp_path: pathlib.Path) -> pathlib.Path:
+    log_dir = tmp_path / ".terminals"
+    cast = (TEST_ROOT / "wordle.cast").read_text()
+    for window_id in range(3):
+        window_dir = log_dir / str(window_id)
+        window_dir.mkdir(parents=True)
+        (window_dir / "terminal.cast").write_text(cast)
+        (window_dir / "trimmed_terminal.cast").write_text(cast[:5000])
+        (window_dir / "terminal.gif").write_bytes(b"GIF89a" * 1000)
+        (window_dir / "terminal_text.log").write_text("$ ls\n" * 1000)
+        for path in window_dir.iterdir():
+            os.utime(path, (window_id, window_id))
+
+    (log_dir / "search.sqlite").write_bytes(b"\0" * 3000)
+    (log_dir / "search.sqlite-wal").write_bytes(b"\0" * 1000)
+    return log_dir
+
+
+def test_get_usage(log_dir: pathlib.Path, mocker: MockerFixture):
+    import src.quota
+
+    mocker.patch.object(src.quota.registry, "get_live_window_ids", return_value={1})
+
+    usage = src.quota.get_usage(log_dir)
+
+    assert [window.window_id for window in usage] == [0, 1, 2]
+    assert [window.live for window in usage] == [False, True, False]
+    window_bytes = sum(path.stat().st_size for path in (log_dir / "0").iterdir())
+    assert usage[0].bytes == window_bytes
+    assert src.quota.get_total_bytes(log_dir, usage) == 3 * window_bytes + 4000
+
+
+def test_enforce_quota_evicts_regenerable_files_first(
+    log_dir: pathlib.Path, mocker: MockerFixture
+):
+    import src.quota
+
+    mocker.patch.object(src.quota.registry, "get_live_window_ids", return_value={0})
+    usage = src.quota.get_usage(log_dir)
+    total_bytes = src.quota.get_total_bytes(log_dir, usage)
+
+    evictions = src.quota.enforce_quota(log_dir, total_bytes - 1000, min_free_bytes=0)
+
+    assert [(eviction.path, eviction.action) for eviction in evictions] == [
+        (log_dir / "1" / "trimmed_terminal.cast", "delete"),
+    ]
+    assert (log_dir / "1" / "terminal.gif").exists()
+    assert (log_dir / "0" / "trimmed_terminal.cast").exists()
+
+
+def test_enforce_quota_compresses_finished_casts(
+    log_dir: pathlib.Path, mocker: MockerFixture
+):
+    import src.export
+    import src.quota
+    import src.terminal
+
+    mocker.patch.object(src.quota.registry, "get_live_window_ids", return_value={2})
+    _, events = src.terminal.read_cast(log_dir / "0" / "terminal.cast")
+
+    evictions = src.quota.enforce_quota(log_dir, max_bytes=0, min_free_bytes=0)
+
+    assert [(eviction.path, eviction.action) for eviction in evictions[-4:]] == [
+        (log_dir / "0" / "terminal_text.log", "compress"),
+        (log_dir / "1" / "terminal_text.log", "compress"),
+        (log_dir / "0" / "terminal.cast", "compress"),
+        (log_dir / "1" / "terminal.cast", "compress"),
+    ]
+    assert sorted(path.name for path in (log_dir / "0").iterdir()) == [
+        "terminal.cast.gz",
+        "terminal_text.log.gz",
+    ]
+    assert sorted(path.name for path in (log_dir / "2").iterdir()) == [
+        "terminal.cast",
+        "terminal.gif",
+        "terminal_text.log",
+        "trimmed_terminal.cast",
+    ]
+    with gzip.open(log_dir / "0" / "terminal_text.log.gz", "rt") as f:
+        assert f.read() == "$ ls\n" * 1000
+    # The search index is counted but kept
+    assert (log_dir / "search.sqlite").exists()
+    assert src.terminal.read_cast(log_dir / "0" / "terminal.cast.gz")[1] == events
+    assert [cast_file.name for _, cast_file in src.export.get_cast_files(log_dir)] == [
+        "terminal.cast.gz",
+        "terminal.cast.gz",
+        "terminal.cast",
+    ]
+
+
+def test_enforce_quota_under_quota(log_dir: pathlib.Path):
+    import src.quota
+
+    assert src.quota.enforce_quota(log_dir, min_free_bytes=0) == []
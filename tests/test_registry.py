@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import concurrent.futures
+import os
+import pathlib
+import subprocess
+import sys
+
+
+def test_allocate_window_id_is_unique(tmp_path: pathlib.Path):
+    import src.registry
+
+    (tmp_path / "1").mkdir()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=8) as pool:
+        window_ids = list(
+            pool.map(lambda _: src.registry.allocate_window_id(tmp_path), range(32))
+        )
+
+    assert sorted(window_ids) == [0, *range(2, 33)]
+    assert src.registry.allocate_window_id(tmp_path) == 33
+
+
+def test_live_windows(tmp_path: pathlib.Path):
+    import src.registry
+
+    window = src.registry.register_window(tmp_path)
+    assert window.pid == os.getpid()
+    assert src.registry.get_window_info(window.window_id, tmp_path) == window
+
+    dead_pid = int(
+        subprocess.check_output(
+            [sys.executable, "-c", "import os; print(os.getpid())"]
+        ).decode()
+    )
+    dead_window = src.registry.register_window(tmp_path, pid=dead_pid)
+    closed_window = src.registry.register_window(tmp_path)
+    src.registry.unregister_window(closed_window.window_id, tmp_path)
+
+    assert list(src.registry.iter_live_windows(tmp_path)) == [window]
+    # Dead recorders are pruned, closed windows keep their recorder info
+    assert not (tmp_path / "live" / str(dead_window.window_id)).exists()
+    assert src.registry.get_window_info(closed_window.window_id, tmp_path)
+    assert src.registry.get_live_window_ids(tmp_path) == {window.window_id}
+
+
+def test_no_live_windows(tmp_path: pathlib.Path):
+    import src.registry
+
+    assert src.registry.get_live_window_ids(tmp_path / "missing") == set()
+
+
+def test_reused_pid_is_not_live(tmp_path: pathlib.Path):
+    import json
+
+    import src.registry
+
+    window = src.registry.register_window(tmp_path)
+    assert window.process_start_ticks is not None
+    assert window.process_start_ticks == src.registry.get_process_start_ticks(
+        os.getpid()
+    )
+    assert src.registry.get_live_window_ids(tmp_path) == {window.window_id}
+
+    # Another process that got the recorder's pid after it exited
+    reused_window = src.registry.register_window(tmp_path)
+    recorder_file = tmp_path / str(reused_window.window_id) / "recorder.json"
+    recorder_file.write_text(
+        json.dumps(
+            reused_window._replace(
+                process_start_ticks=window.process_start_ticks - 1
+            )._asdict()
+        )
+    )
+    # Written before start ticks were recorded
+    old_window = src.registry.register_window(tmp_path)
+    recorder_file = tmp_path / str(old_window.window_id) / "recorder.json"
+    recorder_file.write_text(
+        json.dumps(
+            {"window_id": old_window.window_id, "pid": os.getpid(), "start_time": 0}
+        )
+    )
+
+    assert src.registry.get_live_window_ids(tmp_path) == {
+        window.window_id,
+        old_window.window_id,
+    }
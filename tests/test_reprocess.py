@@ -0,0 +1,178 @@
+from __future__ import annotations
+
+import pathlib
+from typing import TYPE_CHECKING
+
+import pytest
+
+if TYPE_CHECKING:
+    from pytest_mock import MockerFixture
+
+TEST_ROOT = pathlib.Path(__file__).parent
+
+
+def test_iter_chunks_matches_prompt_indices():
+    import json
+
+    import src.reprocess
+
+    _, events = src.reprocess.terminal.read_cast(TEST_ROOT / "wordle.cast")
+    prompt_indices = json.loads((TEST_ROOT / "wordle.cast.prompt-indices").read_text())
+
+    chunks = list(src.reprocess.iter_chunks(events, prompt_buffer=5))
+
+    assert len(chunks) > 1
+    first_chunk, first_offset = chunks[0]
+    assert first_offset == 0
+    assert len(first_chunk) == prompt_indices[5] + 1
+    assert chunks[1][1] == first_chunk[-1][0]
+    assert "".join(event[2] for chunk, _ in chunks for event in chunk) == "".join(
+        event[2] for event in events
+    )
+
+
+@pytest.mark.parametrize("prompt_buffer", [1, 2, 5])
+def test_iter_chunks_matches_split_at_prompt(prompt_buffer: int):
+    import src.reprocess
+
+    terminal = src.reprocess.terminal
+    _, events = terminal.read_cast(TEST_ROOT / "wordle.cast")
+    # Two prompts in one event, and a prompt in the last event
+    prefix = terminal.get_terminal_prefix(events)
+    events = [
+        *events,
+        (events[-1][0] + 1, "o", f"out\r\n{prefix}$ ls\r\n{prefix}$ "),
+        (events[-1][0] + 2, "o", f"more\r\n{prefix}$ "),
+    ]
+
+    expected = []
+    remaining_events = events
+    last_cast_time = 0
+    while (
+        split_events := terminal.split_at_prompt(
+            remaining_events, prefix, prompt_buffer
+        )
+    ) is not None:
+        complete_events, remaining_events = split_events
+        expected.append((complete_events, last_cast_time))
+        last_cast_time = complete_events[-1][0]
+    expected.append((remaining_events, last_cast_time))
+
+    assert list(src.reprocess.iter_chunks(events, prompt_buffer)) == expected
+
+
+@pytest.mark.asyncio
+async def test_reprocess_limits_pending_chunks(
+    tmp_path: pathlib.Path, mocker: MockerFixture
+):
+    import src.reprocess
+
+    jobs = list(
+        src.reprocess.get_jobs(
+            [TEST_ROOT / "wordle.cast"],
+            prompt_buffer=1,
+            log_text=True,
+            styled_text=False,
+            agg=None,
+            fps_cap=7,
+            speed=3,
+            max_image_bytes=None,
+        )
+    )
+    num_jobs_taken = 0
+
+    def iter_jobs():
+        nonlocal num_jobs_taken
+        for job in jobs:
+            num_jobs_taken += 1
+            yield job
+
+    jobs_taken_when_written = []
+
+    async def record_write(_output_dir: pathlib.Path, _chunk):
+        jobs_taken_when_written.append(num_jobs_taken)
+
+    mocker.patch.object(src.reprocess, "_write_chunk", side_effect=record_write)
+
+    assert await src.reprocess.reprocess(iter_jobs(), tmp_path, max_workers=2) == len(
+        jobs
+    )
+    assert len(jobs) > 10
+    for num_written, num_taken in enumerate(jobs_taken_when_written):
+        assert num_taken - num_written <= 2 * 2
+
+
+@pytest.mark.asyncio
+async def test_reprocess_writes_chunks_in_order(tmp_path: pathlib.Path):
+    import src.reprocess
+
+    window_dir = tmp_path / "terminals" / "3"
+    window_dir.mkdir(parents=True)
+    cast_file = window_dir / "terminal.cast"
+    cast_file.write_text((TEST_ROOT / "wordle.cast").read_text())
+
+    jobs = list(
+        src.reprocess.get_jobs(
+            [cast_file],
+            prompt_buffer=5,
+            log_text=True,
+            styled_text=False,
+            agg=None,
+            fps_cap=7,
+            speed=3,
+            max_image_bytes=None,
+        )
+    )
+    output_dir = tmp_path / "output"
+    num_chunks = await src.reprocess.reprocess(iter(jobs), output_dir, max_workers=2)
+
+    assert num_chunks == len(jobs)
+    text_files = sorted((output_dir / "3").glob("chunk_*.txt"))
+    assert len(text_files) == len(jobs)
+    for job, text_file in zip(jobs, text_files):
+        assert text_file.read_bytes().decode() == src.reprocess.terminal.strip_ansi(
+            "".join(event[2] for event in job.events)
+        )
+        cast_header, events = src.reprocess.terminal.read_cast(
+            text_file.with_suffix(".cast")
+        )
+        assert events[0][0] == round(job.events[0][0] - job.time_offset, 6)
+
+
+@pytest.mark.asyncio
+async def test_reprocess_uploads_in_order(
+    tmp_path: pathlib.Path, mocker: MockerFixture
+):
+    import src.reprocess
+
+    jobs = list(
+        src.reprocess.get_jobs(
+            [TEST_ROOT / "wordle.cast"],
+            prompt_buffer=5,
+            log_text=True,
+            styled_text=False,
+            agg=None,
+            fps_cap=7,
+            speed=3,
+            max_image_bytes=None,
+        )
+    )
+    mock_log = mocker.patch.object(
+        src.reprocess.HOOKS, "log_with_attributes", autospec=True
+    )
+
+    await src.reprocess.reprocess(
+        iter(jobs), tmp_path, upload=True, log_casts=True, max_workers=2
+    )
+
+    entries = [call.args[-1] for call in mock_log.call_args_list]
+    assert len(entries) == 2 * len(jobs)
+    terminal = src.reprocess.terminal
+    for job, text_entry, cast_entry in zip(jobs, entries[::2], entries[1::2]):
+        assert text_entry.startswith("Terminal window: 0\n\n")
+        assert cast_entry == "Terminal window: 0 (asciicast)\n\n" + "".join(
+            terminal.events_to_cast_lines(
+                job.cast_header,
+                terminal.adjust_event_times(job.events, job.time_offset),
+            )
+        )
@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import pathlib
+from typing import TYPE_CHECKING
+
+import pytest
+
+if TYPE_CHECKING:
+    from pytest_mock import MockerFixture
+
+TEST_ROOT = pathlib.Path(__file__).parent
+
+
+@pytest.mark.parametrize(
+    "line, expected",
+    [
+        ("\x1b[01;32mhello\x1b[00m world\r\n", "hello world"),
+        ("\x1b]0;title\x07text\n", "text"),
+        ("progress 10%\rprogress 100%\n", "progress 100%"),
+        ("lsx\b \b\n", "ls"),
+    ],
+)
+def test_clean_line(line: str, expected: str):
+    import src.search
+
+    assert src.search.clean_line(line) == expected
+
+
+def test_iter_lines_splits_commands_and_output():
+    import src.search
+
+    events = [
+        (1.0, "o", "\x1b[01;32mme@host\x1b[00m:~$ "),
+        (1.5, "o", "ls -la\r\n"),
+        (1.6, "o", "guess.py  words"),
+        (1.7, "o", ".txt\r\n"),
+        (1.8, "i", "ignored\r\n"),
+        (2.0, "o", "\x1b[01;32mme@host\x1b[00m:~$ "),
+    ]
+
+    lines = list(src.search.iter_lines(events, "\x1b[01;32mme@host"))
+
+    assert lines == [
+        (1.0, src.search.LineKind.COMMAND, "ls -la"),
+        (1.6, src.search.LineKind.OUTPUT, "guess.py  words.txt"),
+    ]
+
+
+def test_search_index(tmp_path: pathlib.Path):
+    import src.search
+    import src.terminal
+
+    cast_header, events = src.terminal.read_cast(TEST_ROOT / "wordle.cast")
+    terminal_prefix = src.terminal.get_terminal_prefix(events)
+    index = src.search.SearchIndex(tmp_path / "search.sqlite")
+    index.add_events(3, cast_header["timestamp"], events, terminal_prefix)
+    index.add_events(4, cast_header["timestamp"] + 1, events[:5], terminal_prefix)
+
+    hits = index.search("guess.py", kind=src.search.LineKind.COMMAND)
+    assert hits
+    assert all("guess.py" in hit.text for hit in hits)
+    assert [hit.time for hit in hits] == sorted(
+        (hit.time for hit in hits), reverse=True
+    )
+    assert hits[0].time > cast_header["timestamp"]
+
+    assert {hit.window_id for hit in index.search("ls")} == {3, 4}
+    assert {hit.window_id for hit in index.search("ls", window_id=3)} == {3}
+    assert index.search("urllib.requ")[0].text.startswith("import urllib.request")
+    assert index.search('"') == []
+    assert src.search.SearchIndex(tmp_path / "missing.sqlite").search("ls") == []
+
+
+@pytest.mark.asyncio
+async def test_log_monitor_indexes_chunks(
+    tmp_path: pathlib.Path, mocker: MockerFixture
+):
+    import src.terminal
+    from src.settings import Settings
+
+    mocker.patch.object(
+        src.terminal,
+        "load_settings",
+        return_value=Settings(
+            {"agent": {"terminal_recording": "NO_TERMINAL_RECORDING"}}
+        ),
+    )
+    log_monitor = src.terminal.LogMonitor(window_id=2, log_dir=tmp_path)
+    log_monitor.log_file.write_text((TEST_ROOT / "wordle.cast").read_text())
+
+    await log_monitor.check_for_updates()
+
+    hits = log_monitor.search_index.search("cat guess.py")
+    assert [hit.window_id for hit in hits] == [2]
+    assert (tmp_path / "search.sqlite").exists()
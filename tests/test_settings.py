@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import json
+import os
+import pathlib
+from typing import TYPE_CHECKING, Any
+
+import pytest
+
+if TYPE_CHECKING:
+    from pytest_mock import MockerFixture
+
+_MANIFEST_FILE = pathlib.Path(__file__).parents[1] / "manifest.json"
+
+
+def _make_run_info(**agent_settings: Any) -> dict[str, Any]:
+    return {
+        "task": {
+            "instructions": "Do the task",
+            "permissions": ["full_internet"],
+            "scoring": {"intermediate": True},
+        },
+        "agent": {
+            "ai_tools": "NO_AI_TOOLS",
+            "terminal_recording": "GIF_TERMINAL_RECORDING",
+            **agent_settings,
+        },
+    }
+
+
+@pytest.fixture(name="run_info_file")
+def fixture_run_info_file(mocker: MockerFixture, tmp_path: pathlib.Path):
+    import src.settings
+
+    run_info_file = tmp_path / "run_info.json"
+    run_info_file.write_text(json.dumps(_make_run_info()))
+    mocker.patch.object(src.settings, "RUN_INFO_FILE", run_info_file)
+    mocker.patch.object(src.settings, "MANIFEST_FILE", _MANIFEST_FILE)
+    mocker.patch.object(src.settings, "_cached_settings", None)
+    return run_info_file
+
+
+def test_load_settings_accessors(run_info_file: pathlib.Path):
+    from src.settings import TerminalRecording, get_settings, load_settings
+
+    settings = load_settings()
+
+    assert settings.terminal_recording == TerminalRecording.GIF_TERMINAL_RECORDING
+    assert settings.ai_tools == "NO_AI_TOOLS"
+    assert settings.intermediate_scoring
+    assert settings.permissions == ["full_internet"]
+    assert get_settings() == _make_run_info()
+
+
+def test_load_settings_cached_until_changed(
+    mocker: MockerFixture, run_info_file: pathlib.Path
+):
+    from src.settings import TerminalRecording, load_settings
+
+    settings = load_settings()
+    spy_read_text = mocker.spy(pathlib.Path, "read_text")
+
+    assert load_settings() is settings
+    assert spy_read_text.call_count == 0
+
+    run_info_file.write_text(
+        json.dumps(_make_run_info(terminal_recording="NO_TERMINAL_RECORDING"))
+    )
+    stat = run_info_file.stat()
+    os.utime(run_info_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    reloaded = load_settings()
+    assert reloaded is not settings
+    assert reloaded.terminal_recording == TerminalRecording.NO_TERMINAL_RECORDING
+    assert load_settings() is reloaded
+
+
+@pytest.mark.parametrize(
+    ("agent_settings", "message"),
+    [
+        ({"terminal_recording": "SOME_RECORDING"}, "should be one of"),
+        ({"ai_tools": 1}, "should be of type string"),
+        ({"extra": "setting"}, "unexpected property extra"),
+    ],
+)
+def test_load_settings_invalid(
+    run_info_file: pathlib.Path, agent_settings: dict[str, Any], message: str
+):
+    from src.settings import load_settings
+
+    run_info_file.write_text(json.dumps(_make_run_info(**agent_settings)))
+
+    with pytest.raises(ValueError, match=message):
+        load_settings()
+
+
+def test_load_settings_missing_setting(run_info_file: pathlib.Path):
+    from src.settings import load_settings
+
+    run_info = _make_run_info()
+    del run_info["agent"]["ai_tools"]
+    run_info_file.write_text(json.dumps(run_info))
+
+    with pytest.raises(ValueError, match="missing ai_tools"):
+        load_settings()
+
+
+@pytest.mark.parametrize(
+    ("recording", "expected"),
+    [
+        ("NO_TERMINAL_RECORDING", (False, False, False, False)),
+        ("TEXT_TERMINAL_RECORDING", (False, True, False, False)),
+        ("STYLED_TEXT_TERMINAL_RECORDING", (False, True, True, False)),
+        ("GIF_TERMINAL_RECORDING", (True, False, False, False)),
+        ("FULL_TERMINAL_RECORDING", (True, True, False, False)),
+        ("CAST_TERMINAL_RECORDING", (False, True, False, True)),
+    ],
+)
+def test_terminal_recording_modes(
+    recording: str, expected: tuple[bool, bool, bool, bool]
+):
+    from src.settings import TerminalRecording
+
+    mode = TerminalRecording(recording)
+
+    assert (mode.logs_gifs, mode.logs_text, mode.styled_text, mode.logs_casts) == (
+        expected
+    )
+
+
+@pytest.mark.asyncio
+async def test_async_cleanup_closes_hooks_session(mocker: MockerFixture):
+    import sys
+    import types
+
+    from src.settings import async_cleanup, detach_hooks_session
+
+    client_session = mocker.AsyncMock(closed=False)
+    pyhooks = types.SimpleNamespace(hooks_api_http_session=client_session)
+    mocker.patch.dict(sys.modules, {"pyhooks": pyhooks})
+
+    await async_cleanup()
+
+    client_session.close.assert_awaited_once()
+    assert pyhooks.hooks_api_http_session is None
+    assert detach_hooks_session() is None
+
+    # Not imported at all
+    del sys.modules["pyhooks"]
+    assert detach_hooks_session() is None
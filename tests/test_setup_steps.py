@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import asyncio
+from typing import TYPE_CHECKING
+
+import pytest
+
+if TYPE_CHECKING:
+    import pathlib
+
+
+def _make_step(
+    name: str,
+    calls: list[str],
+    depends_on: tuple[str, ...] = (),
+    fail: bool = False,
+    wait_for: asyncio.Event | None = None,
+    done: asyncio.Event | None = None,
+):
+    from src.setup_steps import Step
+
+    async def run():
+        calls.append(f"{name} start")
+        if wait_for is not None:
+            await asyncio.wait_for(wait_for.wait(), timeout=5)
+        if fail:
+            raise RuntimeError(f"{name} failed")
+        calls.append(f"{name} end")
+        if done is not None:
+            done.set()
+
+    return Step(name, run, depends_on)
+
+
+@pytest.mark.asyncio
+async def test_run_steps_order_and_concurrency(tmp_path: pathlib.Path):
+    from src.setup_steps import get_checkpoint_file, is_done, run_steps
+
+    calls: list[str] = []
+    # a can only finish after b, so they must run at the same time
+    b_done = asyncio.Event()
+    steps = [
+        _make_step("c", calls, ("a", "b")),
+        _make_step("a", calls, wait_for=b_done),
+        _make_step("b", calls, done=b_done),
+    ]
+
+    results = await run_steps(steps, tmp_path)
+
+    # a and b start together, c waits for both
+    assert calls == ["a start", "b start", "b end", "a end", "c start", "c end"]
+    assert [result.name for result in results] == ["c", "a", "b"]
+    seconds = {
+        result.name: result.seconds for result in results if result.seconds is not None
+    }
+    assert seconds.keys() == {"a", "b", "c"}
+    assert seconds["a"] >= seconds["b"]
+    assert is_done(steps, tmp_path)
+    assert float(get_checkpoint_file("a", tmp_path).read_text()) == round(
+        seconds["a"], 3
+    )
+
+
+@pytest.mark.asyncio
+async def test_run_steps_resumes_after_failure(
+    tmp_path: pathlib.Path, capsys: pytest.CaptureFixture[str]
+):
+    from src.setup_steps import is_done, run_steps
+
+    calls: list[str] = []
+    steps = [
+        _make_step("e", calls, ("c",)),
+        _make_step("a", calls),
+        _make_step("b", calls, fail=True),
+        _make_step("c", calls, ("b",)),
+        _make_step("d", calls, ("a",)),
+    ]
+
+    with pytest.raises(RuntimeError, match="b failed"):
+        await run_steps(steps, tmp_path)
+    assert sorted(calls) == ["a end", "a start", "b start", "d end", "d start"]
+    assert not is_done(steps, tmp_path)
+    # Only the step that failed is reported as failed, its dependents are skipped
+    errors = capsys.readouterr().err.splitlines()
+    assert errors == [
+        "Setup step b failed: RuntimeError('b failed')",
+        "Setup step c: skipped, ['b'] not done",
+        "Setup step e: skipped, ['c'] not done",
+    ]
+
+    calls.clear()
+    steps[2] = _make_step("b", calls)
+    results = await run_steps(steps, tmp_path)
+
+    assert calls == ["b start", "b end", "c start", "c end", "e start", "e end"]
+    assert {result.name: result.seconds is None for result in results} == {
+        "a": True,
+        "b": False,
+        "c": False,
+        "d": True,
+        "e": False,
+    }
+    assert is_done(steps, tmp_path)
+
+
+@pytest.mark.parametrize(
+    ("dependencies", "message"),
+    [
+        ({"a": (), "b": ("x",)}, "unknown"),
+        ({"a": ("b",), "b": ("a",)}, "depend on each other"),
+        ({"a": ("a",)}, "depend on each other"),
+    ],
+)
+@pytest.mark.asyncio
+async def test_run_steps_invalid(
+    tmp_path: pathlib.Path, dependencies: dict[str, tuple[str, ...]], message: str
+):
+    from src.setup_steps import run_steps
+
+    calls: list[str] = []
+    steps = [
+        _make_step(name, calls, depends_on) for name, depends_on in dependencies.items()
+    ]
+
+    with pytest.raises(ValueError, match=message):
+        await run_steps(steps, tmp_path)
+    assert calls == []
+
+
+def test_reset(tmp_path: pathlib.Path):
+    from src.setup_steps import get_checkpoint_file, reset
+
+    checkpoint_dir = tmp_path / ".setup"
+    checkpoint_dir.mkdir()
+    get_checkpoint_file("a", checkpoint_dir).touch()
+
+    reset(checkpoint_dir)
+
+    assert not checkpoint_dir.exists()
@@ -84,8 +84,10 @@ def fixture_git_repo_with_remote(
 
 @pytest.fixture(name="settings")
 def fixture_settings(mocker: MockerFixture):
+    from src.settings import Settings
+
     settings = {"task": {"permissions": ["full_internet"]}}
-    mocker.patch("src.settings.get_settings", return_value=settings)
+    mocker.patch("src.settings.load_settings", return_value=Settings(settings))
     yield settings
 
 
@@ -3,6 +3,7 @@ from __future__ import annotations
 import collections.abc
 import json
 import pathlib
+import re
 from typing import Callable, Generator, Sequence, TextIO, TypedDict, TYPE_CHECKING
 
 import pytest
@@ -63,6 +64,7 @@ def fixture_log_monitor(
     None,
 ]:
     import src.terminal
+    from src.settings import Settings
 
     def create_log_monitor(
         settings: dict[str, str | int | dict[str, str]] | None = None,
@@ -70,7 +72,9 @@ def fixture_log_monitor(
         if settings is None:
             settings = {"agent": {"terminal_recording": "NO_TERMINAL_RECORDING"}}
 
-        mocker.patch.object(src.terminal, "get_settings", return_value=settings)
+        mocker.patch.object(
+            src.terminal, "load_settings", return_value=Settings(settings)
+        )
         return src.terminal.LogMonitor(window_id=0, log_dir=tmp_path)
 
     yield create_log_monitor
@@ -143,3 +147,256 @@ async def test_logs_sent_after_n_prompt_events(
     assert log_monitor.new_events == [
         list(e) for e in cast_data["events"][start_idx : stop_idx + 1]
     ]
+
+
+@pytest.mark.asyncio
+async def test_cast_log_sends_trimmed_cast(
+    cast_data: CastData,
+    log_monitor_factory: Callable[
+        [dict[str, str | int | dict[str, str]]], src.terminal.LogMonitor
+    ],
+    mocker: MockerFixture,
+) -> None:
+    import src.terminal
+
+    log_monitor = log_monitor_factory(
+        {"agent": {"terminal_recording": "CAST_TERMINAL_RECORDING"}},
+    )
+    assert log_monitor.log_casts
+    assert not log_monitor.log_gifs
+    assert log_monitor.log_text
+    assert not log_monitor.styled_text
+    mock_log = mocker.patch.object(
+        src.terminal.HOOKS, "log_with_attributes", autospec=True
+    )
+
+    with open(log_monitor.log_file, "w") as f:
+        write_cast_header(f, cast_data["cast_header"])
+        write_cast_events(
+            f, cast_data["events"][: cast_data["prompt_event_indices"][6] + 1]
+        )
+
+    await log_monitor.check_for_updates()
+
+    # The text log, then the cast, both with the window title
+    assert mock_log.call_count == 2
+    text_entry, cast_entry = (call.args[-1] for call in mock_log.call_args_list)
+    assert text_entry.startswith(f"Terminal window: {log_monitor.window_id}\n\n")
+    title, cast_text = cast_entry.split("\n\n", 1)
+    assert title == f"Terminal window: {log_monitor.window_id} (asciicast)"
+    assert cast_text == log_monitor.trimmed_log_file.read_text()
+    header, *events = cast_text.splitlines()
+    assert json.loads(header) == cast_data["cast_header"]
+    assert len(events) == cast_data["prompt_event_indices"][5] + 1
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("plain <text>", "plain &lt;text&gt;"),
+        ("\x1b[31mred\x1b[0m done", '<span style="color:#cd3131">red</span> done'),
+        (
+            "\x1b[01;32magent\x1b[00m:\x1b[01;34m~\x1b[00m$ ",
+            '<span style="font-weight:bold;color:#0dbc79">agent</span>:'
+            '<span style="font-weight:bold;color:#2472c8">~</span>$ ',
+        ),
+        (
+            "\x1b[38;5;196;48;2;0;0;255mx\x1b[39my",
+            '<span style="color:#ff0000;background-color:#0000ff">x</span>'
+            '<span style="background-color:#0000ff">y</span>',
+        ),
+        ("\x1b]0;agent@host: ~\x07\x1b[?2004h$ ", "$ "),
+    ],
+)
+def test_ansi_to_html(text: str, expected: str) -> None:
+    import src.terminal
+
+    assert src.terminal.ansi_to_html(text) == expected
+
+
+@pytest.mark.asyncio
+async def test_gif_downscaled_to_fit_budget(
+    cast_data: CastData,
+    log_monitor_factory: Callable[
+        [dict[str, str | int | dict[str, str]]], src.terminal.LogMonitor
+    ],
+    mocker: MockerFixture,
+) -> None:
+    import src.terminal
+
+    log_monitor = log_monitor_factory(
+        {"agent": {"terminal_recording": "GIF_TERMINAL_RECORDING"}},
+    )
+    log_monitor.max_image_bytes = 1500
+
+    async def fake_agg(*args, **kwargs):
+        # Image size grows with the font size
+        font_size = next(
+            int(arg.split("=")[1])
+            for arg in map(str, args)
+            if arg.startswith("--font-size=")
+        )
+        pathlib.Path(args[2]).write_bytes(b"x" * font_size * 100)
+        process = mocker.AsyncMock()
+        process.communicate.return_value = (b"", None)
+        process.wait.return_value = 0
+        return process
+
+    mock_exec = mocker.patch(
+        "asyncio.subprocess.create_subprocess_exec", side_effect=fake_agg
+    )
+    mock_log_image = mocker.patch.object(src.terminal.HOOKS, "log_image", autospec=True)
+
+    await log_monitor._send_gif_log()
+
+    # 14pt and 12pt are too big, 10pt fits
+    assert mock_exec.call_count == 4
+    mock_log_image.assert_called_once()
+    assert len(mock_log_image.call_args.args[-1]) <= 1500
+    assert "font_size=10" in mock_log_image.call_args.kwargs["description"]
+
+
+@pytest.mark.asyncio
+async def test_gif_not_logged_if_over_budget(
+    cast_data: CastData,
+    log_monitor_factory: Callable[
+        [dict[str, str | int | dict[str, str]]], src.terminal.LogMonitor
+    ],
+    mocker: MockerFixture,
+) -> None:
+    import src.terminal
+
+    log_monitor = log_monitor_factory(
+        {"agent": {"terminal_recording": "GIF_TERMINAL_RECORDING"}},
+    )
+    log_monitor.max_image_bytes = 10
+    mocker.patch.object(
+        log_monitor, "_render_gif", autospec=True, return_value=log_monitor.gif_file
+    )
+    log_monitor.gif_file.write_bytes(b"GIF89a" * 10)
+    mock_log_image = mocker.patch.object(src.terminal.HOOKS, "log_image", autospec=True)
+    mock_log = mocker.patch.object(
+        src.terminal.HOOKS, "log_with_attributes", autospec=True
+    )
+
+    await log_monitor._send_gif_log()
+
+    assert not mock_log_image.called
+    assert "GIF not logged" in mock_log.call_args.args[-1]
+
+
+@pytest.mark.parametrize(
+    "text, max_chars, expected",
+    [
+        ("", 10, [""]),
+        ("short", 10, ["short"]),
+        ("line 1\nline 2\nline 3\n", 14, ["line 1\nline 2\n", "line 3\n"]),
+        ("abcdefghij\nkl", 4, ["abcd", "efgh", "ij\n", "kl"]),
+    ],
+)
+def test_split_text(text: str, max_chars: int, expected: list[str]) -> None:
+    import src.terminal
+
+    assert src.terminal.split_text(text, max_chars) == expected
+
+
+@pytest.mark.asyncio
+async def test_text_log_split_into_parts(
+    log_monitor_factory: Callable[
+        [dict[str, str | int | dict[str, str]]], src.terminal.LogMonitor
+    ],
+    mocker: MockerFixture,
+) -> None:
+    import src.terminal
+
+    log_monitor = log_monitor_factory(
+        {"agent": {"terminal_recording": "TEXT_TERMINAL_RECORDING"}},
+    )
+    log_monitor.max_text_entry_chars = 100
+    mock_log = mocker.patch.object(
+        src.terminal.HOOKS, "log_with_attributes", autospec=True
+    )
+
+    lines = [f"line {idx:03d}\r\n" for idx in range(30)]
+    await log_monitor._send_text_log(
+        [(float(idx), "o", line) for idx, line in enumerate(lines)]
+    )
+
+    entries = [call.args[-1] for call in mock_log.call_args_list]
+    assert len(entries) == 3
+    for idx, entry in enumerate(entries, start=1):
+        title, _, content = entry.partition("\n\n")
+        assert title == f"Terminal window: 0 (chunk 0-0, part {idx}/3)"
+        assert len(content) <= 100
+    assert "".join(entry.partition("\n\n")[2] for entry in entries) == "".join(lines)
+
+
+@pytest.mark.asyncio
+async def test_text_log_truncated(
+    log_monitor_factory: Callable[
+        [dict[str, str | int | dict[str, str]]], src.terminal.LogMonitor
+    ],
+    mocker: MockerFixture,
+) -> None:
+    import src.terminal
+
+    log_monitor = log_monitor_factory(
+        {"agent": {"terminal_recording": "TEXT_TERMINAL_RECORDING"}},
+    )
+    log_monitor.max_text_entry_chars = 1000
+    log_monitor.max_text_chars = 2000
+    log_monitor.text_log_file.write_text("previous\n")
+    mock_log = mocker.patch.object(
+        src.terminal.HOOKS, "log_with_attributes", autospec=True
+    )
+
+    text = "".join(f"output line {idx:04d}\n" for idx in range(200))
+    await log_monitor._send_text_log([(0.0, "o", text)])
+
+    mock_log.assert_called_once()
+    entry = mock_log.call_args.args[-1]
+    assert entry.startswith("Terminal window: 0 (chunk 0-0, truncated)\n\n")
+    assert "output line 0000\n" in entry
+    assert "output line 0199\n" in entry
+    assert "output line 0100\n" not in entry
+    assert len(entry) <= 1000
+    assert f"{log_monitor.text_log_file} at byte offset 9, length {len(text)}" in entry
+    assert log_monitor.text_log_file.read_bytes()[9:] == text.encode()
+
+
+@pytest.mark.parametrize("max_text_entry_chars", [0, 100, 511, 512, 1000, 10_000])
+@pytest.mark.parametrize(
+    "text",
+    [
+        "".join(f"output line {idx:04d}\n" for idx in range(200)),
+        "x" * 3000,
+    ],
+    ids=["lines", "single_line"],
+)
+@pytest.mark.asyncio
+async def test_truncate_text_log_keeps_head_and_tail(
+    log_monitor_factory: Callable[
+        [dict[str, str | int | dict[str, str]]], src.terminal.LogMonitor
+    ],
+    max_text_entry_chars: int,
+    text: str,
+) -> None:
+    log_monitor = log_monitor_factory(
+        {"agent": {"terminal_recording": "TEXT_TERMINAL_RECORDING"}},
+    )
+    log_monitor.max_text_entry_chars = max_text_entry_chars
+
+    truncated = await log_monitor._truncate_text_log(text)
+
+    match = re.fullmatch(
+        r"(.*?)\n\[\.\.\. (\d+) characters omitted\. [^\n]* \.\.\.\]\n(.*)",
+        truncated,
+        re.DOTALL,
+    )
+    assert match is not None
+    head, omitted, tail = match[1], int(match[2]), match[3]
+    assert text.startswith(head)
+    assert text.endswith(tail)
+    assert len(head) + omitted + len(tail) == len(text)
+    assert len(head) <= max(max_text_entry_chars // 2, 0)
+    assert len(tail) <= max(max_text_entry_chars // 2, 0)
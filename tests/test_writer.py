@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import os
+import pathlib
+from typing import TYPE_CHECKING
+
+import pytest
+
+if TYPE_CHECKING:
+    from pytest_mock import MockerFixture
+
+
+@pytest.mark.asyncio
+async def test_writelines_is_single_writev(
+    tmp_path: pathlib.Path, mocker: MockerFixture
+):
+    from src.writer import BufferedWriter
+
+    spy_writev = mocker.spy(os, "writev")
+    output_file = tmp_path / "out.jsonl"
+    async with BufferedWriter(output_file, "w") as writer:
+        await writer.writelines(f"{idx}\n" for idx in range(100))
+        assert not output_file.exists()
+
+    assert spy_writev.call_count == 1
+    assert output_file.read_text() == "".join(f"{idx}\n" for idx in range(100))
+
+
+def test_writev_all_partial_writes(tmp_path: pathlib.Path, mocker: MockerFixture):
+    from src.writer import _writev_all
+
+    writev = os.writev
+
+    def short_writev(fd: int, buffers: list[bytes]) -> int:
+        # Write at most 7 bytes at a time, splitting buffers at odd places
+        data = b"".join(buffers)[:7]
+        return writev(fd, [data])
+
+    mocker.patch.object(os, "writev", side_effect=short_writev)
+    buffers = [f"{idx}\n".encode() for idx in range(1000)] + [b"", b"end"]
+    output_file = tmp_path / "out.txt"
+    fd = os.open(output_file, os.O_WRONLY | os.O_CREAT)
+    try:
+        total = _writev_all(fd, buffers)
+    finally:
+        os.close(fd)
+
+    assert total == sum(len(buffer) for buffer in buffers)
+    assert output_file.read_bytes() == b"".join(buffers)
+
+
+@pytest.mark.asyncio
+async def test_flushes_when_buffer_is_full(tmp_path: pathlib.Path):
+    from src.writer import BufferedWriter
+
+    output_file = tmp_path / "out.txt"
+    writer = BufferedWriter(output_file, "w", flush_bytes=10)
+    await writer.write("12345")
+    assert not output_file.exists()
+    await writer.write("67890")
+    assert output_file.read_text() == "1234567890"
+    await writer.write("abc")
+    await writer.close()
+    assert output_file.read_text() == "1234567890abc"
+
+
+@pytest.mark.parametrize(
+    "mode, expected",
+    [
+        ("a", "existing\nnew\n"),
+        ("w", "new\n"),
+    ],
+)
+@pytest.mark.asyncio
+async def test_mode(tmp_path: pathlib.Path, mode: str, expected: str):
+    from src.writer import BufferedWriter
+
+    output_file = tmp_path / "out.txt"
+    output_file.write_text("existing\n")
+    async with BufferedWriter(output_file, mode) as writer:
+        await writer.write("new\n")
+
+    assert output_file.read_text() == expected
+
+
+@pytest.mark.asyncio
+async def test_write_mode_truncates_when_empty(tmp_path: pathlib.Path):
+    from src.writer import BufferedWriter
+
+    output_file = tmp_path / "out.txt"
+    output_file.write_text("existing\n")
+    async with BufferedWriter(output_file, "w"):
+        pass
+
+    assert output_file.read_text() == ""
+
+
+@pytest.mark.parametrize(
+    "fsync, expected_calls",
+    [
+        ("NEVER", 0),
+        ("ON_FLUSH", 2),
+        ("ON_CLOSE", 1),
+    ],
+)
+@pytest.mark.asyncio
+async def test_fsync_policy(
+    tmp_path: pathlib.Path, mocker: MockerFixture, fsync: str, expected_calls: int
+):
+    from src.writer import BufferedWriter, FsyncPolicy
+
+    spy_fsync = mocker.spy(os, "fsync")
+    writer = BufferedWriter(tmp_path / "out.txt", fsync=FsyncPolicy(fsync))
+    await writer.write("a")
+    await writer.flush()
+    await writer.write("b")
+    await writer.flush()
+    await writer.close()
+
+    assert spy_fsync.call_count == expected_calls
+
+
+@pytest.mark.asyncio
+async def test_concurrent_flushes_open_once(
+    tmp_path: pathlib.Path, mocker: MockerFixture
+):
+    import asyncio
+
+    from src.writer import BufferedWriter
+
+    spy_open = mocker.spy(os, "open")
+    output_file = tmp_path / "out.jsonl"
+    writer = BufferedWriter(output_file)
+
+    async def write_and_flush(idx_line: int):
+        await writer.write(f"{idx_line}\n")
+        await writer.flush()
+
+    await asyncio.gather(*(write_and_flush(idx_line) for idx_line in range(50)))
+    await writer.close()
+
+    assert spy_open.call_count == 1
+    assert sorted(map(int, output_file.read_text().splitlines())) == list(range(50))
+    assert writer.position == output_file.stat().st_size